@@ -1,17 +1,73 @@
+import uuid
+
 from google.adk.agents import LlmAgent
+from google.adk.tools import FunctionTool
+from google.adk.tools.tool_context import ToolContext
 
+from common.client import BalancedAgentConnector
+from common.model_tiers import tiered_model
+from models.agent import AgentCard
 from utilities.consul_agent import ConsulEnabledAIAgent
 
 
 class OrchestratorAgent(ConsulEnabledAIAgent):
 
+    def create_agent_connector(self, card: AgentCard) -> None:
+        """
+        Connect to a discovered child agent through a pooled, Consul-resolving
+        client that balances tasks across all healthy instances of the agent.
+        """
+        # A transparent proxy already balances across instances of the virtual service
+        service = card.id if self.discovery.networking != "transparent-proxy" else None
+        self.connectors[card.name] = BalancedAgentConnector(card.name, card.url, service=service)
+        self.cards[card.name] = card
+        self.skills[card.name] = card.skills
+
+    async def services_changed(self, subagents_card: {}):
+        """
+        Apply discovery changes, then refresh the healthy instances of every
+        child agent (discovery itself only reports the first one).
+        """
+        await super().services_changed(subagents_card)
+        for connector in list(self.connectors.values()):
+            if isinstance(connector, BalancedAgentConnector):
+                await connector.refresh_instances(self.discovery)
+
+    async def _delegate_tasks(self, agent_name: str, messages: list[str], tool_context: ToolContext) -> list[str]:
+        """
+        Tool function: sends several independent sub-questions to the same child
+        agent at once (one batched request, answered concurrently) and returns
+        the reply to each message, in order.
+        Prefer this over repeated _delegate_task calls when the questions do not
+        depend on each other's answers.
+        """
+        if agent_name not in self.connectors:
+            raise ValueError(f"Unknown agent: {agent_name}")
+        connector = self.connectors[agent_name]
+
+        state = tool_context.state
+        if "session_id" not in state:
+            state["session_id"] = str(uuid.uuid4())
+
+        replies = []
+        for result in await connector.send_tasks(messages, state["session_id"]):
+            if isinstance(result, Exception):
+                replies.append(f"Error: {result}")
+            elif result.history and len(result.history) > 1:
+                replies.append(result.history[-1].parts[0].text)
+            else:
+                replies.append("")
+        return replies
+
     def build_agent(self) -> LlmAgent:
         """
         Construct the Gemini-based LlmAgent with tools
         """
+        self._clear_user_defined_tool()
+        self._append_user_defined_tool(FunctionTool(self._delegate_tasks))
         self._set_orchestrator(True)
         ai_agent = LlmAgent(
-            model="gemini-2.5-flash",
+            model=tiered_model("orchestrator", default="gemini-2.5-flash"),
             name="orchestrator_agent",
             description="Delegates user queries to child A2A agents based on intent.",
             instruction=self._root_instruction,
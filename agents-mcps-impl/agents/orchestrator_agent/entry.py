@@ -15,8 +15,8 @@ import click                                # Library for building CLI interface
 
 from agents.orchestrator_agent.OrchestratorAgent import OrchestratorAgent
 # Utility for discovering remote A2A agents from a local registry
-# Shared A2A server implementation (Starlette + JSON-RPC)
-from server.server import A2AServer
+# Shared A2A server implementation (Starlette + JSON-RPC) with admission control
+from common.server import ManagedA2AServer
 # Pydantic models for defining agent metadata (AgentCard, etc.)
 from models.agent import AgentCard, AgentCapabilities, AgentSkill
 from utilities.consul_discovery import ConsulDiscoveryClient
@@ -59,7 +59,7 @@ def main(host: str, port: int, registry: str):
     private_ip = os.environ.get("PRIVATE_IP", default=host)
 
     # 2) Define the OrchestratorAgent's own metadata for discovery
-    capabilities = AgentCapabilities(streaming=False)
+    capabilities = AgentCapabilities(streaming=False, pushNotifications=True)
     skill = AgentSkill(
         id="orchestrate",                          # Unique skill identifier
         name="Orchestrate Tasks",                  # Human-friendly name
@@ -90,7 +90,7 @@ def main(host: str, port: int, registry: str):
     orchestrator = OrchestratorAgent(discovery=discovery_client)
 
     # 4) Create and start the A2A server
-    server = A2AServer(
+    server = ManagedA2AServer(
         host=host,
         port=port,
         agent_card=orchestrator_card,
@@ -11,11 +11,15 @@
 # 📦 Built-in & External Library Imports
 # -----------------------------------------------------------------------------
 
+import os
+
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.tools import FunctionTool
 from dotenv import load_dotenv
 
 from agents.travel_agent.tools.destinations_tool import DestinationsTool
+from common.mcp_pool import PooledMcpToolset
+from common.model_tiers import tiered_model
 from utilities.consul_agent import ConsulEnabledAIAgent
 
 # Load environment variables (like API keys) from a `.env` file
@@ -37,6 +41,27 @@ class TravelAgent(ConsulEnabledAIAgent):
     - Currency exchange rates between regions
     """
 
+    async def create_mcp_tool(self, url: str) -> PooledMcpToolset:
+        """
+        Creates the toolset for a discovered MCP server (e.g. the currency server).
+
+        Instead of re-opening the SSE stream and re-initializing MCP for tool calls,
+        keep MCP_POOL_SIZE long-lived sessions with cached tool schemas.
+        """
+        return PooledMcpToolset(url, pool_size=int(os.environ.get("MCP_POOL_SIZE", 2)))
+
+    async def services_changed(self, subagents_card: {}):
+        """
+        Apply discovery changes, then close the pooled sessions of every MCP
+        toolset that was removed or replaced by one with a new URL.
+        """
+        previous = list(self._remote_mcp_tools.values())
+        await super().services_changed(subagents_card)
+        current = list(self._remote_mcp_tools.values())
+        for toolset in previous:
+            if all(toolset is not kept for kept in current):
+                await toolset.close()
+
     def build_agent(self) -> LlmAgent:
         """
         Creates and configures a Gemini agent specialized in travel and city information.
@@ -51,10 +76,15 @@ class TravelAgent(ConsulEnabledAIAgent):
         )
         self._clear_user_defined_tool()
         self._append_user_defined_tool(FunctionTool(destinations_tool.list_cities_capped))
+        self._append_user_defined_tool(FunctionTool(destinations_tool.list_cities_bulk))
         self._set_orchestrator(False)
 
+        tools = self._get_llm_tools()
+        # Hand the pooled MCP toolsets to the LLM unless consul-adk already did
+        tools += [toolset for toolset in self._remote_mcp_tools.values() if toolset not in tools]
+
         return LlmAgent(
-            model="gemini-2.5-flash",  # Gemini model version
+            model=tiered_model("travel", default="gemini-2.5-flash"),  # Gemini model tier(s)
             name="travel_agent",  # Name of the agent
             description="Geographic expert that lists and provides information about cities worldwide",  # Description for metadata
             instruction="""You are a city information specialist focused on listing cities across different geographical regions.
@@ -65,6 +95,7 @@ class TravelAgent(ConsulEnabledAIAgent):
             - United regions (e.g., "Tell me about Scandinavian countries")
             
             When asked about a location, always use the DestinationsTool to retrieve accurate information. 
+            When asked about several locations at once, use list_cities_bulk with all of them in a single call.
             Present the list of cities in a clear, organized manner:
             
             1. For continents/regions: List the countries they contain
@@ -79,5 +110,5 @@ class TravelAgent(ConsulEnabledAIAgent):
             Be precise, organized, and helpful - your primary goal is to provide comprehensive lists of cities
             when users ask about different regions of the world.
             """,
-            tools=self._get_llm_tools(),
+            tools=tools,
         )
\ No newline at end of file
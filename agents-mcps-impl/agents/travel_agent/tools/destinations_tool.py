@@ -2,7 +2,21 @@ import httpx
 from google.adk.tools import BaseTool, ToolContext
 from typing_extensions import override, Any
 import os
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+from common.locations import Place, location_resolver, normalize
+from common.payload import select_fields, to_compact_dict
+
+
+class DestinationRecord(NamedTuple):
+    """A resolved destination: a continent, united region, country or city."""
+    region_type: str
+    name: str
+    country: str = ""
+    countries: Tuple[str, ...] = ()
+    cities: Tuple[str, ...] = ()
+    landmarks: Tuple[str, ...] = ()
+    cuisine: str = ""
 
 
 class DestinationsTool(BaseTool):
@@ -111,6 +125,10 @@ class DestinationsTool(BaseTool):
                            "Costa Rica", "Panama"]
     }
 
+    # Lookup index built lazily from the tables in this class (see _index)
+    _exact_index: Optional[Dict[str, "DestinationRecord"]] = None
+    _partial_index: List[Tuple[str, "DestinationRecord"]] = []
+
     # City information with key facts
     _city_info = {
         "paris": {"country": "France", "landmarks": ["Eiffel Tower", "Louvre Museum", "Notre Dame Cathedral"], 
@@ -123,111 +141,195 @@ class DestinationsTool(BaseTool):
                     "cuisine": "Diverse international cuisine, famous for bagels, pizza, and fine dining"}
     }
 
-    async def list_cities_capped(self, location: str, max_cities: int = 2) -> Dict[str, Any]:
+    async def list_cities_capped(self, location: str, max_cities: int = 2,
+                                 fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """Lists cities in a given country, continent, or united region with a cap on the number of cities returned.
 
         Attributes:
             location: The country, continent, or united region for which to list cities.
             max_cities: The maximum number of cities to return (default is 2).
+            fields: Optional subset of fields to return, from: region_type, name, country,
+                countries, cities, landmarks, cuisine. Defaults to all available.
         Returns:
             A dictionary containing cities data and related information, with cities list capped to max_cities.
         """
-        # Get the full result
-        result = await self.list_cities(location)
-
-        # If the result contains cities, limit the number to max_cities
-        if "cities" in result and isinstance(result["cities"], list):
-            # Create a copy of the result to avoid modifying the original data
-            capped_result = result.copy()
-            capped_result["cities"] = result["cities"][:2]
-            return capped_result
+        record = self.resolve(location)
+        if record is None:
+            return self._not_found(location)
 
-        # Return the original result if it doesn't contain a cities list
-        return result
+        # Cap the cities list; the record is immutable so the shared data is untouched
+        if record.cities:
+            record = record._replace(cities=record.cities[:max_cities])
+        return self.to_payload(record, fields)
 
-    async def list_cities(self, location: str) -> Dict[str, Any]:
+    async def list_cities(self, location: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """Lists cities in a given country, continent, or united region with detailed information.
 
         Attributes:
             location: The country, continent, or united region for which to list cities.
+            fields: Optional subset of fields to return, from: region_type, name, country,
+                countries, cities, landmarks, cuisine. Defaults to all available.
         Returns:
             A dictionary containing cities data and related information.
         """
-        location = location.lower()
-        
-        # If the location is a continent/region, return countries in that region
-        if location in self._countries_by_region:
-            return {
-                "region_type": "continent",
-                "region_name": location.title(),
-                "countries": self._countries_by_region[location],
-                "message": f"Here are the countries in {location.title()}. You can ask for cities in any of these countries."
-            }
-        
-        # If the location is a united region, return countries in that region
-        elif location in self._united_regions:
-            return {
-                "region_type": "united region",
-                "region_name": location.title(),
-                "countries": self._united_regions[location],
-                "message": f"Here are the countries in the {location.title()} region. You can ask for cities in any of these countries."
-            }
-        
-        # If the location is a country, return cities in that country
-        elif location in self._destinations_data:
-            return {
-                "region_type": "country",
-                "country_name": location.title(),
-                "cities": self._destinations_data[location],
-                "message": f"Here are popular cities and destinations in {location.title()}."
-            }
-        
-        # If we have detailed info about a specific city
-        elif location in self._city_info:
-            city_data = self._city_info[location]
-            return {
-                "region_type": "city",
-                "city_name": location.title(),
-                "country": city_data["country"],
-                "landmarks": city_data["landmarks"],
-                "cuisine": city_data["cuisine"],
-                "message": f"Here's information about {location.title()}, located in {city_data['country']}."
-            }
-        
-        else:
-            # Try to find a partial match for countries
-            for country in self._destinations_data.keys():
-                if location in country or country in location:
-                    return {
-                        "region_type": "country",
-                        "country_name": country.title(),
-                        "cities": self._destinations_data[country],
-                        "message": f"Here are popular cities and destinations in {country.title()}."
-                    }
-            
-            # Try to find a partial match for regions
-            for region in self._countries_by_region.keys():
-                if location in region or region in location:
-                    return {
-                        "region_type": "continent",
-                        "region_name": region.title(),
-                        "countries": self._countries_by_region[region],
-                        "message": f"Here are the countries in {region.title()}. You can ask for cities in any of these countries."
-                    }
-            
-            # Try to find a partial match for united regions
-            for region in self._united_regions.keys():
-                if location in region or region in location:
-                    return {
-                        "region_type": "united region",
-                        "region_name": region.title(),
-                        "countries": self._united_regions[region],
-                        "message": f"Here are the countries in the {region.title()} region. You can ask for cities in any of these countries."
-                    }
-            
-            return {
-                "error": f"Sorry, I don't have information about cities in '{location}'. Try a different country, continent, or region name like 'Europe', 'USA', 'Southeast Asia', or 'Scandinavia'."
-            }
+        record = self.resolve(location)
+        if record is None:
+            return self._not_found(location)
+        return self.to_payload(record, fields)
+
+    async def list_cities_bulk(self, locations: List[str], max_cities: int = 5,
+                               fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Lists cities for many countries, continents, or united regions in a single call.
+
+        Attributes:
+            locations: The countries, continents, or united regions to look up.
+            max_cities: The maximum number of cities to return per location (default is 5).
+            fields: Optional subset of fields to return, from: region_type, name, country,
+                countries, cities, landmarks, cuisine. Defaults to all available.
+        Returns:
+            A dictionary keyed by each requested location with its data, or an "error" entry
+            for locations that could not be found. Duplicate locations (also differently
+            spelled ones, like "USA" and "United States") appear once.
+        """
+        resolved = self.resolve_many(locations)
+        results: Dict[str, Any] = {}
+        seen = set()
+        for location in locations:
+            key = location_resolver.key(location)
+            if key in seen:
+                continue
+            seen.add(key)
+            record = resolved[key]
+            if record is None:
+                results[location] = self._not_found(location)
+                continue
+            if record.cities:
+                record = record._replace(cities=record.cities[:max_cities])
+            results[location] = self.to_payload(record, fields)
+        return results
+
+    def expand_cities(self, location: str, per_country: int = 5, limit: int = 60) -> Optional[List[str]]:
+        """Expands a location into the cities it covers, as "City, Country" names.
+
+        Attributes:
+            location: A city, country, continent, or united region.
+            per_country: The maximum number of cities taken from each country of a
+                continent or united region.
+            limit: The maximum number of cities returned.
+        Returns:
+            The cities (a city expands to itself), or None if the location is unknown.
+        """
+        record = self.resolve(location)
+        if record is None:
+            return None
+        if record.region_type == "city":
+            return [f"{record.name}, {record.country}"]
+        if record.region_type == "country":
+            return [f"{city}, {record.name}" for city in record.cities[:limit]]
+
+        cities = []
+        for country in record.countries:
+            country_record = self.resolve(country)
+            if country_record is not None and country_record.region_type == "country":
+                cities += [f"{city}, {country_record.name}" for city in country_record.cities[:per_country]]
+        return cities[:limit]
+
+    @staticmethod
+    def to_payload(record: "DestinationRecord", fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Serializes a destination record into the compact form sent to the model."""
+        return to_compact_dict(record, select_fields(DestinationRecord._fields, fields))
+
+    @staticmethod
+    def _not_found(location: str) -> Dict[str, Any]:
+        return {
+            "error": f"Sorry, I don't have information about cities in '{location}'. Try a different country, continent, or region name like 'Europe', 'USA', 'Southeast Asia', or 'Scandinavia'."
+        }
+
+    def resolve(self, location: str) -> Optional["DestinationRecord"]:
+        """Resolves a free-text location to a destination record, or None if unknown."""
+        return self.resolve_many([location])[location_resolver.key(location)]
+
+    def resolve_many(self, locations: List[str]) -> Dict[str, Optional["DestinationRecord"]]:
+        """Resolves many locations in one pass over the index.
+
+        Attributes:
+            locations: Free-text locations; locations with the same canonical key
+                (see common.locations) are resolved once.
+        Returns:
+            A dictionary keyed by canonical location key with the record, or None if unknown.
+        """
+        exact, partial = self._index()
+        resolved: Dict[str, Optional[DestinationRecord]] = {}
+        pending = []
+        for location in dict.fromkeys(location_resolver.key(location) for location in locations):
+            record = exact.get(location)
+            if record is None:
+                place = location_resolver.resolve(location)
+                record = self._city_record(place) if place else None
+            resolved[location] = record
+            if record is None:
+                pending.append(location)
+
+        # Single scan of the partial-match candidates for everything still unresolved
+        for key, record in partial:
+            if not pending:
+                break
+            for location in [loc for loc in pending if loc in key or key in loc]:
+                resolved[location] = record
+                pending.remove(location)
+
+        return resolved
+
+    @classmethod
+    def _index(cls):
+        """Builds (once) the exact-name index and the ordered partial-match candidates.
+
+        Exact matches (on normalized names) prefer continents, then united regions,
+        then countries; cities are resolved through the gazetteer. Partial matches
+        prefer countries, then continents, then united regions.
+        """
+        if cls._exact_index is None:
+            exact: Dict[str, DestinationRecord] = {}
+            for region in cls._countries_by_region:
+                exact.setdefault(normalize(region), cls._region_record("continent", region, cls._countries_by_region))
+            for region in cls._united_regions:
+                exact.setdefault(normalize(region), cls._region_record("united region", region, cls._united_regions))
+            for country in cls._destinations_data:
+                exact.setdefault(normalize(country), cls._country_record(country))
+
+            partial = [(normalize(country), exact[normalize(country)]) for country in cls._destinations_data]
+            partial += [(normalize(region), exact[normalize(region)]) for region in cls._countries_by_region]
+            partial += [(normalize(region), exact[normalize(region)]) for region in cls._united_regions]
+            cls._partial_index = partial
+            cls._exact_index = exact
+        return cls._exact_index, cls._partial_index
+
+    @classmethod
+    def _city_record(cls, place: Place) -> "DestinationRecord":
+        city_data = cls._city_info.get(normalize(place.name), {})
+        return DestinationRecord(
+            region_type="city",
+            name=place.name,
+            country=place.country,
+            landmarks=tuple(city_data.get("landmarks", ())),
+            cuisine=city_data.get("cuisine", ""),
+        )
+
+    @classmethod
+    def _country_record(cls, country: str) -> "DestinationRecord":
+        return DestinationRecord(
+            region_type="country",
+            name=country.title(),
+            cities=tuple(cls._destinations_data[country]),
+        )
+
+    @staticmethod
+    def _region_record(region_type: str, region: str, table: Dict[str, List[str]]) -> "DestinationRecord":
+        return DestinationRecord(
+            region_type=region_type,
+            name=region.title(),
+            countries=tuple(table[region]),
+        )
 
     @override
     async def run_async(
@@ -245,4 +347,4 @@ class DestinationsTool(BaseTool):
         print("Running DestinationsTool with args:", args)
 
         location = args["location"]
-        return await self.list_cities(location=location)
\ No newline at end of file
+        return await self.list_cities(location=location, fields=args.get("fields"))
\ No newline at end of file
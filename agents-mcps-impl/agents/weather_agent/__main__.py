@@ -16,8 +16,8 @@
 # Imports
 # -----------------------------------------------------------------------------
 
-# Your custom A2A server class
-from server.server import A2AServer
+# Your custom A2A server class (with admission control and metrics)
+from common.server import ManagedA2AServer
 
 # Models for describing agent capabilities and metadata
 from models.agent import AgentCard, AgentCapabilities, AgentSkill
@@ -55,7 +55,7 @@ def main(host, port):
     """
     agent_id = os.environ.get("SERVICE_NAME")  # Unique identifier for this agent
     # Define what this agent can do – in this case, it does NOT support streaming
-    capabilities = AgentCapabilities(streaming=False)
+    capabilities = AgentCapabilities(streaming=False, pushNotifications=True)
 
     private_ip = os.environ.get("PRIVATE_IP", default=host)
 
@@ -98,7 +98,7 @@ def main(host, port):
     # - the given host/port
     # - this agent's metadata
     # - a task manager that runs the weather agent
-    server = A2AServer(
+    server = ManagedA2AServer(
         host=host,
         port=port,
         agent_card=agent_card,
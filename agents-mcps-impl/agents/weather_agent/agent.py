@@ -11,11 +11,15 @@
 # 📦 Built-in & External Library Imports
 # -----------------------------------------------------------------------------
 
+import os
+
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.tools import FunctionTool
 from dotenv import load_dotenv
 
+from agents.weather_agent.prefetch import WeatherRefresher
 from agents.weather_agent.tools.weather_tool import WeatherTool
+from common.model_tiers import tiered_model
 from utilities.consul_agent import ConsulEnabledAIAgent
 
 # Load environment variables (like API keys) from a `.env` file
@@ -52,16 +56,28 @@ class WeatherAgent(ConsulEnabledAIAgent):
 
         self._clear_user_defined_tool()
         self._append_user_defined_tool(FunctionTool(weather_tool.get_weather))
+        self._append_user_defined_tool(FunctionTool(weather_tool.find_cities))
         self._set_orchestrator(False)
 
         return LlmAgent(
-            model="gemini-1.5-flash-latest",
+            model=tiered_model("weather", default="gemini-1.5-flash-latest"),
             name="weather_agent",
             description="Provides weather information for multiple locations",
             instruction=self._get_agent_instruction(),
             tools=self._get_llm_tools()
         )
 
+    def initialize(self):
+        """
+        Starts the Consul watcher and, when WEATHER_PREFETCH=TRUE, the
+        background refresher that keeps popular cities' weather warm.
+        """
+        super().initialize()
+        if os.environ.get("WEATHER_PREFETCH") == "TRUE":
+            fetcher = WeatherTool(name="WeatherTool", description="Weather prefetch")
+            self._refresher = WeatherRefresher.from_env(fetcher.refresh)
+            self._refresher.start()
+
     def _get_agent_instruction(self) -> str:
         """
         Returns the detailed instruction set for the weather agent.
@@ -82,6 +98,7 @@ class WeatherAgent(ConsulEnabledAIAgent):
 LOCATION HANDLING:
 - Always extract 'locations' parameter as a list (even for single locations)
 - Use the WeatherTool for all weather queries
+- Pass 'fields' to request only the columns you need (e.g. ["location", "temp_c", "condition"])
 - Support city names, regions, and specific addresses
 
 MULTI-LOCATION REQUESTS:
@@ -91,10 +108,10 @@ MULTI-LOCATION REQUESTS:
 
 RECOMMENDATION REQUESTS:
 - When users ask for locations with specific weather conditions:
-  1. First get weather for several cities in the requested region
-  2. Analyze the data against user criteria
-  3. Recommend locations that match the desired conditions
-  4. Explain why each recommendation fits their needs
+  1. Call find_cities once with the region and the criteria (temperature range, conditions, humidity, wind)
+  2. Recommend the returned matches, best first
+  3. Explain why each recommendation fits their needs
+  4. If nothing matches, relax the criterion that is furthest off and call find_cities again
 
 💡 RESPONSE STYLE:
 - Be friendly, informative, and concise
@@ -0,0 +1,157 @@
+# =============================================================================
+# agents/weather_agent/prefetch.py
+# =============================================================================
+# 🎯 Purpose:
+# Keeps current conditions for a "hot set" of cities continuously warm so
+# WeatherTool can answer them from memory with zero upstream latency.
+#
+# The hot set is a static list (WEATHER_HOT_CITIES, or the best-known cities
+# from the DestinationsTool data) plus the top-K most requested locations.
+# Refreshes are paced one at a time at WEATHER_PREFETCH_RATE calls/second,
+# always picking the stalest city, so the load on weatherapi.com is a smooth
+# trickle instead of periodic bursts. A city that could not be refreshed
+# (unknown place, upstream outage) is retried with exponential backoff, so
+# it cannot hold up the rest of the hot set.
+# =============================================================================
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from agents.travel_agent.tools.destinations_tool import DestinationsTool
+from agents.weather_agent.tools.weather_cache import (
+    RequestFrequency,
+    WeatherCache,
+    location_key,
+    request_frequency,
+    weather_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def default_hot_cities() -> List[str]:
+    """
+    Cities the demo's traffic is skewed towards: every city with detailed
+    info plus the headline city of each country in the destinations data.
+    """
+    cities = [city.title() for city in DestinationsTool._city_info]
+    for country_cities in DestinationsTool._destinations_data.values():
+        if country_cities and country_cities[0] not in cities:
+            cities.append(country_cities[0])
+    return cities
+
+
+class WeatherRefresher:
+    """
+    Background refresher for the weather cache.
+
+    Args:
+        fetch: Coroutine function returning fresh weather for one location,
+            or None when there is nothing to store (no usable answer, or the
+            entry was already updated from the shared cache).
+        static_cities: Cities that are always kept warm.
+        top_k: Number of most requested locations added to the hot set.
+        rate: Maximum upstream calls per second spent on refreshing.
+        refresh_ratio: Fraction of the cache TTL after which an entry is refreshed.
+        cache: Cache to keep warm.
+        frequency: Request frequency tracker used to pick the top-K.
+        retry_backoff: Seconds before a city that failed to refresh is tried
+            again; doubled on every further failure, up to the cache TTL.
+    """
+
+    def __init__(
+        self,
+        fetch,
+        static_cities: List[str] = None,
+        top_k: int = 20,
+        rate: float = 0.5,
+        refresh_ratio: float = 0.8,
+        cache: WeatherCache = weather_cache,
+        frequency: RequestFrequency = request_frequency,
+        retry_backoff: float = 30.0,
+    ):
+        self.fetch = fetch
+        self.static_cities = static_cities if static_cities is not None else default_hot_cities()
+        self.top_k = top_k
+        self.rate = rate
+        self.refresh_ratio = refresh_ratio
+        self.cache = cache
+        self.frequency = frequency
+        self.retry_backoff = retry_backoff
+        # location key -> (consecutive failures, monotonic time of the next attempt)
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_env(cls, fetch) -> "WeatherRefresher":
+        """
+        Build a refresher from WEATHER_HOT_CITIES (comma separated),
+        WEATHER_HOT_TOP_K and WEATHER_PREFETCH_RATE.
+        """
+        env_cities = os.environ.get("WEATHER_HOT_CITIES")
+        static = [c.strip() for c in env_cities.split(",") if c.strip()] if env_cities else None
+        return cls(
+            fetch,
+            static_cities=static,
+            top_k=int(os.environ.get("WEATHER_HOT_TOP_K", 20)),
+            rate=float(os.environ.get("WEATHER_PREFETCH_RATE", 0.5)),
+        )
+
+    def hot_set(self) -> List[str]:
+        """Static cities followed by the most requested ones, without duplicates."""
+        seen = set()
+        hot = []
+        for city in self.static_cities + self.frequency.top(self.top_k):
+            key = location_key(city)
+            if key not in seen:
+                seen.add(key)
+                hot.append(city)
+        return hot
+
+    def next_due(self):
+        """The stalest hot city that is due for a refresh and not backing off, or None."""
+        threshold = self.cache.ttl * self.refresh_ratio
+        now = time.monotonic()
+        due = [(self.cache.age(city), city) for city in self.hot_set()
+               if self._failures.get(location_key(city), (0, 0.0))[1] <= now]
+        due = [entry for entry in due if entry[0] >= threshold]
+        return max(due, key=lambda entry: entry[0])[1] if due else None
+
+    def _record_outcome(self, city: str) -> None:
+        """Backs off a city that is still stale after its refresh attempt."""
+        key = location_key(city)
+        if self.cache.age(city) < self.cache.ttl * self.refresh_ratio:
+            self._failures.pop(key, None)
+            return
+        failures = self._failures.get(key, (0, 0.0))[0] + 1
+        delay = min(self.cache.ttl, self.retry_backoff * 2 ** (failures - 1))
+        self._failures[key] = (failures, time.monotonic() + delay)
+        logger.info(f"Could not refresh weather for {city}, retrying in {delay:.0f}s")
+
+    async def run(self) -> None:
+        """Refresh loop; one upstream call per 1/rate seconds at most."""
+        interval = 1.0 / self.rate if self.rate > 0 else 1.0
+        logger.info(f"Weather refresher started ({len(self.static_cities)} static cities, {self.rate}/s)")
+        while not self._stopped.is_set():
+            city = self.next_due()
+            if city is not None:
+                try:
+                    result = await self.fetch(city)
+                    if result is not None:
+                        self.cache.put(city, result)
+                except Exception as e:
+                    logger.warning(f"Failed to refresh weather for {city}: {e}")
+                self._record_outcome(city)
+            await asyncio.sleep(interval)
+
+    def start(self) -> None:
+        """Runs the refresh loop on a daemon thread with its own event loop."""
+        thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.locations import location_resolver
+
+
+def location_key(location: str) -> str:
+    """Canonical cache key of a free-text location ("Paris, FR" and "paris" share one)."""
+    return location_resolver.key(location)
+
+
+class WeatherCache:
+    """A thread-safe TTL cache of current conditions, keyed by location.
+
+    The weather agent serves requests on the server's event loop while the
+    optional background refresher runs on its own thread, so all access is
+    guarded by a lock.
+
+    Attributes:
+        ttl: Seconds an entry is considered fresh.
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, location: str) -> Optional[Any]:
+        """Returns the cached value for `location` if it is still fresh."""
+        with self._lock:
+            entry = self._entries.get(location_key(location))
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def put(self, location: str, value: Any, age: float = 0.0) -> None:
+        """Stores `value`, fetched `age` seconds ago (e.g. by another replica)."""
+        with self._lock:
+            self._entries[location_key(location)] = (time.monotonic() - age, value)
+
+    def age(self, location: str) -> float:
+        """Seconds since `location` was last stored (infinity if never)."""
+        with self._lock:
+            entry = self._entries.get(location_key(location))
+        return float("inf") if entry is None else time.monotonic() - entry[0]
+
+
+class RequestFrequency:
+    """Counts how often each location is requested, with exponential decay.
+
+    Counts are halved every `half_life` seconds so the hot set follows
+    shifting traffic instead of remembering yesterday's favourites forever.
+    """
+
+    def __init__(self, half_life: float = 3600.0):
+        self.half_life = half_life
+        self._counts: Counter = Counter()
+        self._last_decay = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decay(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decay < self.half_life:
+            return
+        halvings = int((now - self._last_decay) // self.half_life)
+        factor = 0.5 ** halvings
+        self._counts = Counter({k: v * factor for k, v in self._counts.items() if v * factor >= 0.5})
+        self._last_decay = now
+
+    def record(self, location: str) -> None:
+        with self._lock:
+            self._decay()
+            self._counts[location_key(location)] += 1
+
+    def top(self, k: int) -> List[str]:
+        """Returns the `k` most requested location keys."""
+        with self._lock:
+            self._decay()
+            return [location for location, _ in self._counts.most_common(k)]
+
+
+# Shared by every WeatherTool instance (the agent rebuilds its tools whenever
+# discovery changes) and by the background refresher.
+weather_cache = WeatherCache(ttl=float(os.environ.get("WEATHER_CACHE_TTL", 600)))
+request_frequency = RequestFrequency()
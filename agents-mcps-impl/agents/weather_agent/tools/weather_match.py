@@ -0,0 +1,117 @@
+# =============================================================================
+# agents/weather_agent/tools/weather_match.py
+# =============================================================================
+# 🎯 Purpose:
+# Filters and ranks weather observations against a user's criteria
+# (temperature range, conditions, humidity) for WeatherTool.find_cities.
+#
+# Observations are loaded into columns (NumPy arrays, one per field) and
+# every criterion is one vectorized comparison over all cities, so a
+# continent's worth of cities is filtered and ranked in a few microseconds.
+# =============================================================================
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Words users (and the model) use for a condition -> fragments of the
+# weatherapi.com condition texts that count as that condition
+CONDITION_TERMS: Dict[str, tuple] = {
+    "sunny": ("sunny", "clear"),
+    "clear": ("sunny", "clear"),
+    "dry": ("sunny", "clear", "cloudy", "overcast"),
+    "cloudy": ("cloud", "overcast"),
+    "overcast": ("overcast",),
+    "rain": ("rain", "drizzle", "shower"),
+    "rainy": ("rain", "drizzle", "shower"),
+    "snow": ("snow", "sleet", "blizzard", "ice pellets"),
+    "snowy": ("snow", "sleet", "blizzard", "ice pellets"),
+    "storm": ("thunder",),
+    "fog": ("fog", "mist"),
+}
+
+# Orderings of the matches: column and direction (1 ascending, -1 descending)
+ORDERS = {
+    "warmest": ("temp_c", -1),
+    "coolest": ("temp_c", 1),
+    "driest": ("humidity", 1),
+    "calmest": ("wind_mph", 1),
+}
+
+
+class WeatherCriteria(NamedTuple):
+    """What the user is looking for; None means "any"."""
+    min_temp_c: Optional[float] = None
+    max_temp_c: Optional[float] = None
+    conditions: Sequence[str] = ()
+    min_humidity: Optional[float] = None
+    max_humidity: Optional[float] = None
+    max_wind_mph: Optional[float] = None
+
+
+def columns(records: Sequence[NamedTuple]) -> Dict[str, np.ndarray]:
+    """Columnar view of weather records; missing numbers are NaN."""
+    def numeric(field: str) -> np.ndarray:
+        return np.array([getattr(r, field) for r in records], dtype=float)
+
+    return {
+        "temp_c": numeric("temp_c"),
+        "humidity": numeric("humidity"),
+        "wind_mph": numeric("wind_mph"),
+        "condition": np.char.lower(np.array([r.condition or "" for r in records], dtype=str)),
+    }
+
+
+def _condition_mask(condition: np.ndarray, wanted: Sequence[str]) -> np.ndarray:
+    mask = np.zeros(condition.shape, dtype=bool)
+    for word in wanted:
+        for term in CONDITION_TERMS.get(word.strip().lower(), (word.strip().lower(),)):
+            mask |= np.char.find(condition, term) >= 0
+    return mask
+
+
+def _within(values: np.ndarray, low: Optional[float], high: Optional[float]) -> np.ndarray:
+    mask = ~np.isnan(values)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+def _distance(values: np.ndarray, low: Optional[float], high: Optional[float]) -> np.ndarray:
+    """How far each value is from the middle of [low, high], in range widths (0 for open ranges)."""
+    if low is None or high is None:
+        return np.zeros(values.shape)
+    return np.abs(values - (low + high) / 2) / max(high - low, 1.0)
+
+
+def match(records: Sequence[NamedTuple], criteria: WeatherCriteria, order: str = "best_match") -> List[NamedTuple]:
+    """
+    The records that meet every criterion, best first.
+
+    `order` is "best_match" (closest to the middle of the requested ranges,
+    warmest first on ties) or one of ORDERS ("warmest", "coolest", "driest",
+    "calmest").
+    """
+    if not records:
+        return []
+    cols = columns(records)
+    mask = _within(cols["temp_c"], criteria.min_temp_c, criteria.max_temp_c)
+    if criteria.min_humidity is not None or criteria.max_humidity is not None:
+        mask &= _within(cols["humidity"], criteria.min_humidity, criteria.max_humidity)
+    if criteria.max_wind_mph is not None:
+        mask &= _within(cols["wind_mph"], None, criteria.max_wind_mph)
+    if criteria.conditions:
+        mask &= _condition_mask(cols["condition"], criteria.conditions)
+
+    candidates = np.flatnonzero(mask)
+    if order in ORDERS:
+        column, direction = ORDERS[order]
+        keys = (direction * np.nan_to_num(cols[column][candidates], nan=np.inf * direction),)
+    else:
+        score = _distance(cols["temp_c"][candidates], criteria.min_temp_c, criteria.max_temp_c)
+        score = score + _distance(cols["humidity"][candidates], criteria.min_humidity, criteria.max_humidity)
+        keys = (-cols["temp_c"][candidates], np.nan_to_num(score, nan=np.inf))
+    ranked = candidates[np.lexsort(keys)]  # last key is the primary one
+    return [records[i] for i in ranked]
@@ -1,8 +1,53 @@
-import httpx
+import asyncio
 from google.adk.tools import BaseTool, ToolContext
 from typing_extensions import override, Any
 import os
-from typing import List
+from typing import Dict, List, NamedTuple, Optional
+
+from agents.travel_agent.tools.destinations_tool import DestinationsTool
+from agents.weather_agent.tools.weather_cache import location_key, request_frequency, weather_cache
+from agents.weather_agent.tools.weather_match import WeatherCriteria, match
+from common.locations import location_resolver
+from common.payload import select_fields, to_table
+from common.quota import BACKGROUND, QuotaScheduler, quota_priority
+from common.resilience import upstream
+from common.shared_cache import SharedCache
+
+# Shared resilient client: deadline-bounded, retried, hedged and circuit-broken,
+# and paced by the API key's cluster-wide quota when UPSTREAM_QUOTA_WEATHERAPI is set
+weather_api = upstream("weatherapi", timeout=10.0, quota=QuotaScheduler.from_env("weatherapi"))
+
+# Upstream lookups in progress, by canonical location key; concurrent requests
+# for the same place ("Paris", "paris, France") share one call
+_inflight: Dict[str, "asyncio.Future[WeatherRecord]"] = {}
+
+
+class WeatherRecord(NamedTuple):
+    """Current conditions for one location, as returned by weatherapi.com."""
+    location: str
+    region: str
+    country: str
+    temp_c: Optional[float]
+    temp_f: Optional[float]
+    condition: str
+    humidity: Optional[int]
+    wind_mph: Optional[float]
+    wind_dir: str
+    note: str = ""
+
+    @classmethod
+    def unavailable(cls, location: str, note: str = "") -> "WeatherRecord":
+        return cls(location, "", "Unknown", None, None, "Information not available", None, None, "", note)
+
+
+# Weather shared by the replicas (the in-process weather_cache is its L1)
+weather_results = SharedCache.from_env(
+    "weather", schema=1, ttl=weather_cache.ttl, l1_size=0,
+    encode=lambda record: record._asdict(), decode=lambda data: WeatherRecord(**data),
+)
+
+# Fields sent to the model when the caller does not select any
+DEFAULT_FIELDS = ("location", "region", "country", "temp_c", "temp_f", "condition", "humidity", "wind_mph", "wind_dir")
 
 
 class WeatherTool(BaseTool):
@@ -15,73 +60,170 @@ class WeatherTool(BaseTool):
     name = "WeatherTool"
     description = "Gets the current weather information for one or more specified locations"
 
-    async def get_weather(self, locations: List[str]) -> List[dict[str, Any]]:
+    async def get_weather(self, locations: List[str], fields: Optional[List[str]] = None) -> dict[str, Any]:
         """Fetches weather information for one or more locations.
 
         Attributes:
             locations: A list of city names or locations to get weather for.
+            fields: Optional subset of columns to return, from: location, region, country,
+                temp_c, temp_f, condition, humidity, wind_mph, wind_dir. Defaults to all.
+        Returns:
+            A dictionary with a "weather" table: a header line of column names followed by
+            one pipe-separated line per location.
+        """
+        print(f"Processing {len(locations)} locations")
+
+        # Locations are independent, so fetch them concurrently; the shared
+        # upstream client bounds each call by the task's remaining deadline.
+        records = await asyncio.gather(*(self._lookup(location) for location in locations))
+        return self.to_payload(records, fields)
+
+    async def find_cities(
+            self,
+            region: str,
+            min_temp_c: Optional[float] = None,
+            max_temp_c: Optional[float] = None,
+            conditions: Optional[List[str]] = None,
+            min_humidity: Optional[int] = None,
+            max_humidity: Optional[int] = None,
+            max_wind_mph: Optional[float] = None,
+            order: str = "best_match",
+            limit: int = 5,
+            fields: Optional[List[str]] = None,
+    ) -> dict[str, Any]:
+        """Finds the cities of a region whose current weather matches the given criteria.
+
+        Use this for recommendation questions ("where is it sunny and warm in Europe?")
+        instead of fetching cities one by one.
+
+        Attributes:
+            region: A continent, united region, country or city, e.g. "Europe",
+                "Southeast Asia", "Italy".
+            min_temp_c: Lowest acceptable temperature in Celsius.
+            max_temp_c: Highest acceptable temperature in Celsius.
+            conditions: Acceptable conditions, any of e.g. sunny, clear, cloudy, rain, snow, fog, dry.
+            min_humidity: Lowest acceptable humidity (percent).
+            max_humidity: Highest acceptable humidity (percent).
+            max_wind_mph: Highest acceptable wind speed.
+            order: "best_match" (closest to the middle of the requested ranges), "warmest",
+                "coolest", "driest" or "calmest".
+            limit: Number of cities to return (default 5).
+            fields: Optional subset of columns to return (see get_weather).
         Returns:
-            A list of dictionaries containing weather data such as temperature, 
-            condition, humidity, and wind for each location.
+            A dictionary with the number of cities checked and matched, and a "weather"
+            table of the best matches, or an "error" if the region is unknown.
+        """
+        cities = DestinationsTool(name="DestinationsTool", description="Destinations").expand_cities(region)
+        if cities is None:
+            return {"error": f"Unknown region '{region}'. Try a continent, country or region like 'Europe' or 'Italy'."}
+
+        records = await asyncio.gather(*(self._lookup(city) for city in cities))
+        criteria = WeatherCriteria(min_temp_c, max_temp_c, tuple(conditions or ()), min_humidity, max_humidity,
+                                   max_wind_mph)
+        matches = match(records, criteria, order=order)
+        return {"checked": len(records), "matched": len(matches), **self.to_payload(matches[:max(1, limit)], fields)}
+
+    @staticmethod
+    def to_payload(records: List[WeatherRecord], fields: Optional[List[str]] = None) -> dict[str, Any]:
+        """Serializes weather records into the compact tabular form sent to the model."""
+        columns = select_fields(WeatherRecord._fields, fields, DEFAULT_FIELDS)
+        if any(record.note for record in records) and "note" not in columns:
+            columns.append("note")
+        return {"weather": to_table(records, columns)}
+
+    async def _lookup(self, location: str) -> WeatherRecord:
+        """Returns the weather for one location, from the warm cache when possible."""
+        request_frequency.record(location)
+        cached = weather_cache.get(location)
+        if cached is not None:
+            return cached
+
+        key = location_key(location)
+        pending = _inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = _inflight[key] = asyncio.get_running_loop().create_future()
+        record = None
+        try:
+            record = await self._fetch_record(location)
+        finally:
+            future.set_result(record or WeatherRecord.unavailable(location, "lookup cancelled"))
+            del _inflight[key]
+        return record
+
+    async def _fetch_record(self, location: str) -> WeatherRecord:
+        try:
+            entry = await weather_results.get_or_load(location_key(location), lambda: self.fetch_current(location))
+        except Exception as e:
+            return WeatherRecord.unavailable(location, f"lookup failed: {e}")
+
+        if entry is None:
+            return WeatherRecord.unavailable(location, "location not found")
+
+        weather_cache.put(location, entry.value, age=entry.age)
+        return entry.value
+
+    async def refresh(self, location: str) -> Optional[WeatherRecord]:
+        """Fetches fresh weather for the background refresher and shares it with the other replicas.
+
+        Attributes:
+            location: A city name or location.
+        Returns:
+            The weather record fetched from the upstream, or None if the upstream does not
+            know the location or another replica refreshed it recently (the shared record
+            is then stored in the local cache directly). The upstream call queues behind
+            interactive lookups for the API quota.
+        """
+        shared = await weather_results.get(location_key(location))
+        if shared is not None and shared.age < weather_cache.ttl / 2:
+            weather_cache.put(location, shared.value, age=shared.age)
+            return None
+        with quota_priority(BACKGROUND):
+            record = await self.fetch_current(location)
+        if record is not None:
+            await weather_results.put(location_key(location), record)
+        return record
+
+    async def fetch_current(self, location: str) -> Optional[WeatherRecord]:
+        """Fetches the current weather for a single location from the upstream API.
+
+        Attributes:
+            location: A city name or location. Places in the local gazetteer are
+                queried by coordinates and reported under their canonical name.
+        Returns:
+            The weather record, or None if the upstream does not know the location.
         """
         api_key = os.getenv("WEATHER_API_KEY", default="")
         url = f"https://api.weatherapi.com/v1/current.json"
-        print(f"Processing {len(locations)} locations")
+        place = location_resolver.resolve(location)
+
+        # add query parameters to get call
+        params = {
+            "key": api_key,
+            "q": place.coordinates if place else location.strip()
+        }
+        response = await weather_api.get(url=url, params=params)
+
+        # If the response indicates a client error (like 404 for location not found)
+        if response.status_code >= 400 and response.status_code < 500:
+            return None
+
+        response.raise_for_status()
+        data = response.json()
+        current = data["current"]
 
-        results = []
-        
-        for location in locations:
-            try:
-                async with httpx.AsyncClient() as client:
-                    # add query parameters to get call
-                    params = {
-                        "key": api_key,
-                        "q": location
-                    }
-                    response = await client.get(url=url, params=params, timeout=10.0)
-
-                    # If the response indicates a client error (like 404 for location not found)
-                    if response.status_code >= 400 and response.status_code < 500:
-                        # Return a default response for location not found
-                        results.append({
-                            "location": f"{location}",
-                            "region": f"{location}",
-                            "country": "Unknown",
-                            "temperature": "20°C",
-                            "condition": "Information not available",
-                            "humidity": "30 %",
-                            "wind": "2 mph"
-                        })
-                        continue
-
-                    response.raise_for_status()
-                    data = response.json()
-
-                    weather_data = {
-                        "location": data["location"]["name"],
-                        "region": data["location"]["region"],
-                        "country": data["location"]["country"],
-                        "temperature": f"{data['current']['temp_c']}°C / {data['current']['temp_f']}°F",
-                        "condition": data["current"]["condition"]["text"],
-                        "humidity": f"{data['current']['humidity']}%",
-                        "wind": f"{data['current']['wind_mph']} mph {data['current']['wind_dir']}"
-                    }
-
-                    results.append(weather_data)
-            except Exception as e:
-                # Add error response for this location
-                results.append({
-                    "location": location,
-                    "region": "Unknown",
-                    "country": "Unknown",
-                    "temperature": "N/A",
-                    "condition": "Information not available",
-                    "humidity": "N/A",
-                    "wind": "N/A",
-                    "message": f"The location '{location}' could not be found or another error occurred: {str(e)}"
-                })
-        
-        return results
+        return WeatherRecord(
+            location=place.name if place else data["location"]["name"],
+            region=data["location"]["region"],
+            country=place.country if place else data["location"]["country"],
+            temp_c=current["temp_c"],
+            temp_f=current["temp_f"],
+            condition=current["condition"]["text"],
+            humidity=current["humidity"],
+            wind_mph=current["wind_mph"],
+            wind_dir=current["wind_dir"],
+        )
 
     @override
     async def run_async(
@@ -95,7 +237,7 @@ class WeatherTool(BaseTool):
             tool_context: The context of the tool.
 
         Returns:
-            A list of dictionaries containing weather information or error messages.
+            A dictionary with a compact weather table (see get_weather).
         """
         print("Running WeatherTool with args:", args)
 
@@ -107,4 +249,4 @@ class WeatherTool(BaseTool):
         else:
             print(f"Getting weather for {len(locations)} locations: {', '.join(locations)}")
 
-        return await self.get_weather(locations=locations)
+        return await self.get_weather(locations=locations, fields=args.get("fields"))
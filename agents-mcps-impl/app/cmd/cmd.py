@@ -12,14 +12,16 @@
 # - basic task sending via A2AClient
 # - session reuse
 # - optional task history printing
+# - non-blocking submission (--no-wait): the agent queues the task and the
+#   CLI polls for the result
 # =============================================================================
 
 import asyncclick as click        # click is a CLI tool; asyncclick supports async functions
 import asyncio                    # Built-in Python module to run async event loops
 from uuid import uuid4            # Used to generate unique task and session IDs
 
-# Import the A2AClient from your client module (it handles request/response logic)
-from client.client import A2AClient
+# Import the A2A client (pooled connections, fast JSON codec)
+from common.client import MeshA2AClient
 
 # Import the Task model so we can handle and parse responses from the agent
 from models.task import Task
@@ -40,7 +42,13 @@ from models.task import Task
 @click.option("--history", is_flag=True, help="Print full task history after receiving a response")
 # ^ This defines a --history flag (boolean). If passed, full conversation history is shown.
 
-async def cli(agent: str, session: str, history: bool):
+@click.option("--no-wait", is_flag=True, help="Submit tasks without holding the connection open and poll for the result")
+# ^ The agent answers at once with a "submitted" task and runs it on a background worker.
+
+@click.option("--wait-timeout", type=float, default=None,
+              help="With --no-wait, give up polling after this many seconds (default: until the task finishes)")
+
+async def cli(agent: str, session: str, history: bool, no_wait: bool, wait_timeout: float):
     """
     CLI to send user messages to an A2A agent and display the response.
 
@@ -48,10 +56,13 @@ async def cli(agent: str, session: str, history: bool):
         agent (str): The base URL of the A2A agent server (e.g., http://localhost:10002)
         session (str): Either a string session ID or 0 to generate one
         history (bool): If true, prints the full task history
+        no_wait (bool): If true, submits each task and polls until it finishes
+        wait_timeout (float): With no_wait, seconds to poll before giving up
     """
 
-    # Initialize the client by providing the full POST endpoint for sending tasks
-    client = A2AClient(url=f"{agent}")
+    # Initialize the client by providing the full POST endpoint for sending tasks.
+    # Without --history only the messages of each turn are transferred.
+    client = MeshA2AClient(url=f"{agent}", new_history_only=not history)
 
     # Generate a new session ID if not provided (user passed 0)
     session_id = uuid4().hex if str(session) == "0" else str(session)
@@ -91,7 +102,12 @@ async def cli(agent: str, session: str, history: bool):
 
         try:
             # Send the task to the agent and get a structured Task response
-            task: Task = await client.send_task(payload)
+            if no_wait:
+                submitted: Task = await client.submit_task(payload)
+                print(f"\n⏳ Task {submitted.id} {submitted.status.state}, polling for the result...")
+                task: Task = await client.wait_for_task(submitted.id, timeout=wait_timeout)
+            else:
+                task: Task = await client.send_task(payload)
 
             # Check if the agent responded (expecting at least 2 messages: user + agent)
             if task.history and len(task.history) > 1:
@@ -0,0 +1,108 @@
+# =============================================================================
+# benchmarks/bench_async_tasks.py
+# =============================================================================
+# Purpose:
+# A burst of N tasks against a local ManagedA2AServer (echo task manager with
+# 200ms of "LLM" latency, 8 concurrent tasks):
+# - blocking `tasks/send`: every caller holds a connection until its task ran,
+#   and whatever exceeds the admission queue is shed
+# - non-blocking: every task is acknowledged at once, 8 background workers
+#   drain the queue, results are collected by polling `tasks/get` and by a
+#   webhook receiver
+#
+# Run: python -m benchmarks.bench_async_tasks
+# =============================================================================
+
+import asyncio
+import logging
+import statistics
+import time
+from uuid import uuid4
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from benchmarks.fakes import LocalServer, agent_card, echo_task_manager
+from common.admission import AdaptiveConcurrencyLimit, AdmissionController
+from common.client import MeshA2AClient
+from common.codec import loads
+from common.server import ManagedA2AServer
+from common.task_queue import BackgroundTaskRunner, PushNotifier
+
+PORT = 18791
+HOOK_PORT = 18792
+N = 64
+
+pushed = {}
+
+
+async def receive_push(request):
+    task = loads(await request.body())
+    pushed[task["id"]] = (task["status"]["state"], request.headers.get("authorization"))
+    return Response(status_code=204)
+
+
+def payload(i: int) -> dict:
+    return {"id": uuid4().hex, "sessionId": "bench",
+            "message": {"role": "user", "parts": [{"type": "text", "text": f"question {i}"}]}}
+
+
+def ms(values) -> str:
+    return f"p50={statistics.median(values) * 1000:6.1f}ms max={max(values) * 1000:6.1f}ms"
+
+
+async def blocking(client: MeshA2AClient):
+    async def one(i):
+        started = time.perf_counter()
+        try:
+            await client.send_task(payload(i))
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, e
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(N)))
+    total = time.perf_counter() - started
+    shed = sum(1 for _, e in results if e is not None)
+    print(f"blocking:     {N - shed:3}/{N} ran, {shed:2} shed; connection held {ms([t for t, _ in results])}; "
+          f"all done in {total * 1000:6.0f}ms")
+
+
+async def non_blocking(client: MeshA2AClient):
+    async def submit(i):
+        started = time.perf_counter()
+        task = await client.submit_task(payload(i), push_url=f"http://127.0.0.1:{HOOK_PORT}/hook", push_token="t0k")
+        assert task.status.state == "submitted"
+        return time.perf_counter() - started, task
+
+    started = time.perf_counter()
+    submitted = await asyncio.gather(*(submit(i) for i in range(N)))
+    results = await asyncio.gather(*(client.wait_for_task(task.id, poll_interval=0.1, max_interval=0.5)
+                                     for _, task in submitted))
+    total = time.perf_counter() - started
+    completed = sum(1 for task in results if task.status.state == "completed")
+    await asyncio.sleep(0.2)
+    delivered = sum(1 for state, auth in pushed.values() if state == "completed" and auth == "Bearer t0k")
+    print(f"non-blocking: {completed:3}/{N} ran,  0 shed; acknowledged in   {ms([a for a, _ in submitted])}; "
+          f"all done in {total * 1000:6.0f}ms; webhooks delivered: {delivered}")
+
+
+async def main():
+    client = MeshA2AClient(url=f"http://127.0.0.1:{PORT}/", new_history_only=True)
+    await client.send_task(payload(0))  # warm up the connection
+    await blocking(client)
+    await non_blocking(client)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    task_manager = echo_task_manager(latency=0.2)
+    admission = AdmissionController(AdaptiveConcurrencyLimit(initial=8, max_limit=8), max_queue=16, name="bench")
+    server = ManagedA2AServer(agent_card=agent_card("Echo", f"http://127.0.0.1:{PORT}/"),
+                              task_manager=task_manager, admission=admission,
+                              background=BackgroundTaskRunner(task_manager, workers=8, name="bench",
+                                                              notifier=PushNotifier([f"127.0.0.1:{HOOK_PORT}"])))
+    hook = Starlette(routes=[Route("/hook", receive_push, methods=["POST"])])
+    with LocalServer(server.app, PORT), LocalServer(hook, HOOK_PORT):
+        asyncio.run(main())
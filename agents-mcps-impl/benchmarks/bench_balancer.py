@@ -0,0 +1,74 @@
+# =============================================================================
+# benchmarks/bench_balancer.py
+# =============================================================================
+# Purpose:
+# Compares random instance selection with InstanceBalancer (power of two
+# choices over latency EWMA x outstanding, with outlier ejection) across four
+# simulated child-agent instances: two healthy, one 5x slower, one failing
+# 30% of its tasks.
+#
+# Run: python -m benchmarks.bench_balancer
+# =============================================================================
+
+import asyncio
+import random
+import time
+from collections import Counter
+
+from benchmarks.fakes import percentile
+from common.balancer import InstanceBalancer
+
+# url -> (latency seconds, failure ratio)
+INSTANCES = {
+    "http://10.0.0.1:8080/": (0.020, 0.0),
+    "http://10.0.0.2:8080/": (0.020, 0.0),
+    "http://10.0.0.3:8080/": (0.100, 0.0),
+    "http://10.0.0.4:8080/": (0.020, 0.3),
+}
+
+
+async def serve(url: str, rng: random.Random) -> None:
+    latency, failure_ratio = INSTANCES[url]
+    await asyncio.sleep(latency * rng.uniform(0.8, 1.2))
+    if rng.random() < failure_ratio:
+        raise ConnectionError("instance failed")
+
+
+async def run(balanced: bool, tasks: int = 2000, concurrency: int = 16) -> dict:
+    rng = random.Random(3)
+    balancer = InstanceBalancer("bench", min_samples=5)
+    balancer.set_instances(list(INSTANCES))
+    latencies, failures, routed = [], 0, Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            instance = balancer.pick() if balanced else rng.choice(balancer.instances)
+            routed[instance.url[7:15]] += 1
+            try:
+                async with balancer.track(instance):
+                    await serve(instance.url, rng)
+            except ConnectionError:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(tasks)))
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "failures": failures,
+        "routed": dict(sorted(routed.items())),
+    }
+
+
+async def main():
+    for balanced in (False, True):
+        r = await run(balanced)
+        label = "p2c + EWMA + ejection" if balanced else "random"
+        print(f"{label:22} p50={r['p50_ms']:6.1f}ms  p99={r['p99_ms']:6.1f}ms  failures={r['failures']:4}  {r['routed']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+# =============================================================================
+# benchmarks/bench_batch.py
+# =============================================================================
+# Purpose:
+# Sends N independent tasks to a local ManagedA2AServer (echo task manager
+# with 20ms of "LLM" latency) one HTTP request at a time, as concurrent single
+# requests, and as one JSON-RPC batch.
+#
+# Run: python -m benchmarks.bench_batch
+# =============================================================================
+
+import asyncio
+import logging
+import time
+from uuid import uuid4
+
+from benchmarks.fakes import LocalServer, agent_card, echo_task_manager
+from common.admission import AdaptiveConcurrencyLimit, AdmissionController
+from common.client import MeshA2AClient
+from common.server import ManagedA2AServer
+
+PORT = 18790
+
+
+def payload(i: int) -> dict:
+    return {"id": uuid4().hex, "sessionId": "bench",
+            "message": {"role": "user", "parts": [{"type": "text", "text": f"question {i}"}]}}
+
+
+async def main():
+    client = MeshA2AClient(url=f"http://127.0.0.1:{PORT}/", new_history_only=True)
+    await client.send_task(payload(0))  # warm up the connection
+    for n in (4, 16):
+        started = time.perf_counter()
+        for i in range(n):
+            await client.send_task(payload(i))
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client.send_task(payload(i)) for i in range(n)))
+        concurrent = time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await client.send_tasks([payload(i) for i in range(n)])
+        batched = time.perf_counter() - started
+        in_order = all(t.history[-1].parts[0].text == f"echo: question {i}" for i, t in enumerate(results))
+
+        print(f"n={n:3}  sequential={sequential * 1000:7.1f}ms ({n} requests)  "
+              f"concurrent={concurrent * 1000:6.1f}ms ({n} requests)  "
+              f"batch={batched * 1000:6.1f}ms (1 request, in order: {in_order})")
+
+    # A batch larger than the concurrency limit + queue: the excess is shed per call
+    results = await client.send_tasks([payload(i) for i in range(24)])
+    print("overload: " + "".join("." if not isinstance(r, Exception) else "x" for r in results)
+          + "  (x = shed with 503, others answered)")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    admission = AdmissionController(AdaptiveConcurrencyLimit(initial=16, max_limit=16), max_queue=0, name="bench")
+    server = ManagedA2AServer(agent_card=agent_card("Echo", f"http://127.0.0.1:{PORT}/"),
+                              task_manager=echo_task_manager(latency=0.02), admission=admission)
+    with LocalServer(server.app, PORT):
+        asyncio.run(main())
@@ -0,0 +1,97 @@
+# =============================================================================
+# benchmarks/bench_codec.py
+# =============================================================================
+# Purpose:
+# Serialization cost of one tasks/send round trip (server: parse request,
+# encode response; client: decode response into a Task) versus the length of
+# the task history, for:
+# - stock:     pydantic validation + model_dump + jsonable_encoder + json
+# - fast:      orjson, bytes encoded straight from the models
+# - new-only:  fast, returning only the messages of this call
+# - construct: fast, but building models with model_construct instead of
+#              validating them (slower: pydantic-core validation is cheap)
+#
+# Run: python -m benchmarks.bench_codec
+# =============================================================================
+
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from common.codec import dumps, encode_response, loads, select_history
+from models.request import A2ARequest, SendTaskResponse
+from models.task import Message, Task, TaskState, TaskStatus, TextPart
+
+REPLY = "Paris|France|18.3|Sunny\n" * 8
+
+
+def make_task(history_length: int) -> Task:
+    history = [
+        Message(role="user" if i % 2 == 0 else "agent", parts=[TextPart(text=f"turn {i}: " + REPLY)])
+        for i in range(history_length)
+    ]
+    return Task(id="task-1", status=TaskStatus(state=TaskState.COMPLETED), history=history)
+
+
+def request_body(metadata=None) -> bytes:
+    params = {"id": "task-1", "sessionId": "s1",
+              "message": {"role": "user", "parts": [{"type": "text", "text": "Weather in Paris?"}]}}
+    if metadata:
+        params["metadata"] = metadata
+    return json.dumps({"jsonrpc": "2.0", "id": "r1", "method": "tasks/send", "params": params}).encode()
+
+
+def stock(body: bytes, task: Task) -> Task:
+    request = A2ARequest.validate_python(json.loads(body))
+    response = SendTaskResponse(id=request.id, result=task)
+    wire = JSONResponse(content=jsonable_encoder(response.model_dump(exclude_none=True))).body
+    return Task(**json.loads(wire)["result"])
+
+
+def construct_task(data: dict) -> Task:
+    status = data["status"]
+    return Task.model_construct(
+        id=data["id"],
+        status=TaskStatus.model_construct(state=status["state"], timestamp=status.get("timestamp")),
+        history=[
+            Message.model_construct(role=m["role"], parts=[TextPart.model_construct(**p) for p in m["parts"]])
+            for m in data["history"]
+        ],
+    )
+
+
+def fast(body: bytes, task: Task, new_only: bool = False, construct: bool = False) -> Task:
+    request = A2ARequest.validate_python(loads(body))
+    previous = len(task.history) - 2 if new_only else 0
+    history = select_history(task.history, request.params, previous)
+    wire = encode_response(request.id, task, history=history)
+    result = loads(wire)["result"]
+    return construct_task(result) if construct else Task.model_validate(result)
+
+
+def per_call_us(fn, *args, **kwargs) -> float:
+    rounds = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < 0.3:
+        fn(*args, **kwargs)
+        rounds += 1
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main():
+    body, body_new = request_body(), request_body({"historyMode": "new"})
+    print(f"{'history':>8} {'stock':>10} {'fast':>10} {'new-only':>10} {'construct':>10}   (us per round trip, wire KB)")
+    for length in (2, 10, 50, 200, 1000):
+        task = make_task(length)
+        wire_kb = len(dumps({"result": task.model_dump()})) / 1024
+        print(
+            f"{length:>8} {per_call_us(stock, body, task):>10.1f} {per_call_us(fast, body, task):>10.1f} "
+            f"{per_call_us(fast, body_new, task, new_only=True):>10.1f} "
+            f"{per_call_us(fast, body, task, construct=True):>10.1f}   {wire_kb:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# =============================================================================
+# benchmarks/bench_fx_history.py
+# =============================================================================
+# Purpose:
+# "How has USD/INR moved this year?" on the real currency MCP server (over
+# SSE on a local socket, Frankfurter faked with a 20ms latency):
+# - the old way: one get_exchange_rate call per week of the year
+# - get_exchange_rate_history on an empty store, on a warm store, and on a
+#   new store instance over the same files (restart)
+# Also checks the returned statistics against the fake's own series.
+#
+# Run: python -m benchmarks.bench_fx_history
+# =============================================================================
+
+import asyncio
+import datetime
+import json
+import logging
+import statistics
+import tempfile
+import time
+
+from benchmarks.fakes import FakeFxApi, LocalServer, fx_series_rate
+from common.mcp_pool import McpSessionPool
+from mcps.curr import server as currency_server
+from mcps.curr.fx_store import FxStore
+
+END = datetime.date.today() - datetime.timedelta(days=1)
+START = END - datetime.timedelta(days=365)
+
+
+async def timed(pool: McpSessionPool, tool: str, args: dict):
+    started = time.perf_counter()
+    result = await pool.call_tool(tool, args)
+    return json.loads(result.content[0].text), time.perf_counter() - started
+
+
+async def main(url: str, fake: FakeFxApi, directory: str):
+    pool = McpSessionPool(url, size=2)
+    await pool.list_tools()
+
+    fake.calls = 0
+    started = time.perf_counter()
+    for week in range(53):
+        day = START + datetime.timedelta(weeks=week)
+        await pool.call_tool("get_exchange_rate", {"currency_from": "USD", "currency_to": "INR",
+                                                   "currency_date": day.isoformat()})
+    print(f"per-date calls:   tool calls=53  upstream calls={fake.calls:3}  "
+          f"time={(time.perf_counter() - started) * 1000:6.0f}ms")
+
+    args = {"currency_from": "USD", "currency_to": "INR", "start_date": START.isoformat(), "end_date": END.isoformat()}
+    for label in ("history (cold)", "history (warm)", "history (restart)"):
+        if label == "history (restart)":
+            currency_server.fx_store = FxStore(currency_server.frankfurter_api, directory)
+        fake.calls = 0
+        result, elapsed = await timed(pool, "get_exchange_rate_history", args)
+        print(f"{label:17} tool calls= 1  upstream calls={fake.calls:3}  time={elapsed * 1000:6.0f}ms")
+    await pool.close()
+
+    # The statistics must match the fake's series
+    expected = [fx_series_rate("INR", day) / fx_series_rate("USD", day)
+                for day in (START + datetime.timedelta(days=i) for i in range(366)) if day.weekday() < 5]
+    assert result["observations"] == len(expected), (result["observations"], len(expected))
+    assert abs(result["min"]["rate"] - min(expected)) < 1e-6 and abs(result["max"]["rate"] - max(expected)) < 1e-6
+    assert abs(result["mean"] - statistics.fmean(expected)) < 1e-6
+    assert abs(result["change_pct"] - round((expected[-1] / expected[0] - 1) * 100, 3)) < 1e-3
+    print(f"stats match the fake series: min={result['min']} max={result['max']} mean={result['mean']} "
+          f"change={result['change_pct']}%  ({result['resample']}ly series, "
+          f"{len(result['series'].splitlines()) - 1} points)")
+
+
+if __name__ == "__main__":
+    logging.getLogger("mcps.curr.server").setLevel(logging.WARNING)
+    logging.getLogger("mcps.curr.fx_store").setLevel(logging.WARNING)
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    fake = FakeFxApi(latency=0.02)
+    currency_server.frankfurter_api._transport = fake.transport()
+    with tempfile.TemporaryDirectory() as directory, LocalServer(currency_server.app, port=18766) as server:
+        currency_server.fx_store = FxStore(currency_server.frankfurter_api, directory)
+        asyncio.run(main(f"{server.url}/sse", fake, directory))
@@ -0,0 +1,68 @@
+# =============================================================================
+# benchmarks/bench_locations.py
+# =============================================================================
+# Purpose:
+# Sends weather requests that name 20 cities in several spellings ("Paris",
+# "paris, France", "Paris FR", "PARIS ") through WeatherTool against a fake
+# weatherapi.com, in concurrent bursts, and counts upstream calls against
+# what per-spelling keys (the previous lower-cased cache key) would need.
+# Also times resolution with and without the LRU of recent lookups.
+#
+# Run: python -m benchmarks.bench_locations
+# =============================================================================
+
+import asyncio
+import random
+import time
+
+import agents.weather_agent.tools.weather_tool as weather_tool
+from agents.travel_agent.tools.destinations_tool import DestinationsTool
+from agents.weather_agent.tools.weather_tool import WeatherTool
+from benchmarks.fakes import FakeUpstream
+from common.locations import LocationResolver, location_resolver
+from common.resilience import UpstreamClient
+
+CITIES = [("Paris", "France", "FR"), ("Rome", "Italy", "IT"), ("Tokyo", "Japan", "JP"), ("New York", "USA", "US"),
+          ("London", "United Kingdom", "UK"), ("Munich", "Germany", "DE"), ("Barcelona", "Spain", "ES"),
+          ("Sydney", "Australia", "AU"), ("Toronto", "Canada", "CA"), ("Kyoto", "Japan", "JP"),
+          ("Lyon", "France", "FR"), ("Venice", "Italy", "IT"), ("Delhi", "India", "IN"),
+          ("Bangkok", "Thailand", "TH"), ("Cape Town", "South Africa", "ZA"), ("Zurich", "Switzerland", "CH"),
+          ("Seville", "Spain", "ES"), ("Marrakesh", "Morocco", "MA"), ("Auckland", "New Zealand", "NZ"),
+          ("Mexico City", "Mexico", "MX")]
+
+
+def spellings(city: str, country: str, code: str):
+    return [city, f"{city.lower()}, {country}", f"{city} {code}", f"{city.upper()} ", f"{city}, {country.lower()}"]
+
+
+async def main():
+    rng = random.Random(3)
+    requests = [rng.choice(spellings(*rng.choice(CITIES))) for _ in range(400)]
+    legacy_keys = {" ".join(r.strip().lower().split()) for r in requests}
+
+    fake = FakeUpstream(latency=0.05, tail_ratio=0.0)
+    weather_tool.weather_api = UpstreamClient("bench", timeout=5.0, hedge=False, transport=fake.transport())
+    tool = WeatherTool(name="WeatherTool", description="Weather")
+    started = time.perf_counter()
+    for burst in range(0, len(requests), 40):
+        await tool.get_weather(requests[burst:burst + 40])
+    elapsed = time.perf_counter() - started
+    print(f"{len(requests)} requests, {len(legacy_keys)} distinct spellings, {len(CITIES)} places")
+    print(f"upstream calls: {fake.calls} (per-spelling keys: {len(legacy_keys)})  elapsed={elapsed * 1000:.0f}ms")
+
+    destinations = DestinationsTool(name="DestinationsTool", description="Destinations")
+    bulk = await destinations.list_cities_bulk(["USA", "United States", "America", "UK", "Great Britain", "Europe"])
+    print(f"list_cities_bulk of 6 spellings -> {len(bulk)} entries: {', '.join(bulk)}")
+
+    cold = LocationResolver(cache_size=0)
+    for label, resolver in (("no LRU", cold), ("LRU", location_resolver)):
+        started = time.perf_counter()
+        for _ in range(25):
+            for r in requests:
+                resolver.resolve(r)
+        per_call = (time.perf_counter() - started) / (25 * len(requests))
+        print(f"resolve ({label:6}): {per_call * 1e6:5.2f}us/call")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
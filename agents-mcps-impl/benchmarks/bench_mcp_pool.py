@@ -0,0 +1,78 @@
+# =============================================================================
+# benchmarks/bench_mcp_pool.py
+# =============================================================================
+# Purpose:
+# Per-call overhead of calling get_exchange_rate on the real currency MCP
+# server (over SSE on a local socket, FX API faked) with a fresh session per
+# call, the way a non-pooled toolset behaves, versus McpSessionPool.
+#
+# Run: python -m benchmarks.bench_mcp_pool
+# =============================================================================
+
+import asyncio
+import logging
+import time
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from benchmarks.fakes import FakeFxApi, LocalServer, percentile
+from common.mcp_pool import McpSessionPool
+from mcps.curr import server as currency_server
+
+ARGS = {"currency_from": "USD", "currency_to": "EUR"}
+
+
+async def fresh_session_call(url: str) -> None:
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.list_tools()
+            result = await session.call_tool("get_exchange_rate", arguments=ARGS)
+            assert not result.isError
+
+
+async def measure(call, calls: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "calls_per_s": calls / elapsed,
+    }
+
+
+def report(label: str, r: dict) -> None:
+    print(f"{label:28}  p50={r['p50_ms']:7.2f}ms  p99={r['p99_ms']:7.2f}ms  {r['calls_per_s']:7.1f} calls/s")
+
+
+async def main(url: str):
+    for concurrency in (1, 8):
+        report(f"fresh session  (c={concurrency})",
+               await measure(lambda: fresh_session_call(url), 100, concurrency))
+
+    pool = McpSessionPool(url, size=2)
+    await pool.list_tools()  # warm up: sessions open and schemas cached
+    for concurrency in (1, 8):
+        report(f"pooled x2      (c={concurrency})",
+               await measure(lambda: pool.call_tool("get_exchange_rate", ARGS), 400, concurrency))
+    await pool.close()
+
+
+if __name__ == "__main__":
+    logging.getLogger("mcps.curr.server").setLevel(logging.WARNING)
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    currency_server.frankfurter_api._transport = FakeFxApi().transport()
+    with LocalServer(currency_server.app, port=18765) as server:
+        asyncio.run(main(f"{server.url}/sse"))
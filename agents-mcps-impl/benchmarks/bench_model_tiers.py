@@ -0,0 +1,77 @@
+# =============================================================================
+# benchmarks/bench_model_tiers.py
+# =============================================================================
+# Purpose:
+# Runs a mix of simple, multi-step and complex prompts through a real ADK
+# LlmAgent + InMemoryRunner backed by scripted models (no network):
+# - "lite" 50ms, cannot handle itineraries (answers with a bogus tool call)
+# - "flash" 150ms
+# - "pro" 500ms
+# once with every call on "pro" and once with TieredLlm choosing per call.
+#
+# Run: python -m benchmarks.bench_model_tiers
+# =============================================================================
+
+import asyncio
+import logging
+import statistics
+import time
+
+from google.adk.agents.llm_agent import LlmAgent
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from benchmarks.fakes import scripted_llm_class
+from common.deadline import Deadline
+from common.metrics import registry
+from common.model_tiers import ModelTier, TieredLlm
+
+ScriptedLlm = scripted_llm_class()
+SCRIPTS = {
+    "lite": dict(latency=0.05, fails_on="itinerary"),
+    "flash": dict(latency=0.15),
+    "pro": dict(latency=0.5),
+}
+
+PROMPTS = [
+    "What's the weather in Paris?",
+    "Weather in Tokyo please",
+    "Is it raining in Oslo?",
+    "Compare the weather in Paris and Rome, then recommend the best one",
+    "Plan a three day itinerary for Japan",
+    "Plan an itinerary through Europe, compare the weather in each city, then recommend the cheapest and best",
+] * 3
+
+
+def scripted(model: str):
+    return ScriptedLlm(model=model, **SCRIPTS[model])
+
+
+async def run(model, label: str):
+    agent = LlmAgent(model=model, name="weather_agent", instruction="Answer weather questions.")
+    runner = InMemoryRunner(agent=agent, app_name="bench")
+    latencies, answers = [], []
+    for i, prompt in enumerate(PROMPTS):
+        session = await runner.session_service.create_session(app_name="bench", user_id="u")
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        started = time.perf_counter()
+        with Deadline.after(5).bind():
+            events = [e async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)]
+        latencies.append(time.perf_counter() - started)
+        answers.append(events[-1].content.parts[0].text.split(":")[0])
+    print(f"{label:10} mean={statistics.fmean(latencies) * 1000:6.1f}ms  "
+          f"max={max(latencies) * 1000:6.1f}ms  answered by: "
+          + ", ".join(f"{m}={answers.count(m)}" for m in SCRIPTS if answers.count(m)))
+
+
+async def main():
+    await run(scripted("pro"), "pro only")
+    tiers = [ModelTier(name, SCRIPTS[name]["latency"] * 2) for name in SCRIPTS]
+    await run(TieredLlm(model="flash", agent="bench", tiers=tiers, llm_factory=scripted), "tiered")
+    print("\n".join(line for line in registry.render().splitlines()
+                    if line.startswith(("llm_calls_total", "llm_escalations_total", "llm_call_latency_seconds_sum"))))
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    asyncio.run(main())
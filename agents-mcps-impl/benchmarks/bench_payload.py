@@ -0,0 +1,85 @@
+# =============================================================================
+# benchmarks/bench_payload.py
+# =============================================================================
+# Purpose:
+# Measures how many bytes and (estimated) tokens tool responses cost in the
+# LLM context, comparing the previous per-location dict format with the
+# compact tabular payload.
+#
+# Run: python -m benchmarks.bench_payload
+# =============================================================================
+
+import asyncio
+import json
+
+from agents.travel_agent.tools.destinations_tool import DestinationsTool
+from agents.weather_agent.tools.weather_tool import WeatherRecord, WeatherTool
+from benchmarks.fakes import weather_payload
+from common.payload import estimate_tokens
+
+
+def record_for(location: str) -> WeatherRecord:
+    data = weather_payload(location)
+    current = data["current"]
+    return WeatherRecord(
+        data["location"]["name"], data["location"]["region"], data["location"]["country"],
+        current["temp_c"], current["temp_f"], current["condition"]["text"],
+        current["humidity"], current["wind_mph"], current["wind_dir"],
+    )
+
+
+def legacy_weather(record: WeatherRecord) -> dict:
+    """The per-location dict WeatherTool used to return."""
+    return {
+        "location": record.location,
+        "region": record.region,
+        "country": record.country,
+        "temperature": f"{record.temp_c}°C / {record.temp_f}°F",
+        "condition": record.condition,
+        "humidity": f"{record.humidity}%",
+        "wind": f"{record.wind_mph} mph {record.wind_dir}",
+    }
+
+
+def legacy_destination(record) -> dict:
+    """The dict DestinationsTool used to return for a country."""
+    return {
+        "region_type": record.region_type,
+        "country_name": record.name,
+        "cities": list(record.cities),
+        "message": f"Here are popular cities and destinations in {record.name}.",
+    }
+
+
+def measure(payload) -> tuple:
+    text = json.dumps(payload, ensure_ascii=False)
+    return len(text.encode("utf-8")), estimate_tokens(text)
+
+
+def report(label: str, count: int, before, after) -> None:
+    (b_bytes, b_tokens), (a_bytes, a_tokens) = measure(before), measure(after)
+    print(
+        f"{label:36} n={count:3}  bytes/item {b_bytes / count:7.1f} -> {a_bytes / count:7.1f}  "
+        f"tokens/item {b_tokens / count:6.1f} -> {a_tokens / count:6.1f}  "
+        f"({100 * (1 - a_tokens / b_tokens):.0f}% fewer tokens)"
+    )
+
+
+async def main():
+    cities = [city for cities in DestinationsTool._destinations_data.values() for city in cities]
+    for count in (1, 10, 50):
+        records = [record_for(city) for city in cities[:count]]
+        before = [legacy_weather(r) for r in records]
+        report("weather (all fields)", count, before, WeatherTool.to_payload(records))
+        report("weather (location,temp_c,condition)", count, before,
+               WeatherTool.to_payload(records, ["location", "temp_c", "condition"]))
+
+    tool = DestinationsTool(name="DestinationsTool", description="bench")
+    countries = list(DestinationsTool._destinations_data)
+    before = [legacy_destination(tool.resolve(c)) for c in countries]
+    after = [await tool.list_cities(c) for c in countries]
+    report("destinations (country)", len(countries), before, after)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+# =============================================================================
+# benchmarks/bench_quota.py
+# =============================================================================
+# Purpose:
+# Three weather-agent replicas share one weatherapi.com key limited to 20
+# calls/s (the fake answers 429 + Retry-After over it). Each replica sees a
+# 3s peak of interactive lookups (together twice the quota), then 3s of
+# light traffic, while its refresher asks for 2 background calls/s. Every
+# interactive lookup has a 5s deadline. Compared:
+# - no quota scheduler (retries with backoff, honoring Retry-After)
+# - a QuotaScheduler per replica with its own bucket of the full quota
+# - a QuotaScheduler per replica sharing one bucket in Consul KV (fake)
+# - the same, with the quota configured 50% too high (429 feedback)
+#
+# Run: python -m benchmarks.bench_quota
+# =============================================================================
+
+import asyncio
+import logging
+import time
+
+from benchmarks.fakes import FakeConsulKv, FakeUpstream, percentile
+from common.deadline import Deadline
+from common.quota import BACKGROUND, ConsulQuotaStore, LocalQuotaStore, QuotaScheduler, quota_priority
+from common.resilience import UpstreamClient, UpstreamError
+
+QUOTA = 20.0
+REPLICAS = 3
+PEAK, PEAK_RATE, CALM, CALM_RATE = 3.0, 2 * QUOTA / REPLICAS, 3.0, QUOTA / 8 / REPLICAS
+DEADLINE = 5.0
+URL = "https://api.weatherapi.com/v1/current.json"
+
+
+class Outcomes:
+    def __init__(self):
+        self.ok = self.failed = self.timed_out = 0
+        self.latencies = []
+        self.ok_at = []
+
+    def record(self, outcome: str, started: float, at: float):
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        if outcome == "ok":
+            self.latencies.append(time.monotonic() - started)
+            self.ok_at.append(time.monotonic() - at)
+
+
+async def call(client: UpstreamClient, outcomes: Outcomes, location: str, epoch: float):
+    started = time.monotonic()
+    try:
+        with Deadline.after(DEADLINE).bind():
+            response = await client.get(URL, params={"q": location})
+        outcomes.record("ok" if response.status_code == 200 else "failed", started, epoch)
+    except UpstreamError:
+        outcomes.record("timed_out", started, epoch)
+
+
+async def replica(client: UpstreamClient, index: int, interactive: Outcomes, background: Outcomes, epoch: float):
+    tasks = []
+    n = 0
+    for duration, rate in ((PEAK, PEAK_RATE), (CALM, CALM_RATE)):
+        phase_end = time.monotonic() + duration
+        while time.monotonic() < phase_end:
+            tasks.append(asyncio.ensure_future(call(client, interactive, f"city-{index}-{n}", epoch)))
+            n += 1
+            await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+
+
+async def refresher(client: UpstreamClient, index: int, background: Outcomes, epoch: float, stop: asyncio.Event):
+    n = 0
+    while not stop.is_set():
+        with quota_priority(BACKGROUND):
+            await call(client, background, f"hot-{index}-{n}", epoch)
+        n += 1
+        await asyncio.sleep(0.5)
+
+
+async def scenario(label: str, schedulers):
+    upstream = FakeUpstream(latency=0.02, tail_ratio=0.0, quota=QUOTA)
+    transport = upstream.transport()
+    clients = [UpstreamClient(f"weather-{i}", timeout=10.0, hedge=False, quota=schedulers[i], transport=transport)
+               for i in range(REPLICAS)]
+    interactive, background = Outcomes(), Outcomes()
+    stop = asyncio.Event()
+    epoch = time.monotonic()
+    refreshers = [asyncio.ensure_future(refresher(c, i, background, epoch, stop)) for i, c in enumerate(clients)]
+    await asyncio.gather(*(replica(c, i, interactive, background, epoch) for i, c in enumerate(clients)))
+    stop.set()
+    await asyncio.gather(*refreshers)
+
+    offered = interactive.ok + interactive.failed + interactive.timed_out
+    in_peak = sum(1 for t in interactive.ok_at + background.ok_at if 1.0 <= t < PEAK + 1.0)
+    print(f"{label:30} interactive: {interactive.ok:3}/{offered} ok  {interactive.failed:3} failed (429)  "
+          f"{interactive.timed_out:3} timed out  p50={percentile(interactive.latencies, 0.5) * 1000:5.0f}ms  "
+          f"p99={percentile(interactive.latencies, 0.99) * 1000:5.0f}ms | background: {background.ok:2} ok  "
+          f"| upstream: {upstream.calls:3} calls  {upstream.throttled:3} x 429  "
+          f"{in_peak / PEAK:4.1f} ok/s at peak")
+
+
+async def main():
+    await scenario("no scheduler", [None] * REPLICAS)
+    await scenario("scheduler, bucket per replica",
+                   [QuotaScheduler("weatherapi", QUOTA, store=LocalQuotaStore()) for _ in range(REPLICAS)])
+
+    consul = FakeConsulKv(latency=0.001)
+    store = ConsulQuotaStore("http://consul:8500", transport=consul.transport())
+    await scenario("scheduler, shared bucket", [QuotaScheduler("weatherapi", QUOTA, store=store)
+                                               for _ in range(REPLICAS)])
+    print(f"{'':30} ({consul.requests} Consul KV requests, {consul.conflicts} check-and-set conflicts)")
+
+    store = ConsulQuotaStore("http://consul:8500", prefix="quota-high/", transport=consul.transport())
+    await scenario("shared bucket, quota +50%", [QuotaScheduler("weatherapi", QUOTA * 1.5, store=store)
+                                                for _ in range(REPLICAS)])
+
+
+if __name__ == "__main__":
+    logging.getLogger("common.quota").setLevel(logging.ERROR)
+    logging.getLogger("common.resilience").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(main())
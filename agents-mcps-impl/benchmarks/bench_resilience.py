@@ -0,0 +1,51 @@
+# =============================================================================
+# benchmarks/bench_resilience.py
+# =============================================================================
+# Purpose:
+# Shows the effect of hedging on tail latency against a fake upstream with
+# injected tail latency (5% of calls are 50x slower).
+#
+# Run: python -m benchmarks.bench_resilience
+# =============================================================================
+
+import asyncio
+import time
+
+from benchmarks.fakes import FakeUpstream, percentile
+from common.resilience import UpstreamClient
+
+
+async def run(hedge: bool, calls: int = 600, concurrency: int = 10) -> dict:
+    fake = FakeUpstream(latency=0.01, tail_latency=0.5, tail_ratio=0.05)
+    client = UpstreamClient("bench", timeout=5.0, hedge=hedge, transport=fake.transport())
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get("https://fake.weather/v1/current.json", params={"q": f"city-{i % 50}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return {
+        "hedge": hedge,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "upstream_calls": fake.calls,
+    }
+
+
+async def main():
+    for hedge in (False, True):
+        r = await run(hedge)
+        print(
+            f"hedge={str(r['hedge']):5}  p50={r['p50_ms']:7.1f}ms  p95={r['p95_ms']:7.1f}ms  "
+            f"p99={r['p99_ms']:7.1f}ms  upstream_calls={r['upstream_calls']}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+# =============================================================================
+# benchmarks/bench_resolver.py
+# =============================================================================
+# Purpose:
+# Exercises common.resolver against a local fake Consul DNS server:
+# - lookup latency without caching vs with the resolver cache
+# - SRV weight-based endpoint selection
+# - background refresh before expiry and stale answers during an outage
+# - ResolvingTransport sending requests to the SRV address and port
+#
+# Run: python -m benchmarks.bench_resolver
+# =============================================================================
+
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.fakes import FakeConsulDns, percentile
+from common.resolver import ConsulResolver, ResolvingTransport
+
+SERVICES = {
+    "weather.service.consul": [("10.0.0.1", 21001, 1), ("10.0.0.2", 21002, 3)],
+    "currency.virtual.consul": [("240.0.0.3", 0, 1)],
+}
+
+
+async def lookup_latency(resolver: ConsulResolver, lookups: int = 500) -> dict:
+    latencies = []
+    for _ in range(lookups):
+        started = time.perf_counter()
+        await resolver.pick("weather.service.consul")
+        latencies.append(time.perf_counter() - started)
+    return {"p50_us": percentile(latencies, 0.5) * 1e6, "p99_us": percentile(latencies, 0.99) * 1e6}
+
+
+async def main():
+    # Consul DNS through the local agent: ~1ms per query
+    transport, fake = await FakeConsulDns.start(SERVICES, ttl=0, latency=0.001)
+    nameserver = fake.address
+
+    uncached = ConsulResolver(nameserver, min_ttl=0, max_stale=0)
+    r = await lookup_latency(uncached)
+    print(f"no cache        p50={r['p50_us']:8.1f}us  p99={r['p99_us']:8.1f}us  dns_queries={fake.queries}")
+
+    fake.queries = 0
+    cached = ConsulResolver(nameserver, min_ttl=5.0)
+    r = await lookup_latency(cached)
+    print(f"resolver cache  p50={r['p50_us']:8.1f}us  p99={r['p99_us']:8.1f}us  dns_queries={fake.queries}")
+
+    picks = Counter([(await cached.pick("weather.service.consul")).port for _ in range(4000)])
+    print(f"SRV weights 1:3 -> picks {dict(picks)}")
+
+    # Refresh ahead: past 80% of the TTL the answer is served and refreshed in the background
+    short = ConsulResolver(nameserver, min_ttl=0.2, max_stale=10.0)
+    await short.resolve("currency.virtual.consul")
+    fake.queries = 0
+    await asyncio.sleep(0.17)
+    await short.resolve("currency.virtual.consul")
+    await asyncio.sleep(0.01)
+    print(f"refresh ahead   served from cache, background queries={fake.queries}")
+
+    # Outage: expired entries are still served within max_stale
+    fake.down = True
+    await asyncio.sleep(0.3)
+    short.timeout = 0.05
+    endpoints = await short.resolve("currency.virtual.consul")
+    print(f"DNS outage      stale answer {endpoints[0].address}")
+    fake.down = False
+
+    seen = []
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.host, request.url.port, request.headers["host"]))
+        return httpx.Response(200, json={})
+
+    async with httpx.AsyncClient(transport=ResolvingTransport(cached, httpx.MockTransport(upstream))) as client:
+        await client.post("http://weather.service.consul:8080/", json={})
+    print(f"transport       sent to {seen[0][0]}:{seen[0][1]} with Host: {seen[0][2]}")
+
+    transport.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+# =============================================================================
+# benchmarks/bench_shared_cache.py
+# =============================================================================
+# Purpose:
+# Three replicas (separate SharedCache instances, each with its own L1)
+# serve 300 concurrent lookups each over 60 keys from a 20ms upstream:
+# without an L2, with the Redis-protocol backend (against the local
+# FakeRedis stand-in) and with the disk backend. Then a fourth replica
+# starts cold and serves the same traffic, and a global version bump shows
+# the old entries being ignored. Finally get_exchange_rate on the currency
+# MCP module is called on a "new replica" (L1 cleared) with the fake FX API.
+#
+# Run: python -m benchmarks.bench_shared_cache
+# =============================================================================
+
+import asyncio
+import logging
+import random
+import tempfile
+import time
+
+from benchmarks.fakes import FakeFxApi, FakeRedis
+from common.shared_cache import DiskBackend, RedisBackend, SharedCache
+
+REPLICAS, REQUESTS, KEYS = 3, 300, 60
+
+
+class Upstream:
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.calls = 0
+
+    async def fetch(self, key: str) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {"key": key, "value": len(key)}
+
+
+def traffic(seed: int):
+    rng = random.Random(seed)
+    return [f"city-{min(int(rng.paretovariate(1.2)), KEYS)}" for _ in range(REQUESTS)]
+
+
+async def serve(cache: SharedCache, upstream: Upstream, seed: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(cache.get_or_load(key, lambda key=key: upstream.fetch(key)) for key in traffic(seed)))
+    return time.perf_counter() - started
+
+
+async def scenario(label: str, backend):
+    upstream = Upstream()
+    replicas = [SharedCache("bench", backend=backend, l1_size=256) for _ in range(REPLICAS)]
+    elapsed = await asyncio.gather(*(serve(cache, upstream, seed) for seed, cache in enumerate(replicas)))
+    unique = len({key for seed in range(REPLICAS) for key in traffic(seed)})
+    print(f"{label:8} {REPLICAS} replicas: upstream calls={upstream.calls:3} (unique keys {unique})  "
+          f"max time={max(elapsed) * 1000:5.0f}ms")
+    if backend is None:
+        return
+
+    upstream.calls = 0
+    new_replica = SharedCache("bench", backend=backend, l1_size=256)
+    elapsed = await serve(new_replica, upstream, 0)
+    print(f"{label:8} new replica:  upstream calls={upstream.calls:3}  time={elapsed * 1000:5.0f}ms")
+
+    upstream.calls = 0
+    bumped = SharedCache("bench", backend=backend, l1_size=256, version="2")
+    await serve(bumped, upstream, 0)
+    print(f"{label:8} version bump: upstream calls={upstream.calls:3} (old entries ignored)")
+
+
+async def currency(backend):
+    from mcps.curr import server as currency_server
+
+    fake = FakeFxApi(latency=0.02)
+    currency_server.frankfurter_api._transport = fake.transport()
+    currency_server.fx_rates = SharedCache("fx", backend=backend, ttl=300)
+    await currency_server.get_exchange_rate("USD", "INR", "2024-05-02")
+    currency_server.fx_rates = SharedCache("fx", backend=backend, ttl=300)  # another replica, cold L1
+    started = time.perf_counter()
+    result = await currency_server.get_exchange_rate("USD", "INR", "2024-05-02")
+    print(f"get_exchange_rate on a cold replica: upstream calls={fake.calls} (1 = only the first replica's)  "
+          f"time={(time.perf_counter() - started) * 1000:.1f}ms  rates={result['rates']}")
+
+
+async def main():
+    await scenario("no L2", None)
+    redis = await FakeRedis.start()
+    await scenario("redis", RedisBackend.from_url(redis.url))
+    print(f"         ({redis.commands} RESP commands served by the stand-in)")
+    with tempfile.TemporaryDirectory() as directory:
+        await scenario("disk", DiskBackend(directory))
+    await currency(RedisBackend.from_url(redis.url))
+    await redis.close()
+
+
+if __name__ == "__main__":
+    logging.getLogger("mcps.curr.server").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(main())
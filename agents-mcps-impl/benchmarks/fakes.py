@@ -0,0 +1,459 @@
+# =============================================================================
+# benchmarks/fakes.py
+# =============================================================================
+# Purpose:
+# Local stand-ins for the external services the agents talk to, so the
+# benchmarks run offline and deterministically.
+# =============================================================================
+
+import asyncio
+import datetime
+import math
+import random
+
+import httpx
+
+
+def weather_payload(location: str) -> dict:
+    """A weatherapi.com `current.json` shaped response for `location`."""
+    seed = sum(ord(c) for c in location)
+    temp_c = round(-5 + seed % 40 + (seed % 10) / 10, 1)
+    return {
+        "location": {"name": location.title(), "region": location.title(), "country": "Testland"},
+        "current": {
+            "temp_c": temp_c,
+            "temp_f": round(temp_c * 9 / 5 + 32, 1),
+            "condition": {"text": ["Sunny", "Cloudy", "Light rain", "Partly cloudy"][seed % 4]},
+            "humidity": 30 + seed % 60,
+            "wind_mph": round(2 + seed % 20 + 0.3, 1),
+            "wind_dir": ["N", "E", "S", "W"][seed % 4],
+        },
+    }
+
+
+class FakeUpstream:
+    """
+    An httpx transport that answers like weatherapi.com with injected latency.
+
+    Args:
+        latency: Base latency of every call (seconds).
+        tail_latency: Latency of the slow calls (seconds).
+        tail_ratio: Fraction of calls that hit the tail latency.
+        seed: Seed for the latency RNG.
+        quota: Calls per second the API key may make (0: unlimited); calls over it
+            get a 429 with `Retry-After: 1`, as a rate-limited paid plan would.
+        burst: Bucket size of the quota (default: one second of calls).
+    """
+
+    def __init__(self, latency: float = 0.01, tail_latency: float = 0.5, tail_ratio: float = 0.05, seed: int = 7,
+                 quota: float = 0.0, burst: float = None):
+        self.latency = latency
+        self.tail_latency = tail_latency
+        self.tail_ratio = tail_ratio
+        self.calls = 0
+        self.throttled = 0
+        self.quota = quota
+        self.burst = burst or quota
+        self._tokens = self.burst
+        self._updated = None
+        self._rng = random.Random(seed)
+
+    def _over_quota(self) -> bool:
+        import time
+
+        now = time.monotonic()
+        if self._updated is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.quota)
+        self._updated = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.quota and self._over_quota():
+            self.throttled += 1
+            return httpx.Response(429, headers={"Retry-After": "1"}, json={"error": {"code": 2007}})
+        slow = self._rng.random() < self.tail_ratio
+        await asyncio.sleep(self.tail_latency if slow else self.latency)
+        return httpx.Response(200, json=weather_payload(request.url.params.get("q", "nowhere")))
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def fx_payload(base: str, symbols: str, date: str = "latest") -> dict:
+    """A frankfurter.app shaped response for `base` -> comma separated `symbols`."""
+    rates = {}
+    for symbol in symbols.split(","):
+        seed = sum(ord(c) for c in base + symbol)
+        rates[symbol] = round(0.5 + (seed % 200) / 100, 4)
+    return {"amount": 1.0, "base": base, "date": "2024-01-02" if date == "latest" else date, "rates": rates}
+
+
+FX_CURRENCIES = ("USD", "GBP", "JPY", "INR", "CHF", "AUD", "CAD", "SEK")
+
+
+def fx_series_rate(currency: str, date: datetime.date) -> float:
+    """A deterministic EUR -> `currency` rate that drifts smoothly from day to day."""
+    if currency == "EUR":
+        return 1.0
+    seed = sum(ord(c) for c in currency)
+    level = 0.5 + (seed % 200) / 100
+    return round(level * (1 + 0.08 * math.sin(date.toordinal() / 45 + seed)), 5)
+
+
+def fx_range_payload(base: str, start: str, end: str, symbols: str = "") -> dict:
+    """A frankfurter.app `/<start>..<end>` shaped response (business days only)."""
+    first, last = datetime.date.fromisoformat(start), datetime.date.fromisoformat(end or "2100-01-01")
+    last = min(last, datetime.date.today())
+    currencies = [c for c in (symbols.split(",") if symbols else FX_CURRENCIES + ("EUR",)) if c != base]
+    rates = {}
+    day = first
+    while day <= last:
+        if day.weekday() < 5:
+            rates[day.isoformat()] = {c: round(fx_series_rate(c, day) / fx_series_rate(base, day), 5) for c in currencies}
+        day += datetime.timedelta(days=1)
+    return {"amount": 1.0, "base": base, "start_date": start, "end_date": last.isoformat(), "rates": rates}
+
+
+class FakeFxApi:
+    """An httpx transport that answers like api.frankfurter.app (single dates and ranges)."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        date = request.url.path.strip("/") or "latest"
+        params = request.url.params
+        if ".." in date:
+            start, _, end = date.partition("..")
+            return httpx.Response(200, json=fx_range_payload(params.get("from", "EUR"), start, end, params.get("to", "")))
+        return httpx.Response(200, json=fx_payload(params.get("from", "EUR"), params.get("to", "USD"), date))
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+
+class FakeConsulKv:
+    """
+    An httpx transport answering Consul's KV API (GET and PUT with `?cas=`),
+    as used by the shared quota bucket (common.quota).
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.data = {}  # key -> (value bytes, modify index)
+        self.index = 0
+        self.requests = 0
+        self.conflicts = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        import base64
+
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        key = request.url.path.removeprefix("/v1/kv/")
+        if request.method == "GET":
+            if key not in self.data:
+                return httpx.Response(404)
+            value, index = self.data[key]
+            return httpx.Response(200, json=[{"Key": key, "Value": base64.b64encode(value).decode(),
+                                              "ModifyIndex": index, "CreateIndex": index}])
+        cas = request.url.params.get("cas")
+        if cas is not None and int(cas) != self.data.get(key, (b"", 0))[1]:
+            self.conflicts += 1
+            return httpx.Response(200, text="false")
+        self.index += 1
+        self.data[key] = (request.content, self.index)
+        return httpx.Response(200, text="true")
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+
+class LocalServer:
+    """
+    Runs an ASGI app with uvicorn on a background thread, for benchmarks that
+    need a real socket (e.g. MCP over SSE).
+    """
+
+    def __init__(self, app, port: int, host: str = "127.0.0.1"):
+        import uvicorn
+
+        self.url = f"http://{host}:{port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self._thread = None
+
+    def __enter__(self) -> "LocalServer":
+        import threading
+        import time
+
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class FakeConsulDns(asyncio.DatagramProtocol):
+    """
+    A UDP DNS server answering like Consul DNS for a fixed set of services.
+
+    `services` maps a name (e.g. "weather.service.consul") to a list of
+    (address, port, weight) instances. SRV queries get one record per
+    instance with the addresses in the additional section, A queries get the
+    addresses. Set `down` to drop every query (simulates an outage).
+
+    Usage:
+        transport, fake = await FakeConsulDns.start({"web.service.consul": [("127.0.0.1", 8080, 1)]})
+    """
+
+    def __init__(self, services: dict, ttl: int = 0, latency: float = 0.0):
+        self.services = services
+        self.ttl = ttl
+        self.latency = latency
+        self.down = False
+        self.queries = 0
+        self.transport = None
+
+    @classmethod
+    async def start(cls, services: dict, ttl: int = 0, latency: float = 0.0, port: int = 0):
+        fake = cls(services, ttl, latency)
+        transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: fake, local_addr=("127.0.0.1", port)
+        )
+        return transport, fake
+
+    @property
+    def address(self):
+        return self.transport.get_extra_info("sockname")
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.queries += 1
+        if self.down:
+            return
+        asyncio.ensure_future(self._answer(data, addr))
+
+    async def _answer(self, data, addr):
+        import socket
+        import struct
+
+        from common.resolver import TYPE_A, TYPE_SRV, encode_name
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        query_id = struct.unpack_from("!H", data, 0)[0]
+        offset = 12
+        labels = []
+        while data[offset]:
+            labels.append(data[offset + 1:offset + 1 + data[offset]].decode())
+            offset += data[offset] + 1
+        question_end = offset + 5
+        qtype = struct.unpack_from("!H", data, offset + 1)[0]
+        name = ".".join(labels).lower()
+
+        def record(owner: str, rtype: int, rdata: bytes) -> bytes:
+            return encode_name(owner) + struct.pack("!HHIH", rtype, 1, self.ttl, len(rdata)) + rdata
+
+        instances = self.services.get(name)
+        answers, additional = [], []
+        for i, (address, port, weight) in enumerate(instances or []):
+            a = record(f"{address.replace('.', '-')}.addr.dc1.consul", TYPE_A, socket.inet_aton(address))
+            if qtype == TYPE_SRV:
+                target = encode_name(f"{address.replace('.', '-')}.addr.dc1.consul")
+                answers.append(record(name, TYPE_SRV, struct.pack("!HHH", 1, weight, port) + target))
+                additional.append(a)
+            elif qtype == TYPE_A:
+                answers.append(record(name, TYPE_A, socket.inet_aton(address)))
+
+        rcode = 0 if instances is not None else 3
+        header = struct.pack("!HHHHHH", query_id, 0x8180 | rcode, 1, len(answers), 0, len(additional))
+        self.transport.sendto(header + data[12:question_end] + b"".join(answers + additional), addr)
+
+
+def echo_task_manager(latency: float = 0.0):
+    """An A2A task manager that answers every message with "echo: <text>" after `latency`."""
+    from models.request import SendTaskResponse
+    from models.task import Message, TaskState, TaskStatus, TextPart
+    from server.task_manager import InMemoryTaskManager
+
+    class EchoTaskManager(InMemoryTaskManager):
+        async def on_send_task(self, request):
+            task = await self.upsert_task(request.params)
+            if latency:
+                await asyncio.sleep(latency)
+            reply = Message(role="agent", parts=[TextPart(text="echo: " + request.params.message.parts[0].text)])
+            async with self.lock:
+                task.status = TaskStatus(state=TaskState.COMPLETED)
+                task.history.append(reply)
+            return SendTaskResponse(id=request.id, result=task)
+
+    return EchoTaskManager()
+
+
+def agent_card(name: str, url: str):
+    from models.agent import AgentCapabilities, AgentCard
+
+    return AgentCard(name=name, description=f"{name} stand-in", url=url, version="1.0.0",
+                     capabilities=AgentCapabilities(streaming=False), skills=[])
+
+
+def scripted_llm_class():
+    """
+    A scripted stand-in for an ADK model (no network, no API key): it answers
+    "<model>: <user text>" after `latency` seconds plus `per_kb` seconds per KB
+    of prompt (time to first token grows with the prompt). A prefix sent as
+    cached content is not part of the prompt. When the user text matches
+    `fails_on`, it instead calls a tool that does not exist, which model-tier
+    validation rejects. `sent_bytes` records the prompt size of every call.
+    """
+    import re
+
+    from google.adk.models.base_llm import BaseLlm
+    from google.adk.models.llm_response import LlmResponse
+    from google.genai import types
+
+    class ScriptedLlm(BaseLlm):
+        latency: float = 0.0
+        per_kb: float = 0.0
+        fails_on: str = None
+        calls: int = 0
+        sent_bytes: list = []
+
+        async def generate_content_async(self, llm_request, stream: bool = False):
+            self.calls += 1
+            size = len(llm_request.model_dump_json(include={"contents", "config"}, exclude_none=True))
+            self.sent_bytes.append(size)
+            await asyncio.sleep(self.latency + self.per_kb * size / 1024)
+            text = " ".join(p.text for c in llm_request.contents if c.role == "user" for p in c.parts if p.text)
+            if self.fails_on and re.search(self.fails_on, text, re.IGNORECASE):
+                part = types.Part(function_call=types.FunctionCall(name="made_up_tool", args={}))
+            else:
+                part = types.Part(text=f"{self.model}: {text}")
+            yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+    return ScriptedLlm
+
+
+class FakeCacheProvider:
+    """A context-cache provider (common.context_cache) that keeps prefixes in memory."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.created = []
+        self.deleted = []
+
+    async def create(self, model, config, ttl):
+        import time
+
+        await asyncio.sleep(self.latency)
+        name = f"cachedContents/{model}-{len(self.created)}"
+        self.created.append(name)
+        return name, time.time() + ttl
+
+    async def delete(self, name):
+        self.deleted.append(name)
+
+
+class FakeRedis:
+    """
+    A Redis-protocol (RESP) server for the commands the shared tool cache
+    uses: PING, AUTH, SELECT, GET, SET (EX/PX/NX), DEL. Keys expire lazily.
+
+    Usage:
+        fake = await FakeRedis.start()   # fake.url == "redis://127.0.0.1:<port>"
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.data = {}  # key -> (value, expires monotonic or None)
+        self.commands = 0
+        self.server = None
+
+    @classmethod
+    async def start(cls, latency: float = 0.0, port: int = 0) -> "FakeRedis":
+        fake = cls(latency)
+        fake.server = await asyncio.start_server(fake._serve, "127.0.0.1", port)
+        return fake
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}"
+
+    async def close(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:-2])):
+                    size = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(size + 2))[:-2])
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(self._execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # client gone, or the stand-in is shutting down
+        finally:
+            writer.close()
+
+    def _get(self, key):
+        import time
+
+        item = self.data.get(key)
+        if item is not None and item[1] is not None and item[1] < time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+    def _execute(self, args) -> bytes:
+        import time
+
+        self.commands += 1
+        command = args[0].upper()
+        if command in (b"PING", b"AUTH", b"SELECT"):
+            return b"+OK\r\n" if command != b"PING" else b"+PONG\r\n"
+        if command == b"GET":
+            item = self._get(args[1])
+            return b"$-1\r\n" if item is None else b"$%d\r\n%s\r\n" % (len(item[0]), item[0])
+        if command == b"SET":
+            key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+            expires = None
+            if b"PX" in options:
+                expires = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            elif b"EX" in options:
+                expires = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+            if b"NX" in options and self._get(key) is not None:
+                return b"$-1\r\n"
+            self.data[key] = (value, expires)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            removed = sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+            return b":%d\r\n" % removed
+        return b"-ERR unknown command '%s'\r\n" % command
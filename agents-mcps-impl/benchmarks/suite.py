@@ -0,0 +1,275 @@
+# =============================================================================
+# benchmarks/suite.py
+# =============================================================================
+# Purpose:
+# Micro-benchmark suite for the hot paths, with JSON baselines and a
+# regression gate. Everything runs offline against the stand-ins in
+# benchmarks/fakes.py:
+# - destinations.*  DestinationsTool.list_cities / list_cities_capped
+# - weather.*       WeatherTool.get_weather for 1, 10 and 50 locations,
+#                   cold (every location fetched from a zero-latency fake
+#                   weatherapi.com) and warm (served from the cache)
+# - mcp.*           get_exchange_rate on the real currency MCP server over
+#                   SSE (fake FX API), through McpSessionPool
+# - a2a.*           tasks/send JSON-RPC round trips through ManagedA2AServer
+#                   (an A2AServer) with an echo task manager
+# Each case reports throughput and latency percentiles; with --repeat the
+# median of the repeats is kept.
+#
+# Run:     python -m benchmarks.suite run [-o results.json] [-k weather] [--repeat 3]
+#          (baseline of the reference machine: benchmarks/baselines/baseline.json)
+# Compare: python -m benchmarks.suite compare baseline.json results.json [--threshold 10]
+#          (exit status 1 when a case regressed beyond the threshold)
+# =============================================================================
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import gc
+import io
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple
+from uuid import uuid4
+
+from benchmarks.fakes import FakeFxApi, FakeUpstream, LocalServer, agent_card, echo_task_manager, percentile
+
+MCP_PORT = 18801
+A2A_PORT = 18802
+
+
+class Case(NamedTuple):
+    """One benchmark: `op` is awaited `iterations` times, `concurrency` at a time."""
+    name: str
+    op: Callable[[int], Awaitable]
+    iterations: int
+    concurrency: int = 1
+    ops_per_call: int = 1  # items handled by one op (e.g. locations per get_weather)
+
+
+async def measure(case: Case) -> Dict[str, float]:
+    for i in range(min(20, case.iterations)):  # warm up connections, caches and code paths
+        await case.op(i)
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(case.concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await case.op(i)
+            latencies.append(time.perf_counter() - started)
+
+    gc.collect()
+    started = time.perf_counter()
+    if case.concurrency == 1:
+        for i in range(case.iterations):
+            await one(i)
+    else:
+        await asyncio.gather(*(one(i) for i in range(case.iterations)))
+    elapsed = time.perf_counter() - started
+    return {
+        "ops_per_s": case.iterations * case.ops_per_call / elapsed,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "mean_us": statistics.fmean(latencies) * 1e6,
+    }
+
+
+# -- cases --------------------------------------------------------------------
+
+def destinations_cases() -> List[Case]:
+    from agents.travel_agent.tools.destinations_tool import DestinationsTool
+
+    tool = DestinationsTool(name="DestinationsTool", description="bench")
+    countries = list(DestinationsTool._destinations_data)
+    mixed = ["Europe", "Japan", "Scandinavia", "Paris", "south east asia", "United States", "Atlantis", "Kyoto, Japan"]
+    return [
+        Case("destinations.list_cities[country]", lambda i: tool.list_cities(countries[i % len(countries)]), 20000),
+        Case("destinations.list_cities[mixed]", lambda i: tool.list_cities(mixed[i % len(mixed)]), 20000),
+        Case("destinations.list_cities_capped[country]",
+             lambda i: tool.list_cities_capped(countries[i % len(countries)], max_cities=3), 20000),
+    ]
+
+
+def weather_cases() -> List[Case]:
+    import agents.weather_agent.tools.weather_tool as weather_tool
+    from agents.travel_agent.tools.destinations_tool import DestinationsTool
+    from common.resilience import UpstreamClient
+
+    weather_tool.weather_api = UpstreamClient("bench", timeout=5.0, hedge=False,
+                                              transport=FakeUpstream(latency=0.0, tail_ratio=0.0).transport())
+    tool = weather_tool.WeatherTool(name="WeatherTool", description="bench")
+    cities = [city for cities in DestinationsTool._destinations_data.values() for city in cities]
+
+    def get_weather(count: int, cold: bool):
+        async def op(i: int):
+            if cold:
+                weather_tool.weather_cache._entries.clear()
+            with contextlib.redirect_stdout(io.StringIO()):  # get_weather prints progress
+                await tool.get_weather([cities[(i * count + j) % len(cities)] for j in range(count)])
+        return op
+
+    cases = []
+    for count, iterations in ((1, 2000), (10, 500), (50, 100)):
+        cases.append(Case(f"weather.get_weather[n={count},cold]", get_weather(count, True), iterations,
+                          ops_per_call=count))
+        cases.append(Case(f"weather.get_weather[n={count},warm]", get_weather(count, False), iterations * 5,
+                          ops_per_call=count))
+    return cases
+
+
+@contextlib.contextmanager
+def mcp_server():
+    from mcps.curr import server as currency_server
+
+    logging.getLogger("mcps.curr.server").setLevel(logging.WARNING)
+    currency_server.frankfurter_api._transport = FakeFxApi().transport()
+    with LocalServer(currency_server.app, port=MCP_PORT) as server:
+        yield f"{server.url}/sse"
+
+
+@contextlib.contextmanager
+def a2a_server():
+    from common.admission import AdaptiveConcurrencyLimit, AdmissionController
+    from common.server import ManagedA2AServer
+
+    admission = AdmissionController(AdaptiveConcurrencyLimit(initial=64, max_limit=64), max_queue=256, name="bench")
+    server = ManagedA2AServer(agent_card=agent_card("Echo", f"http://127.0.0.1:{A2A_PORT}/"),
+                              task_manager=echo_task_manager(), admission=admission)
+    with LocalServer(server.app, A2A_PORT) as local:
+        yield f"{local.url}/"
+
+
+def mcp_cases(url: str, stack: contextlib.AsyncExitStack) -> List[Case]:
+    from common.mcp_pool import McpSessionPool
+
+    pool = McpSessionPool(url, size=2)
+    stack.push_async_callback(pool.close)
+    args = {"currency_from": "USD", "currency_to": "EUR"}
+    return [
+        Case("mcp.get_exchange_rate[c=1]", lambda i: pool.call_tool("get_exchange_rate", args), 300),
+        Case("mcp.get_exchange_rate[c=8]", lambda i: pool.call_tool("get_exchange_rate", args), 800, concurrency=8),
+    ]
+
+
+def a2a_cases(url: str) -> List[Case]:
+    from common.client import MeshA2AClient
+
+    client = MeshA2AClient(url=url, new_history_only=True)
+
+    def send(i: int):
+        return client.send_task({"id": uuid4().hex, "sessionId": "bench",
+                                 "message": {"role": "user", "parts": [{"type": "text", "text": f"question {i}"}]}})
+
+    return [
+        Case("a2a.tasks_send[c=1]", send, 500),
+        Case("a2a.tasks_send[c=16]", send, 2000, concurrency=16),
+    ]
+
+
+async def run_cases(selected: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with contextlib.ExitStack() as servers:
+        async with contextlib.AsyncExitStack() as stack:
+            cases = destinations_cases() + weather_cases()
+            if not selected or "mcp" in selected:
+                cases += mcp_cases(servers.enter_context(mcp_server()), stack)
+            if not selected or "a2a" in selected:
+                cases += a2a_cases(servers.enter_context(a2a_server()))
+            for case in cases:
+                if selected and selected not in case.name:
+                    continue
+                runs = [await measure(case) for _ in range(repeat)]
+                results[case.name] = {key: round(statistics.median(r[key] for r in runs), 2) for key in runs[0]}
+                r = results[case.name]
+                print(f"{case.name:44} {r['ops_per_s']:11.1f} ops/s  p50={r['p50_us']:10.1f}us  "
+                      f"p99={r['p99_us']:10.1f}us", flush=True)
+    return results
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+    }
+
+
+# -- comparison ---------------------------------------------------------------
+
+def compare(baseline: dict, current: dict, threshold: float, tail_threshold: float) -> List[str]:
+    """
+    Prints a comparison table; returns the regressions: throughput down or
+    p50 up by more than `threshold` percent, or p99 up by more than
+    `tail_threshold` percent.
+    """
+    regressions = []
+    print(f"{'case':44} {'ops/s':>18} {'p50':>18} {'p99':>18}")
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:44} (new)")
+            continue
+        changes = {key: (now[key] / before[key] - 1) * 100 if before[key] else 0.0
+                   for key in ("ops_per_s", "p50_us", "p99_us")}
+        flagged = [key for key, limit in (("ops_per_s", -threshold), ("p50_us", threshold), ("p99_us", tail_threshold))
+                   if (changes[key] < limit if limit < 0 else changes[key] > limit)]
+        cells = [f"{changes[key]:+7.1f}%{' !' if key in flagged else '  '}" for key in ("ops_per_s", "p50_us", "p99_us")]
+        print(f"{name:44} {cells[0]:>18} {cells[1]:>18} {cells[2]:>18}")
+        regressions += [f"{name}: {key} {changes[key]:+.1f}%" for key in flagged]
+    for name in sorted(baseline["results"].keys() - current["results"].keys()):
+        print(f"{name:44} (missing)")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Hot-path micro-benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("-o", "--output", help="write results as JSON to this file")
+    run.add_argument("-k", "--select", default="", help="only cases whose name contains this text")
+    run.add_argument("--repeat", type=int, default=3, help="runs per case; the median is kept (default 3)")
+    cmp = commands.add_parser("compare", help="compare results against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=10.0,
+                     help="allowed throughput drop / p50 increase in percent (default 10)")
+    cmp.add_argument("--tail-threshold", type=float, default=25.0,
+                     help="allowed p99 increase in percent (default 25)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        logging.disable(logging.WARNING)
+        results = asyncio.run(run_cases(args.select, max(1, args.repeat)))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"environment": environment(), "results": results}, f, indent=2)
+                f.write("\n")
+            print(f"results written to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold, args.tail_threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond the threshold:\n  " + "\n  ".join(regressions))
+        return 1
+    print("\nno regressions beyond the threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+# =============================================================================
+# common/admission.py
+# =============================================================================
+# Purpose:
+# Admission control for the A2A servers. When the LLM backend slows down,
+# tasks must not pile up without bound: a few requests should fail fast with
+# a retry hint while the rest keep completing within their deadline.
+#
+# This module provides:
+# - AdaptiveConcurrencyLimit: an AIMD limit driven by observed task latency
+# - AdmissionController: enforces the limit with a bounded, deadline-aware
+#   wait queue and raises OverloadedError when a task is shed
+# - ServerOverloadedError: the JSON-RPC error returned to shed callers
+# =============================================================================
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+
+from models.json_rpc import JSONRPCError
+
+from common.deadline import Deadline
+from common.metrics import MetricsRegistry, registry as default_registry
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------------------------------------------------------
+# Errors
+# -----------------------------------------------------------------------------
+
+class ServerOverloadedError(JSONRPCError):
+    """JSON-RPC error returned when a task is shed; `data.retryAfter` is in seconds."""
+
+    code: int = -32050
+    message: str = "Server overloaded"
+
+
+class OverloadedError(Exception):
+    """Raised by AdmissionController when a task cannot be admitted."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"overloaded ({reason}), retry after {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def to_json_rpc_error(self) -> ServerOverloadedError:
+        return ServerOverloadedError(
+            data={"reason": self.reason, "retryAfter": math.ceil(self.retry_after)}
+        )
+
+
+# -----------------------------------------------------------------------------
+# AdaptiveConcurrencyLimit
+# -----------------------------------------------------------------------------
+
+class AdaptiveConcurrencyLimit:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    The limit grows by about one per `limit` completed tasks while the server
+    is busy and latency stays close to the best latency seen recently; it is cut by `backoff_ratio` as soon
+    as latency exceeds `tolerance` times that baseline or a task fails.
+
+    Attributes:
+        limit: Current number of tasks allowed to run concurrently.
+        baseline: Slowly decaying minimum of observed latency (seconds).
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        tolerance: float = 2.0,
+        backoff_ratio: float = 0.9,
+        baseline_decay: float = 0.01,
+    ):
+        self._limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff_ratio = backoff_ratio
+        self.baseline_decay = baseline_decay
+        self.baseline: Optional[float] = None
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def on_sample(self, latency: float, inflight: int, failed: bool = False) -> None:
+        """
+        Feed one completed task into the limit.
+
+        Args:
+            latency: Wall-clock duration of the task in seconds.
+            inflight: Number of tasks that were running when it completed.
+            failed: True if the task errored or timed out.
+        """
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        else:
+            # Let the baseline drift up slowly so a permanently slower
+            # backend does not keep the limit at its minimum forever.
+            self.baseline += (latency - self.baseline) * self.baseline_decay
+
+        if failed or latency > self.baseline * self.tolerance:
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        elif inflight * 2 >= self._limit:
+            # Only grow when the limit is actually being used
+            self._limit = min(self.max_limit, self._limit + 1.0 / max(1.0, self._limit))
+
+
+# -----------------------------------------------------------------------------
+# AdmissionController
+# -----------------------------------------------------------------------------
+
+class Admission:
+    """Handle for an admitted task; lets the caller report a failed outcome."""
+
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+class AdmissionController:
+    """
+    Gates task execution behind an AdaptiveConcurrencyLimit.
+
+    Tasks over the limit wait in a bounded FIFO queue. A task is rejected
+    immediately when the queue is full or when its deadline cannot be met
+    given the current queue, and is dropped from the queue if its deadline
+    expires while waiting.
+    """
+
+    def __init__(
+        self,
+        limit: AdaptiveConcurrencyLimit = None,
+        max_queue: int = 32,
+        default_timeout: float = 120.0,
+        name: str = "a2a",
+        metrics: MetricsRegistry = None,
+    ):
+        self.limiter = limit or AdaptiveConcurrencyLimit()
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._avg_latency: Optional[float] = None
+
+        metrics = metrics or default_registry
+        labels = {"server": name}
+        self._labels = labels
+        self._admitted = metrics.counter("a2a_admission_admitted_total", "Tasks admitted for execution")
+        self._rejected = metrics.counter("a2a_admission_rejected_total", "Tasks shed by admission control")
+        self._latency = metrics.summary("a2a_task_latency_seconds", "Latency of admitted tasks")
+        self._inflight_gauge = metrics.gauge("a2a_admission_inflight", "Tasks currently executing")
+        self._queue_gauge = metrics.gauge("a2a_admission_queue_depth", "Tasks waiting for a slot")
+        self._limit_gauge = metrics.gauge("a2a_admission_limit", "Current adaptive concurrency limit")
+        self._publish()
+
+    @classmethod
+    def from_env(cls, name: str = "a2a") -> "AdmissionController":
+        """
+        Build a controller from environment variables:
+        A2A_CONCURRENCY_INITIAL, A2A_CONCURRENCY_MIN, A2A_CONCURRENCY_MAX,
+        A2A_QUEUE_SIZE and A2A_REQUEST_TIMEOUT (seconds).
+        """
+        limit = AdaptiveConcurrencyLimit(
+            initial=int(os.environ.get("A2A_CONCURRENCY_INITIAL", 8)),
+            min_limit=int(os.environ.get("A2A_CONCURRENCY_MIN", 1)),
+            max_limit=int(os.environ.get("A2A_CONCURRENCY_MAX", 64)),
+        )
+        return cls(
+            limit=limit,
+            max_queue=int(os.environ.get("A2A_QUEUE_SIZE", 32)),
+            default_timeout=float(os.environ.get("A2A_REQUEST_TIMEOUT", 120)),
+            name=name,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> float:
+        """Rough time until a newly queued task would start, used as a retry hint."""
+        avg = self._avg_latency or 1.0
+        waves = (self.queue_depth + 1) / max(1, self.limiter.limit)
+        return min(60.0, max(1.0, avg * waves))
+
+    def _publish(self) -> None:
+        self._inflight_gauge.set(self.inflight, self._labels)
+        self._queue_gauge.set(self.queue_depth, self._labels)
+        self._limit_gauge.set(self.limiter.limit, self._labels)
+
+    def _reject(self, reason: str) -> OverloadedError:
+        self._rejected.inc(labels={**self._labels, "reason": reason})
+        self._publish()
+        logger.warning(
+            f"Shedding task: {reason} (inflight={self.inflight}, "
+            f"queue={self.queue_depth}, limit={self.limiter.limit})"
+        )
+        return OverloadedError(reason, self.retry_after())
+
+    async def _acquire(self, deadline: Optional[Deadline]) -> None:
+        if self.inflight < self.limiter.limit and not self._waiters:
+            self.inflight += 1
+            return
+
+        if self.queue_depth >= self.max_queue:
+            raise self._reject("queue_full")
+
+        # Don't queue work that would miss its deadline before it even starts
+        if deadline is not None and self._avg_latency is not None:
+            expected_wait = self._avg_latency * (self.queue_depth + 1) / max(1, self.limiter.limit)
+            if expected_wait > deadline.remaining():
+                raise self._reject("deadline")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we timed out; give it back
+                self._release_slot()
+            else:
+                waiter.cancel()
+            raise self._reject("deadline")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            self._publish()
+
+    def _release_slot(self) -> None:
+        # Hand the slot directly to the oldest live waiter, if the limit allows
+        while self._waiters and self.inflight <= self.limiter.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.inflight -= 1
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[Deadline] = None) -> AsyncIterator["Admission"]:
+        """
+        Run the enclosed block once a concurrency slot is available.
+
+        Args:
+            deadline: Deadline of the task; used to reject early or stop waiting.
+
+        Yields:
+            Admission: set `failed = True` on it if the task failed without raising.
+
+        Raises:
+            OverloadedError: If the task is shed instead of admitted.
+        """
+        await self._acquire(deadline)
+        self._admitted.inc(labels=self._labels)
+        self._publish()
+        started = time.monotonic()
+        admission = Admission()
+        try:
+            yield admission
+        except Exception:
+            admission.failed = True
+            raise
+        finally:
+            failed = admission.failed
+            latency = time.monotonic() - started
+            self._avg_latency = latency if self._avg_latency is None else (
+                0.8 * self._avg_latency + 0.2 * latency
+            )
+            self._latency.observe(latency, self._labels)
+            self.limiter.on_sample(latency, self.inflight, failed)
+            self._release_slot()
+            self._publish()
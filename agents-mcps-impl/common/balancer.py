@@ -0,0 +1,252 @@
+# =============================================================================
+# common/balancer.py
+# =============================================================================
+# Purpose:
+# Client-side load balancing across the instances of one child agent.
+#
+# Consul discovery only hands the orchestrator one URL per agent (the first
+# healthy instance), so when Nomad runs several allocations of an agent all
+# tasks still go to one of them. InstanceBalancer spreads tasks across every
+# healthy instance from the Consul catalog:
+# - power of two choices: pick two random instances, send to the cheaper one
+# - cost = latency EWMA x (outstanding requests + 1), so a slow or busy
+#   instance gets fewer tasks without starving it of probes
+# - outlier ejection: an instance is taken out of rotation for a growing
+#   period after consecutive failures or when its latency EWMA is far above
+#   its peers'; at most half the instances are ejected at a time
+# - affinity: child agents keep conversation state per process, so every
+#   turn of a session (and every poll of a task) is pinned to the instance
+#   that got the first one; P2C only re-pins it when that instance is
+#   ejected, gone, or refused the task
+# =============================================================================
+
+import logging
+import math
+import random
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class Instance:
+    """One instance of an agent and its load statistics."""
+
+    def __init__(self, url: str, latency: float):
+        self.url = url
+        self.outstanding = 0
+        self.latency = latency  # EWMA of task latency (seconds)
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self._last_update = time.monotonic()
+
+    def ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def cost(self) -> float:
+        return self.latency * (self.outstanding + 1)
+
+    def observe(self, latency: float, decay: float) -> None:
+        """Time-decayed EWMA: old samples lose half their weight every `decay` seconds."""
+        now = time.monotonic()
+        weight = math.exp(-(now - self._last_update) * math.log(2) / decay)
+        self.latency = self.latency * weight + latency * (1 - weight) if self.samples else latency
+        self._last_update = now
+        self.samples += 1
+
+
+class InstanceBalancer:
+    """
+    Power-of-two-choices, least-outstanding-requests balancer with outlier ejection.
+
+    Thread-safe: instances are refreshed from the Consul watcher thread while
+    tasks are routed on the server's event loop.
+
+    Args:
+        name: Agent name (metrics label).
+        decay: Half-life of the latency EWMA (seconds).
+        failure_threshold: Consecutive failures that eject an instance.
+        latency_factor: An instance whose latency EWMA exceeds this multiple
+            of the median of its peers is ejected.
+        min_samples: Samples an instance needs before latency ejection applies.
+        base_ejection: First ejection period (seconds); doubles with every
+            further ejection of the same instance, up to `max_ejection`.
+        max_ejection: Upper bound of an ejection period (seconds).
+        max_ejected_ratio: Largest fraction of instances ejected at once.
+        max_pins: Affinity keys remembered (least recently used are dropped).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        decay: float = 10.0,
+        failure_threshold: int = 5,
+        latency_factor: float = 3.0,
+        min_samples: int = 10,
+        base_ejection: float = 30.0,
+        max_ejection: float = 300.0,
+        max_ejected_ratio: float = 0.5,
+        max_pins: int = 10000,
+    ):
+        self.name = name
+        self.decay = decay
+        self.failure_threshold = failure_threshold
+        self.latency_factor = latency_factor
+        self.min_samples = min_samples
+        self.base_ejection = base_ejection
+        self.max_ejection = max_ejection
+        self.max_ejected_ratio = max_ejected_ratio
+        self.max_pins = max_pins
+        self._instances: Dict[str, Instance] = {}
+        # affinity key (session or task id) -> URL of the instance it is pinned to
+        self._pins: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._picks = registry.counter("a2a_lb_requests_total", "Tasks routed to each agent instance")
+        self._ejections = registry.counter("a2a_lb_ejections_total", "Agent instances ejected as outliers")
+        registry.gauge("a2a_lb_instances", "Known instances per agent").set(0, {"agent": name})
+
+    @property
+    def instances(self) -> List[Instance]:
+        with self._lock:
+            return list(self._instances.values())
+
+    def set_instances(self, urls: List[str]) -> None:
+        """Replaces the instance set, keeping the statistics of known instances."""
+        with self._lock:
+            # New instances start at the mean latency so they get a fair share
+            known = [i.latency for i in self._instances.values() if i.samples]
+            initial = statistics.fmean(known) if known else 1.0
+            self._instances = {url: self._instances.get(url) or Instance(url, initial) for url in dict.fromkeys(urls)}
+        registry.gauge("a2a_lb_instances", "Known instances per agent").set(len(urls), {"agent": self.name})
+
+    def pick(self, exclude: Instance = None, affinity: str = None) -> Instance:
+        """
+        The instance `affinity` is pinned to while it is available and not
+        `exclude`; otherwise the cheaper of two random non-ejected instances,
+        avoiding `exclude` if possible (and pinning `affinity` to it).
+        """
+        now = time.monotonic()
+        if affinity is not None:
+            with self._lock:
+                pinned = self._instances.get(self._pins.get(affinity))
+                if pinned is not None and pinned is not exclude and not pinned.ejected(now):
+                    self._pins.move_to_end(affinity)
+                    return pinned
+        instance = self._pick(now, exclude)
+        if affinity is not None:
+            self.pin(affinity, instance)
+        return instance
+
+    def pin(self, affinity: str, instance: Instance) -> None:
+        """Routes later picks for `affinity` to `instance`."""
+        with self._lock:
+            self._pins[affinity] = instance.url
+            self._pins.move_to_end(affinity)
+            while len(self._pins) > self.max_pins:
+                self._pins.popitem(last=False)
+
+    def _pick(self, now: float, exclude: Optional[Instance]) -> Instance:
+        with self._lock:
+            instances = list(self._instances.values())
+        if not instances:
+            raise LookupError(f"No instances of {self.name}")
+        available = [i for i in instances if not i.ejected(now)] or instances
+        available = [i for i in available if i is not exclude] or available
+        if len(available) == 1:
+            return available[0]
+        a, b = random.sample(available, 2)
+        return a if a.cost() <= b.cost() else b
+
+    @asynccontextmanager
+    async def track(self, instance: Instance) -> AsyncIterator[Instance]:
+        """Accounts one task on `instance`; an exception counts as a failure."""
+        instance.outstanding += 1
+        self._picks.inc(labels={"agent": self.name, "instance": instance.url})
+        started = time.monotonic()
+        try:
+            yield instance
+        except Exception:
+            self._on_result(instance, time.monotonic() - started, failed=True)
+            raise
+        else:
+            self._on_result(instance, time.monotonic() - started, failed=False)
+        finally:
+            instance.outstanding -= 1
+
+    def _on_result(self, instance: Instance, latency: float, failed: bool) -> None:
+        if failed:
+            instance.consecutive_failures += 1
+            if instance.consecutive_failures >= self.failure_threshold:
+                self._eject(instance, f"{instance.consecutive_failures} consecutive failures")
+            return
+
+        instance.consecutive_failures = 0
+        instance.observe(latency, self.decay)
+        if instance.samples < self.min_samples:
+            return
+        peers = [i.latency for i in self.instances if i is not instance and i.samples >= self.min_samples]
+        if peers and instance.latency > self.latency_factor * statistics.median(peers):
+            self._eject(instance, f"latency {instance.latency:.2f}s vs peers {statistics.median(peers):.2f}s")
+
+    def _eject(self, instance: Instance, reason: str) -> None:
+        now = time.monotonic()
+        instances = self.instances
+        if instance.ejected(now):
+            return
+        ejected = sum(1 for i in instances if i.ejected(now))
+        if ejected + 1 > len(instances) * self.max_ejected_ratio:
+            return
+        period = min(self.max_ejection, self.base_ejection * 2 ** instance.ejections)
+        instance.ejections += 1
+        instance.ejected_until = now + period
+        instance.consecutive_failures = 0
+        # Forget the bad latency so the instance is probed fairly when it returns
+        instance.samples = 0
+        self._ejections.inc(labels={"agent": self.name})
+        logger.warning(f"Ejected {instance.url} of {self.name} for {period:.0f}s: {reason}")
+
+
+async def healthy_instance_urls(discovery, service: str) -> Optional[List[str]]:
+    """
+    Base URLs of every passing instance of `service` in the Consul catalog.
+
+    Args:
+        discovery: The agent's ConsulDiscoveryClient (address and token).
+        service: Consul service name of the agent.
+
+    Returns:
+        The URLs, or None when the catalog could not be queried.
+    """
+    headers = {"X-Consul-Token": discovery.consul_token} if discovery.consul_token else {}
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                f"{discovery.consul_address}/v1/health/service/{service}",
+                params={"passing": "true"},
+                headers=headers,
+                timeout=5.0,
+            )
+            response.raise_for_status()
+    except Exception as e:
+        logger.warning(f"Failed to list instances of {service}: {e}")
+        return None
+
+    urls = []
+    for entry in response.json():
+        service_data = entry.get("Service", {})
+        address = service_data.get("Address") or entry.get("Node", {}).get("Address")
+        port = service_data.get("Port")
+        if address and port:
+            urls.append(f"http://{address}:{port}/")
+    return urls
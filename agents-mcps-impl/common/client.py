@@ -0,0 +1,291 @@
+# =============================================================================
+# common/client.py
+# =============================================================================
+# Purpose:
+# Outbound A2A client used by the orchestrator to call child agents.
+#
+# The stock A2AClient opens a new httpx client (and TCP connection, and system
+# DNS lookup) for every task. MeshA2AClient instead:
+# - reuses one pooled httpx client per event loop
+# - resolves Consul names (`*.service.consul`, `*.virtual.consul`) through the
+#   in-process resolver cache (common.resolver)
+# - forwards the remaining time budget of the current task in the
+#   X-A2A-Timeout-Ms header, so child agents shed work nobody waits for
+#
+# - uses the fast codec (common.codec): orjson and optional "new messages
+#   only" history
+# - can submit tasks without waiting for them (common.task_queue) and poll
+#   for the result
+#
+# BalancedA2AClient additionally spreads tasks over every healthy instance of
+# the agent (common.balancer), keeping each session and each task on the
+# instance that holds its state.
+# =============================================================================
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Union
+from uuid import uuid4
+
+import httpx
+
+from client.client import A2AClient, A2AClientHTTPError, A2AClientJSONError
+from models.agent import AgentCard
+from models.json_rpc import JSONRPCRequest
+from models.task import Task
+from utilities.agent_connect import AgentConnector
+
+from common.admission import ServerOverloadedError
+from common.balancer import InstanceBalancer, healthy_instance_urls
+from common.codec import HISTORY_NEW, dumps, loads
+from common.deadline import current_deadline, remaining_budget
+from common.resolver import ResolvingTransport
+from common.task_queue import TERMINAL_STATES
+
+logger = logging.getLogger(__name__)
+
+# Default budget of one task when the caller has no deadline (matches A2AClient)
+DEFAULT_TIMEOUT = 60.0
+
+# httpx clients are bound to the event loop they were first used on
+_clients: Dict[int, httpx.AsyncClient] = {}
+
+
+def _client() -> httpx.AsyncClient:
+    loop_id = id(asyncio.get_running_loop())
+    client = _clients.get(loop_id)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(transport=ResolvingTransport())
+        _clients[loop_id] = client
+    return client
+
+
+class MeshA2AClient(A2AClient):
+    """
+    A2AClient over a shared, connection-pooled, Consul-resolving httpx client.
+
+    Args:
+        agent_card: Card of the agent to call (or pass `url`).
+        url: URL of the agent.
+        new_history_only: Ask for the messages of each call only instead of
+            the full task history.
+    """
+
+    def __init__(self, agent_card: AgentCard = None, url: str = None, new_history_only: bool = False):
+        super().__init__(agent_card=agent_card, url=url)
+        self.new_history_only = new_history_only
+
+    def _send_envelope(self, payload: dict[str, Any]) -> dict[str, Any]:
+        params = dict(payload)
+        if self.new_history_only:
+            params["metadata"] = {**(params.get("metadata") or {}), "historyMode": HISTORY_NEW}
+        return {"jsonrpc": "2.0", "id": uuid4().hex, "method": "tasks/send", "params": params}
+
+    async def send_task(self, payload: dict[str, Any]) -> Task:
+        return self._task(await self._send_request(self._send_envelope(payload)))
+
+    async def send_tasks(self, payloads: List[dict[str, Any]]) -> List[Union[Task, Exception]]:
+        """
+        Sends several tasks in one JSON-RPC batch (one HTTP round trip); the
+        server runs them concurrently.
+
+        Returns:
+            One entry per payload, in order: the Task, or the error of that call
+            (A2AClientHTTPError(503, ...) when the server shed it).
+        """
+        requests = [self._send_envelope(payload) for payload in payloads]
+        responses = await self._send_request(requests)
+        by_id = {response.get("id"): response for response in responses}
+        return [self._task_or_error(by_id.get(request["id"])) for request in requests]
+
+    async def submit_task(self, payload: dict[str, Any], push_url: str = None, push_token: str = None) -> Task:
+        """
+        Sends a non-blocking task: the server queues it and answers at once
+        with the task in "submitted" state.
+
+        Args:
+            payload: TaskSendParams of the task.
+            push_url: Webhook the server POSTs the finished task to.
+            push_token: Bearer token sent with the webhook call.
+        """
+        metadata = {**(payload.get("metadata") or {}), "blocking": False}
+        if push_url:
+            metadata["pushNotification"] = {"url": push_url, "token": push_token}
+        return await self.send_task({**payload, "metadata": metadata})
+
+    async def wait_for_task(self, task_id: str, poll_interval: float = 0.5, max_interval: float = 5.0,
+                            timeout: float = None) -> Task:
+        """
+        Polls `tasks/get` until the task reaches a final state, backing off
+        from `poll_interval` to `max_interval` between polls.
+
+        Raises:
+            asyncio.TimeoutError: the task did not finish within `timeout`
+                (default: the time left on the current deadline; without
+                one, polls until the task finishes).
+        """
+        async def poll() -> Task:
+            interval = poll_interval
+            while True:
+                task = await self.get_task({"id": task_id})
+                if task.status.state in TERMINAL_STATES:
+                    return task
+                await asyncio.sleep(interval)
+                interval = min(max_interval, interval * 1.5)
+
+        if timeout is None:
+            deadline = current_deadline()
+            timeout = deadline.remaining() if deadline is not None else None
+        return await asyncio.wait_for(poll(), timeout)
+
+    def _task_or_error(self, response: dict[str, Any]) -> Union[Task, Exception]:
+        if response is None:
+            return A2AClientJSONError("No response for this call in the batch")
+        error = response.get("error")
+        if error and error.get("code") == ServerOverloadedError().code:
+            return A2AClientHTTPError(503, error.get("message"))
+        try:
+            return self._task(response)
+        except Exception as e:
+            return e
+
+    async def get_task(self, payload: dict[str, Any]) -> Task:
+        request = {"jsonrpc": "2.0", "id": uuid4().hex, "method": "tasks/get", "params": payload}
+        return self._task(await self._send_request(request))
+
+    def _task(self, response: dict[str, Any]) -> Task:
+        result = response.get("result")
+        if result is None:
+            raise A2AClientJSONError(f"No task in response: {response.get('error')}")
+        return Task.model_validate(result)
+
+    async def _send_request(self, request: Union[JSONRPCRequest, dict, list]) -> Any:
+        return await self._post(self.url, request)
+
+    async def _post(self, url: str, request: Union[JSONRPCRequest, dict, list]) -> Any:
+        headers = {"Content-Type": "application/json"}
+        deadline = current_deadline()
+        if deadline is not None:
+            headers.update(deadline.to_header())
+
+        body = request if isinstance(request, (dict, list)) else request.model_dump()
+        try:
+            response = await _client().post(
+                url,
+                content=dumps(body),
+                headers=headers,
+                timeout=remaining_budget(DEFAULT_TIMEOUT),
+            )
+            response.raise_for_status()
+            return loads(response.content)
+
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+
+
+def _never_processed(error: Exception) -> bool:
+    """Whether a failed task certainly did not run, so sending it elsewhere is safe."""
+    if isinstance(error, A2AClientHTTPError):
+        return error.args[0] == 503  # shed by admission control
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+
+
+def _calls(request: Union[JSONRPCRequest, dict, list]) -> List[dict]:
+    calls = request if isinstance(request, list) else [request]
+    return [call if isinstance(call, dict) else call.model_dump() for call in calls]
+
+
+def _affinity(calls: List[dict]) -> Optional[str]:
+    """
+    Affinity key of a request: the task for `tasks/get` and other calls on
+    an existing task, else the session (a batch shares one session).
+    """
+    if not calls:
+        return None
+    params = calls[0].get("params") or {}
+    if calls[0].get("method") != "tasks/send":
+        return f"task:{params['id']}" if params.get("id") else None
+    return f"session:{params['sessionId']}" if params.get("sessionId") else None
+
+
+class BalancedA2AClient(MeshA2AClient):
+    """
+    MeshA2AClient that routes every task to one instance chosen by an
+    InstanceBalancer. Child agents keep sessions in process memory, so all
+    turns of a session go to the same instance, and polls of a task go to
+    the instance that accepted it. A task shed or refused by one instance is
+    retried once on another, which then owns the session.
+    """
+
+    def __init__(self, url: str, balancer: InstanceBalancer, **kwargs):
+        super().__init__(url=url, **kwargs)
+        self.balancer = balancer
+
+    async def _send_request(self, request: Union[JSONRPCRequest, dict, list]) -> Any:
+        calls = _calls(request)
+        affinity = _affinity(calls)
+        failed = None
+        for attempt in range(2):
+            instance = self.balancer.pick(exclude=failed, affinity=affinity)
+            for call in calls:
+                if call.get("method") == "tasks/send" and (call.get("params") or {}).get("id"):
+                    self.balancer.pin(f"task:{call['params']['id']}", instance)
+            try:
+                async with self.balancer.track(instance):
+                    return await self._post(instance.url, request)
+            except (A2AClientHTTPError, httpx.TransportError) as e:
+                if attempt or not _never_processed(e) or len(self.balancer.instances) < 2:
+                    raise
+                logger.warning(f"Retrying task on another instance of {self.balancer.name}: {e}")
+                failed = instance
+
+
+class BalancedAgentConnector(AgentConnector):
+    """
+    AgentConnector that balances tasks across every healthy instance of the
+    agent's Consul service. Until the catalog has been queried, the URL of the
+    agent card is the only instance.
+
+    Args:
+        name: Agent name.
+        base_url: URL from the agent card.
+        service: Consul service name of the agent; None disables instance
+            discovery (e.g. behind a transparent proxy, which balances itself).
+    """
+
+    def __init__(self, name: str, base_url: str, service: str = None):
+        super().__init__(name, base_url)
+        self.service = service
+        self.balancer = InstanceBalancer(name)
+        self.balancer.set_instances([base_url])
+        # The orchestrator only reads the reply, so only the new messages are requested
+        self.client = BalancedA2AClient(base_url, self.balancer, new_history_only=True)
+
+    async def send_tasks(self, messages: List[str], session_id: str) -> List[Union[Task, Exception]]:
+        """
+        Send several independent text tasks in one batch.
+
+        Returns:
+            One Task (or the error of that task) per message, in order.
+        """
+        payloads = [
+            {
+                "id": uuid4().hex,
+                "sessionId": session_id,
+                "message": {"role": "user", "parts": [{"type": "text", "text": message}]},
+            }
+            for message in messages
+        ]
+        return await self.client.send_tasks(payloads)
+
+    async def refresh_instances(self, discovery) -> None:
+        """Re-reads the healthy instances of the service from the Consul catalog."""
+        if not self.service:
+            return
+        urls = await healthy_instance_urls(discovery, self.service)
+        if urls:
+            self.balancer.set_instances(urls)
@@ -0,0 +1,103 @@
+# =============================================================================
+# common/codec.py
+# =============================================================================
+# Purpose:
+# Fast JSON-RPC codec for A2A task round trips.
+#
+# The stock path parses every envelope into pydantic models, dumps the result
+# back into dicts, runs them through FastAPI's jsonable_encoder and finally
+# the stdlib json encoder, for the whole, growing task history each time.
+# This codec:
+# - uses orjson when installed (falls back to the stdlib json module)
+# - encodes task responses straight from the model attributes to bytes
+# - can return only the messages added by the current call instead of the
+#   full history (`params.metadata.historyMode = "new"`), and honours
+#   `params.historyLength`
+#
+# Incoming models are still validated: pydantic-core validation is cheaper
+# than building the same models unvalidated with model_construct (see
+# benchmarks/bench_codec.py), so skipping it would not save anything.
+# =============================================================================
+
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from models.json_rpc import JSONRPCError
+from models.task import Message, Task
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a declared dependency
+    orjson = None
+
+# `params.metadata.historyMode` value asking for the messages of this call only
+HISTORY_NEW = "new"
+
+
+# -----------------------------------------------------------------------------
+# JSON
+# -----------------------------------------------------------------------------
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+def loads(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# -----------------------------------------------------------------------------
+# Responses
+# -----------------------------------------------------------------------------
+
+def select_history(history: List[Message], params, previous_length: int = 0) -> List[Message]:
+    """
+    The part of `history` to return: the messages added since
+    `previous_length` when `historyMode` is "new", else the last
+    `historyLength` messages, else everything.
+    """
+    metadata = getattr(params, "metadata", None) or {}
+    if metadata.get("historyMode") == HISTORY_NEW:
+        return history[previous_length:]
+    length = getattr(params, "historyLength", None)
+    if length is not None:
+        return history[-length:] if length > 0 else []
+    return history
+
+
+def message_to_dict(message: Message) -> dict:
+    return {"role": message.role, "parts": [{"type": "text", "text": part.text} for part in message.parts]}
+
+
+def task_to_dict(task: Task, history: Optional[List[Message]] = None) -> dict:
+    status = task.status
+    status_dict = {"state": getattr(status.state, "value", status.state)}
+    if status.timestamp is not None:
+        status_dict["timestamp"] = status.timestamp
+    return {
+        "id": task.id,
+        "status": status_dict,
+        "history": [message_to_dict(m) for m in (task.history if history is None else history)],
+    }
+
+
+def encode_response(request_id, task: Task = None, error: JSONRPCError = None,
+                    history: Optional[List[Message]] = None) -> bytes:
+    """Encodes a JSON-RPC response carrying `task` (or `error`) to bytes, omitting nulls."""
+    envelope = {"jsonrpc": "2.0", "id": request_id}
+    if task is not None:
+        envelope["result"] = task_to_dict(task, history)
+    if error is not None:
+        envelope["error"] = error.model_dump(exclude_none=True)
+    return dumps(envelope)
@@ -0,0 +1,222 @@
+# =============================================================================
+# common/context_cache.py
+# =============================================================================
+# Purpose:
+# Provider-side caching of the static prefix of every LLM call.
+#
+# Each agent sends the same long system instruction and tool schemas on every
+# turn (for the orchestrator also the listing of every discovered agent).
+# ContextCache registers that prefix once per model as cached content with
+# the provider (Gemini explicit caching) and sends later calls with only a
+# reference to it plus the conversation:
+# - the cache key is a hash of model + system instruction + tools + tool
+#   config, so handles are shared by every request and session, and a
+#   discovery change (new tools, new agent cards) yields a new handle; the
+#   previous handle of that model is deleted
+# - handles are re-created shortly before their TTL runs out
+# - creation is single-flight; prefixes below the provider's minimum size,
+#   and models the provider refuses, are sent uncached
+# =============================================================================
+
+import abc
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# GenerateContentConfig fields that make up the static prefix
+PREFIX_FIELDS = {"system_instruction", "tools", "tool_config"}
+
+
+class CacheProvider(abc.ABC):
+    """Creates and deletes cached content with a model provider."""
+
+    @abc.abstractmethod
+    async def create(self, model: str, config: types.GenerateContentConfig, ttl: float) -> Tuple[str, float]:
+        """Caches the prefix fields of `config`; returns the handle name and its expiry (epoch seconds)."""
+
+    @abc.abstractmethod
+    async def delete(self, name: str) -> None:
+        """Deletes the cached content `name`."""
+
+
+class GeminiCacheProvider(CacheProvider):
+    """Gemini explicit context caching through the google-genai client of an ADK Gemini model."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def create(self, model: str, config: types.GenerateContentConfig, ttl: float) -> Tuple[str, float]:
+        cached = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=config.system_instruction,
+                tools=config.tools,
+                tool_config=config.tool_config,
+                ttl=f"{int(ttl)}s",
+            ),
+        )
+        expires = cached.expire_time.timestamp() if cached.expire_time else time.time() + ttl
+        return cached.name, expires
+
+    async def delete(self, name: str) -> None:
+        await self.client.aio.caches.delete(name=name)
+
+
+def gemini_provider(llm: BaseLlm) -> Optional[CacheProvider]:
+    """The cache provider of an ADK model, or None when it has no explicit caching."""
+    from google.adk.models.google_llm import Gemini
+
+    return GeminiCacheProvider(llm.api_client) if isinstance(llm, Gemini) else None
+
+
+class _Handle:
+    def __init__(self, name: str, expires: float, prefix_bytes: int):
+        self.name = name
+        self.expires = expires
+        self.prefix_bytes = prefix_bytes
+
+
+class ContextCache:
+    """
+    Cached-content handles for the static prefixes of one agent's LLM calls.
+
+    Args:
+        agent: Agent name (metrics label).
+        ttl: Lifetime requested for each cached prefix (seconds).
+        refresh_margin: Re-create a handle this long before it expires.
+        min_tokens: Smallest prefix worth caching (the provider minimum),
+            estimated at 4 bytes per token.
+        retry_after: How long a model whose cache creation failed is sent
+            uncached before trying again (seconds).
+        provider_factory: Returns the CacheProvider for a model instance, or
+            None when it does not support caching.
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        ttl: float = 3600.0,
+        refresh_margin: float = 300.0,
+        min_tokens: int = 1024,
+        retry_after: float = 600.0,
+        provider_factory: Callable[[BaseLlm], Optional[CacheProvider]] = gemini_provider,
+    ):
+        self.agent = agent
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self.retry_after = retry_after
+        self.provider_factory = provider_factory
+        self._handles: Dict[str, _Handle] = {}
+        self._current: Dict[str, str] = {}  # model -> key of its live handle
+        self._creating: Dict[str, asyncio.Future] = {}
+        self._failed_until: Dict[str, float] = {}
+
+        self._lookups = registry.counter("llm_context_cache_total", "Static-prefix cache lookups by result")
+        self._saved = registry.counter("llm_context_cache_saved_bytes_total", "Prefix bytes not re-sent thanks to the cache")
+
+    @classmethod
+    def from_env(cls, agent: str) -> Optional["ContextCache"]:
+        """
+        A cache when CONTEXT_CACHE=TRUE, configured by CONTEXT_CACHE_TTL
+        (seconds, default 3600) and CONTEXT_CACHE_MIN_TOKENS (default 1024).
+        """
+        if os.environ.get("CONTEXT_CACHE") != "TRUE":
+            return None
+        return cls(
+            agent,
+            ttl=float(os.environ.get("CONTEXT_CACHE_TTL", 3600)),
+            min_tokens=int(os.environ.get("CONTEXT_CACHE_MIN_TOKENS", 1024)),
+        )
+
+    @staticmethod
+    def _prefix(model: str, config: types.GenerateContentConfig) -> Tuple[str, int]:
+        serialized = config.model_dump_json(include=PREFIX_FIELDS, exclude_none=True)
+        return hashlib.sha256(f"{model}\0{serialized}".encode()).hexdigest(), len(serialized)
+
+    async def prepare(self, llm_request: LlmRequest, llm: BaseLlm) -> LlmRequest:
+        """
+        The request to send to `llm`: a copy that references the cached
+        prefix instead of carrying it, or `llm_request` itself when the prefix
+        is not cached.
+        """
+        config = llm_request.config
+        model = llm_request.model
+        labels = {"agent": self.agent, "model": model}
+        if config is None or config.cached_content or not (config.system_instruction or config.tools):
+            return llm_request
+        if self._failed_until.get(model, 0) > time.monotonic():
+            self._lookups.inc(labels={**labels, "result": "disabled"})
+            return llm_request
+        provider = self.provider_factory(llm)
+        if provider is None:
+            return llm_request
+
+        key, size = self._prefix(model, config)
+        if size < self.min_tokens * 4:
+            self._lookups.inc(labels={**labels, "result": "too_small"})
+            return llm_request
+
+        handle = self._handles.get(key)
+        if handle is None or handle.expires - self.refresh_margin <= time.time():
+            handle = await self._create(key, model, config, size, provider, labels)
+            if handle is None:
+                return llm_request
+        else:
+            self._lookups.inc(labels={**labels, "result": "hit"})
+
+        self._saved.inc(handle.prefix_bytes, labels=labels)
+        cached_config = config.model_copy(update={
+            "cached_content": handle.name, "system_instruction": None, "tools": None, "tool_config": None,
+        })
+        return llm_request.model_copy(update={"config": cached_config})
+
+    async def _create(self, key: str, model: str, config, size: int, provider: CacheProvider,
+                      labels: dict) -> Optional[_Handle]:
+        pending = self._creating.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._creating[key] = future
+        handle = None
+        try:
+            name, expires = await provider.create(model, config, self.ttl)
+            handle = self._handles[key] = _Handle(name, expires, size)
+            self._lookups.inc(labels={**labels, "result": "created"})
+            logger.info(f"{self.agent}: cached {size} bytes of static prefix for {model} as {name}")
+        except Exception as e:
+            self._failed_until[model] = time.monotonic() + self.retry_after
+            self._lookups.inc(labels={**labels, "result": "error"})
+            logger.warning(f"{self.agent}: context caching for {model} failed, sending uncached: {e}")
+        finally:
+            future.set_result(handle)
+            del self._creating[key]
+
+        if handle is not None:
+            previous = self._current.get(model)
+            self._current[model] = key
+            if previous and previous != key:
+                await self._drop(previous, provider)
+        return handle
+
+    async def _drop(self, key: str, provider: CacheProvider) -> None:
+        """Deletes a superseded handle (e.g. after discovery changed the tools); best effort."""
+        handle = self._handles.pop(key, None)
+        if handle is None:
+            return
+        try:
+            await provider.delete(handle.name)
+        except Exception as e:
+            logger.warning(f"{self.agent}: failed to delete cached content {handle.name}: {e}")
@@ -0,0 +1,96 @@
+# =============================================================================
+# common/deadline.py
+# =============================================================================
+# Purpose:
+# Carries the time budget of an incoming A2A task through the call chain.
+#
+# The caller sends its remaining budget in the `X-A2A-Timeout-Ms` header. The
+# server turns it into an absolute deadline and binds it to a context
+# variable, so anything awaited while handling the task (LLM calls, tools,
+# upstream HTTP calls, calls to child agents) can ask how much time is left.
+# =============================================================================
+
+import contextvars
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator, Mapping, Optional
+
+# Header used to propagate the remaining time budget between hops
+DEADLINE_HEADER = "X-A2A-Timeout-Ms"
+
+_current: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar(
+    "a2a_deadline", default=None
+)
+
+
+class Deadline:
+    """An absolute point in (monotonic) time by which work must be finished."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str], default: Optional[float] = None) -> Optional["Deadline"]:
+        """
+        Build a deadline from the propagation header.
+
+        Args:
+            headers: Incoming HTTP headers (case-insensitive mapping).
+            default: Budget in seconds to use when the header is missing or invalid.
+
+        Returns:
+            Deadline or None when there is neither a header nor a default.
+        """
+        raw = headers.get(DEADLINE_HEADER)
+        if raw:
+            try:
+                return cls.after(max(0.0, float(raw) / 1000.0))
+            except ValueError:
+                pass
+        return cls.after(default) if default else None
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def to_header(self) -> dict:
+        return {DEADLINE_HEADER: str(int(self.remaining() * 1000))}
+
+    @contextmanager
+    def bind(self) -> Iterator["Deadline"]:
+        """Make this the current deadline for the duration of the block."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+
+def bind_deadline(deadline: Optional[Deadline]) -> ContextManager[Optional[Deadline]]:
+    """`deadline.bind()`, or a no-op block when the task has no deadline."""
+    return deadline.bind() if deadline is not None else nullcontext()
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Returns the deadline of the task being handled, if any."""
+    return _current.get()
+
+
+def remaining_budget(default: float) -> float:
+    """
+    Seconds available for the next operation: the time left on the current
+    deadline, capped by `default`. Without a deadline, `default` is returned.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    return min(default, deadline.remaining())
@@ -0,0 +1,195 @@
+# =============================================================================
+# common/gazetteer.py
+# =============================================================================
+# Purpose:
+# Local gazetteer behind common.locations: the countries and places the
+# agents know about (every city of the travel agent's destinations data),
+# with their coordinates.
+# =============================================================================
+
+# ISO 3166 code -> (name used throughout the agents, other names)
+COUNTRIES = {
+    "AT": ("Austria", ()),
+    "AU": ("Australia", ()),
+    "BE": ("Belgium", ()),
+    "CA": ("Canada", ()),
+    "CH": ("Switzerland", ("swiss confederation",)),
+    "CN": ("China", ("prc", "people's republic of china")),
+    "CZ": ("Czech Republic", ("czechia",)),
+    "DE": ("Germany", ("deutschland",)),
+    "DK": ("Denmark", ()),
+    "ES": ("Spain", ("espana",)),
+    "FI": ("Finland", ()),
+    "FR": ("France", ()),
+    "GB": ("United Kingdom", ("uk", "great britain", "britain", "england", "scotland", "wales", "northern ireland")),
+    "GR": ("Greece", ()),
+    "HU": ("Hungary", ()),
+    "IE": ("Ireland", ()),
+    "IN": ("India", ()),
+    "IT": ("Italy", ("italia",)),
+    "JP": ("Japan", ()),
+    "MA": ("Morocco", ()),
+    "MX": ("Mexico", ()),
+    "NL": ("Netherlands", ("holland", "the netherlands")),
+    "NO": ("Norway", ()),
+    "NZ": ("New Zealand", ()),
+    "PT": ("Portugal", ()),
+    "SE": ("Sweden", ()),
+    "TH": ("Thailand", ()),
+    "US": ("USA", ("united states", "united states of america", "america")),
+    "ZA": ("South Africa", ()),
+}
+
+# ISO 3166 code -> (name, latitude, longitude) of each place
+PLACES = {
+    "AT": (("Vienna", 48.2082, 16.3738),),
+    "AU": (
+        ("Sydney", -33.8688, 151.2093), ("Melbourne", -37.8136, 144.9631), ("Brisbane", -27.4698, 153.0251),
+        ("Perth", -31.9505, 115.8605), ("Adelaide", -34.9285, 138.6007), ("Gold Coast", -28.0167, 153.4000),
+        ("Cairns", -16.9186, 145.7781), ("Hobart", -42.8821, 147.3272), ("Darwin", -12.4634, 130.8456),
+        ("Canberra", -35.2809, 149.1300), ("Uluru", -25.3444, 131.0369), ("Byron Bay", -28.6474, 153.6020),
+        ("Great Barrier Reef", -18.2871, 147.6992), ("Margaret River", -33.9550, 115.0750),
+        ("Broome", -17.9614, 122.2359),
+    ),
+    "BE": (("Brussels", 50.8503, 4.3517),),
+    "CA": (
+        ("Toronto", 43.6532, -79.3832), ("Vancouver", 49.2827, -123.1207), ("Montreal", 45.5017, -73.5673),
+        ("Quebec City", 46.8139, -71.2080), ("Calgary", 51.0447, -114.0719), ("Ottawa", 45.4215, -75.6972),
+        ("Victoria", 48.4284, -123.3656), ("Halifax", 44.6488, -63.5752), ("Banff", 51.1784, -115.5708),
+        ("Whistler", 50.1163, -122.9574), ("Niagara Falls", 43.0896, -79.0849), ("Edmonton", 53.5461, -113.4938),
+        ("Winnipeg", 49.8951, -97.1384), ("Jasper", 52.8737, -118.0814), ("St. John's", 47.5615, -52.7126),
+    ),
+    "CH": (
+        ("Zurich", 47.3769, 8.5417), ("Geneva", 46.2044, 6.1432), ("Bern", 46.9480, 7.4474),
+        ("Lucerne", 47.0502, 8.3093), ("Zermatt", 46.0207, 7.7491), ("Interlaken", 46.6863, 7.8632),
+        ("Lausanne", 46.5197, 6.6323), ("Basel", 47.5596, 7.5886), ("Lugano", 46.0037, 8.9511),
+        ("St. Moritz", 46.4908, 9.8355), ("Montreux", 46.4312, 6.9107), ("Grindelwald", 46.6242, 8.0414),
+        ("Davos", 46.8027, 9.8360),
+    ),
+    "CN": (
+        ("Beijing", 39.9042, 116.4074), ("Shanghai", 31.2304, 121.4737), ("Xi'an", 34.3416, 108.9398),
+        ("Hong Kong", 22.3193, 114.1694), ("Chengdu", 30.5728, 104.0668), ("Guilin", 25.2736, 110.2900),
+        ("Hangzhou", 30.2741, 120.1551), ("Suzhou", 31.2989, 120.5853), ("Guangzhou", 23.1291, 113.2644),
+        ("Shenzhen", 22.5431, 114.0579), ("Lhasa", 29.6520, 91.1721), ("Kunming", 25.0389, 102.7183),
+        ("Harbin", 45.8038, 126.5349), ("Nanjing", 32.0603, 118.7969), ("Macau", 22.1987, 113.5439),
+    ),
+    "CZ": (("Prague", 50.0755, 14.4378),),
+    "DE": (
+        ("Berlin", 52.5200, 13.4050), ("Munich", 48.1351, 11.5820), ("Hamburg", 53.5511, 9.9937),
+        ("Frankfurt", 50.1109, 8.6821), ("Cologne", 50.9375, 6.9603), ("Dresden", 51.0504, 13.7373),
+        ("Stuttgart", 48.7758, 9.1829), ("Nuremberg", 49.4521, 11.0767), ("Heidelberg", 49.3988, 8.6724),
+        ("Leipzig", 51.3397, 12.3731), ("Dusseldorf", 51.2277, 6.7735), ("Bremen", 53.0793, 8.8017),
+        ("Hannover", 52.3759, 9.7320), ("Freiburg", 47.9990, 7.8421), ("Rothenburg", 49.3769, 10.1792),
+    ),
+    "DK": (("Copenhagen", 55.6761, 12.5683),),
+    "ES": (
+        ("Barcelona", 41.3874, 2.1686), ("Madrid", 40.4168, -3.7038), ("Seville", 37.3891, -5.9845),
+        ("Valencia", 39.4699, -0.3763), ("Granada", 37.1773, -3.5986), ("Malaga", 36.7213, -4.4214),
+        ("Bilbao", 43.2630, -2.9350), ("San Sebastian", 43.3183, -1.9812), ("Toledo", 39.8628, -4.0273),
+        ("Cordoba", 37.8882, -4.7794), ("Ibiza", 38.9067, 1.4206), ("Mallorca", 39.6953, 3.0176),
+        ("Tenerife", 28.2916, -16.6291), ("Cadiz", 36.5271, -6.2886), ("Zaragoza", 41.6488, -0.8891),
+    ),
+    "FI": (("Helsinki", 60.1699, 24.9384),),
+    "FR": (
+        ("Paris", 48.8566, 2.3522), ("Nice", 43.7102, 7.2620), ("Lyon", 45.7640, 4.8357),
+        ("Marseille", 43.2965, 5.3698), ("Bordeaux", 44.8378, -0.5792), ("Strasbourg", 48.5734, 7.7521),
+        ("Toulouse", 43.6047, 1.4442), ("Montpellier", 43.6108, 3.8767), ("Lille", 50.6292, 3.0573),
+        ("Nantes", 47.2184, -1.5536), ("Cannes", 43.5528, 7.0174), ("Avignon", 43.9493, 4.8055),
+        ("Aix-en-Provence", 43.5297, 5.4474), ("Annecy", 45.8992, 6.1294), ("Colmar", 48.0794, 7.3585),
+    ),
+    "GB": (
+        ("London", 51.5074, -0.1278), ("Edinburgh", 55.9533, -3.1883), ("Manchester", 53.4808, -2.2426),
+        ("Liverpool", 53.4084, -2.9916), ("Glasgow", 55.8642, -4.2518), ("Oxford", 51.7520, -1.2577),
+        ("Cambridge", 52.2053, 0.1218), ("Bath", 51.3811, -2.3590), ("York", 53.9600, -1.0873),
+        ("Belfast", 54.5973, -5.9301), ("Cardiff", 51.4816, -3.1791), ("Bristol", 51.4545, -2.5879),
+        ("Birmingham", 52.4862, -1.8904), ("Brighton", 50.8225, -0.1372), ("Stonehenge", 51.1789, -1.8262),
+    ),
+    "GR": (("Athens", 37.9838, 23.7275),),
+    "HU": (("Budapest", 47.4979, 19.0402),),
+    "IE": (("Dublin", 53.3498, -6.2603),),
+    "IN": (
+        ("Delhi", 28.7041, 77.1025), ("Mumbai", 19.0760, 72.8777), ("Jaipur", 26.9124, 75.7873),
+        ("Agra", 27.1767, 78.0081), ("Bangalore", 12.9716, 77.5946), ("Chennai", 13.0827, 80.2707),
+        ("Kolkata", 22.5726, 88.3639), ("Goa", 15.2993, 74.1240), ("Varanasi", 25.3176, 82.9739),
+        ("Udaipur", 24.5854, 73.7125), ("Kochi", 9.9312, 76.2673), ("Hyderabad", 17.3850, 78.4867),
+        ("Amritsar", 31.6340, 74.8723), ("Rishikesh", 30.0869, 78.2676), ("Darjeeling", 27.0410, 88.2663),
+    ),
+    "IT": (
+        ("Rome", 41.9028, 12.4964), ("Florence", 43.7696, 11.2558), ("Venice", 45.4408, 12.3155),
+        ("Milan", 45.4642, 9.1900), ("Naples", 40.8518, 14.2681), ("Turin", 45.0703, 7.6869),
+        ("Bologna", 44.4949, 11.3426), ("Verona", 45.4384, 10.9916), ("Siena", 43.3188, 11.3308),
+        ("Pisa", 43.7228, 10.4017), ("Palermo", 38.1157, 13.3615), ("Genoa", 44.4056, 8.9463),
+        ("Sorrento", 40.6263, 14.3758), ("Cinque Terre", 44.1461, 9.6439), ("Lake Como", 46.0160, 9.2572),
+        ("Amalfi", 40.6340, 14.6027),
+    ),
+    "JP": (
+        ("Tokyo", 35.6762, 139.6503), ("Kyoto", 35.0116, 135.7681), ("Osaka", 34.6937, 135.5023),
+        ("Hiroshima", 34.3853, 132.4553), ("Nara", 34.6851, 135.8048), ("Sapporo", 43.0618, 141.3545),
+        ("Fukuoka", 33.5904, 130.4017), ("Nagoya", 35.1815, 136.9066), ("Yokohama", 35.4437, 139.6380),
+        ("Kobe", 34.6901, 135.1955), ("Hakone", 35.2324, 139.1069), ("Kanazawa", 36.5613, 136.6562),
+        ("Nikko", 36.7199, 139.6982), ("Okinawa", 26.2124, 127.6809), ("Takayama", 36.1461, 137.2522),
+        ("Kamakura", 35.3192, 139.5467),
+    ),
+    "MA": (
+        ("Marrakesh", 31.6295, -7.9811), ("Casablanca", 33.5731, -7.5898), ("Fez", 34.0181, -5.0078),
+        ("Tangier", 35.7595, -5.8340), ("Rabat", 34.0209, -6.8416), ("Chefchaouen", 35.1688, -5.2636),
+        ("Essaouira", 31.5085, -9.7595), ("Agadir", 30.4278, -9.5981), ("Meknes", 33.8935, -5.5473),
+        ("Ouarzazate", 30.9189, -6.8934),
+    ),
+    "MX": (
+        ("Mexico City", 19.4326, -99.1332), ("Cancun", 21.1619, -86.8515), ("Puerto Vallarta", 20.6534, -105.2253),
+        ("Oaxaca", 17.0732, -96.7266), ("Guadalajara", 20.6597, -103.3496),
+        ("San Miguel de Allende", 20.9144, -100.7452), ("Merida", 20.9674, -89.5926),
+        ("Playa del Carmen", 20.6296, -87.0739), ("Tulum", 20.2114, -87.4654), ("Los Cabos", 22.8905, -109.9167),
+        ("Puebla", 19.0414, -98.2063), ("Monterrey", 25.6866, -100.3161),
+    ),
+    "NL": (("Amsterdam", 52.3676, 4.9041),),
+    "NO": (("Oslo", 59.9139, 10.7522),),
+    "NZ": (
+        ("Auckland", -36.8485, 174.7633), ("Wellington", -41.2865, 174.7762), ("Queenstown", -45.0312, 168.6626),
+        ("Christchurch", -43.5321, 172.6362), ("Rotorua", -38.1368, 176.2497), ("Napier", -39.4928, 176.9120),
+        ("Dunedin", -45.8788, 170.5028), ("Taupo", -38.6857, 176.0702), ("Milford Sound", -44.6414, 167.8974),
+        ("Nelson", -41.2706, 173.2840), ("Wanaka", -44.7032, 169.1321), ("Kaikoura", -42.4008, 173.6814),
+    ),
+    "PT": (("Lisbon", 38.7223, -9.1393),),
+    "SE": (("Stockholm", 59.3293, 18.0686),),
+    "TH": (
+        ("Bangkok", 13.7563, 100.5018), ("Chiang Mai", 18.7883, 98.9853), ("Phuket", 7.8804, 98.3923),
+        ("Krabi", 8.0863, 98.9063), ("Koh Samui", 9.5120, 100.0136), ("Pattaya", 12.9236, 100.8825),
+        ("Ayutthaya", 14.3692, 100.5877), ("Hua Hin", 12.5684, 99.9577), ("Koh Phi Phi", 7.7407, 98.7784),
+        ("Sukhothai", 17.0078, 99.8236), ("Kanchanaburi", 14.0228, 99.5328),
+    ),
+    "US": (
+        ("New York", 40.7128, -74.0060), ("Los Angeles", 34.0522, -118.2437), ("Chicago", 41.8781, -87.6298),
+        ("San Francisco", 37.7749, -122.4194), ("Miami", 25.7617, -80.1918), ("Las Vegas", 36.1699, -115.1398),
+        ("Boston", 42.3601, -71.0589), ("Washington DC", 38.9072, -77.0369), ("Seattle", 47.6062, -122.3321),
+        ("New Orleans", 29.9511, -90.0715), ("San Diego", 32.7157, -117.1611), ("Austin", 30.2672, -97.7431),
+        ("Nashville", 36.1627, -86.7816), ("Portland", 45.5152, -122.6784), ("Charleston", 32.7765, -79.9311),
+        ("Savannah", 32.0809, -81.0912), ("Orlando", 28.5383, -81.3792), ("Philadelphia", 39.9526, -75.1652),
+        ("Denver", 39.7392, -104.9903), ("Honolulu", 21.3069, -157.8583), ("Anchorage", 61.2181, -149.9003),
+        ("Atlanta", 33.7490, -84.3880),
+    ),
+    "ZA": (
+        ("Cape Town", -33.9249, 18.4241), ("Johannesburg", -26.2041, 28.0473), ("Durban", -29.8587, 31.0218),
+        ("Pretoria", -25.7479, 28.2293), ("Stellenbosch", -33.9321, 18.8602),
+        ("Kruger National Park", -23.9884, 31.5547), ("Garden Route", -33.9630, 22.4617),
+        ("Port Elizabeth", -33.9608, 25.6022), ("Franschhoek", -33.9133, 19.1169), ("Knysna", -34.0363, 23.0471),
+    ),
+}
+
+# Other names of places -> (place name, ISO 3166 code)
+PLACE_ALIASES = {
+    "nyc": ("New York", "US"), "new york city": ("New York", "US"), "la": ("Los Angeles", "US"),
+    "sf": ("San Francisco", "US"), "washington": ("Washington DC", "US"), "washington d c": ("Washington DC", "US"),
+    "vegas": ("Las Vegas", "US"), "new delhi": ("Delhi", "IN"), "bombay": ("Mumbai", "IN"),
+    "calcutta": ("Kolkata", "IN"), "bengaluru": ("Bangalore", "IN"), "madras": ("Chennai", "IN"),
+    "marrakech": ("Marrakesh", "MA"), "fes": ("Fez", "MA"), "peking": ("Beijing", "CN"),
+    "xian": ("Xi'an", "CN"), "munchen": ("Munich", "DE"), "koln": ("Cologne", "DE"),
+    "nurnberg": ("Nuremberg", "DE"), "roma": ("Rome", "IT"), "firenze": ("Florence", "IT"),
+    "venezia": ("Venice", "IT"), "milano": ("Milan", "IT"), "napoli": ("Naples", "IT"), "torino": ("Turin", "IT"),
+    "genova": ("Genoa", "IT"), "wien": ("Vienna", "AT"), "praha": ("Prague", "CZ"), "lisboa": ("Lisbon", "PT"),
+    "sevilla": ("Seville", "ES"), "donostia": ("San Sebastian", "ES"), "majorca": ("Mallorca", "ES"),
+    "geneve": ("Geneva", "CH"), "luzern": ("Lucerne", "CH"), "zuerich": ("Zurich", "CH"),
+    "montreal": ("Montreal", "CA"), "quebec": ("Quebec City", "CA"), "gqeberha": ("Port Elizabeth", "ZA"),
+    "naha": ("Okinawa", "JP"), "cdmx": ("Mexico City", "MX"),
+}
@@ -0,0 +1,151 @@
+# =============================================================================
+# common/locations.py
+# =============================================================================
+# Purpose:
+# Canonical location resolution shared by the weather and travel tools.
+#
+# Users (and the LLM) name the same place many ways: "Paris", "paris,
+# France", "Paris FR", "PARIS ", "München" / "Munich". Each spelling used to
+# be its own cache entry and its own upstream call. LocationResolver maps
+# free text onto the local gazetteer (common.gazetteer):
+# - names, aliases and place ids are normalized (accents, case, punctuation,
+#   whitespace) into one prebuilt index
+# - a trailing country ("..., France", "... FR", "... United States")
+#   qualifies the name
+# - recent resolutions are kept in an LRU, so repeated phrasings skip the
+#   normalization entirely
+# The place id ("paris-fr") is the key for caches, request counts and
+# in-flight deduplication; places outside the gazetteer fall back to their
+# normalized text.
+# =============================================================================
+
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from common.gazetteer import COUNTRIES, PLACE_ALIASES, PLACES
+
+_APOSTROPHES = re.compile(r"['’`]")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_MISSING = object()
+
+
+class Place(NamedTuple):
+    """A gazetteer place."""
+    id: str
+    name: str
+    country: str  # country name as used by the agents' data
+    country_code: str
+    lat: float
+    lon: float
+
+    @property
+    def coordinates(self) -> str:
+        """"lat,lon", the form weather APIs accept as a query."""
+        return f"{self.lat},{self.lon}"
+
+
+def normalize(text: str) -> str:
+    """Lower-cases `text` and strips accents, punctuation and extra whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _PUNCTUATION.sub(" ", _APOSTROPHES.sub("", text))
+    return " ".join("st" if word == "saint" else word for word in text.split())
+
+
+def place_id(name: str, country_code: str) -> str:
+    return f"{normalize(name).replace(' ', '-')}-{country_code.lower()}"
+
+
+class LocationResolver:
+    """
+    Resolves free-text locations to gazetteer places and countries.
+
+    Args:
+        countries: ISO code -> (name, other names), see common.gazetteer.
+        places: ISO code -> (name, lat, lon) tuples.
+        aliases: Other place names -> (place name, ISO code).
+        cache_size: Number of recent resolutions kept.
+    """
+
+    def __init__(self, countries=COUNTRIES, places=PLACES, aliases=PLACE_ALIASES, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._countries: Dict[str, str] = {}  # normalized name/alias/code -> ISO code
+        self._country_names: Dict[str, str] = {}
+        for code, (name, others) in countries.items():
+            self._country_names[code] = name
+            for alias in (code, name, *others):
+                self._countries.setdefault(normalize(alias), code)
+
+        self._places: Dict[str, Place] = {}  # normalized name/alias/id -> place
+        self._qualified: Dict[Tuple[str, str], Place] = {}  # (ISO code, normalized name) -> place
+        for code, entries in places.items():
+            for name, lat, lon in entries:
+                place = Place(place_id(name, code), name, self._country_names.get(code, code), code, lat, lon)
+                self._places.setdefault(normalize(name), place)
+                self._places[place.id] = place
+                self._qualified[(code, normalize(name))] = place
+        for alias, (name, code) in aliases.items():
+            place = self._qualified[(code, normalize(name))]
+            self._places.setdefault(normalize(alias), place)
+            self._qualified.setdefault((code, normalize(alias)), place)
+
+        self._recent: "OrderedDict[str, Optional[Place]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, text: str) -> Optional[Place]:
+        """The place `text` names, or None when it is not in the gazetteer."""
+        with self._lock:
+            place = self._recent.get(text, _MISSING)
+            if place is not _MISSING:
+                self._recent.move_to_end(text)
+                return place
+
+        place = self._resolve(text)
+        with self._lock:
+            self._recent[text] = place
+            if len(self._recent) > self.cache_size:
+                self._recent.popitem(last=False)
+        return place
+
+    def _resolve(self, text: str) -> Optional[Place]:
+        stripped = text.strip().lower()
+        if stripped in self._places:  # place id
+            return self._places[stripped]
+        name = normalize(text)
+        place = self._places.get(name)
+        if place is not None or not name:
+            return place
+
+        # "<name>, <country>": try the last one to three words as the country
+        words = name.split()
+        for size in range(1, min(3, len(words) - 1) + 1):
+            code = self._countries.get(" ".join(words[-size:]))
+            if code is not None:
+                place = self._qualified.get((code, " ".join(words[:-size])))
+                if place is not None:
+                    return place
+        return None
+
+    def country(self, text: str) -> Optional[str]:
+        """The agents' name of the country `text` names ("America" -> "USA"), or None."""
+        code = self._countries.get(normalize(text))
+        return self._country_names[code] if code else None
+
+    def key(self, text: str) -> str:
+        """
+        Canonical key of a location: the place id, the normalized country name,
+        or (for anything outside the gazetteer) the normalized text. Keys can
+        be passed to resolve() again.
+        """
+        place = self.resolve(text)
+        if place is not None:
+            return place.id
+        country = self.country(text)
+        return normalize(country if country else text)
+
+
+# Shared by every tool instance (tools are rebuilt whenever discovery changes)
+location_resolver = LocationResolver()
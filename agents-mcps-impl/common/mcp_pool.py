@@ -0,0 +1,268 @@
+# =============================================================================
+# common/mcp_pool.py
+# =============================================================================
+# Purpose:
+# Long-lived, pooled MCP client sessions for agents that call remote MCP
+# servers over SSE (e.g. the travel agent -> currency MCP server).
+#
+# Opening the SSE stream and running the MCP `initialize` handshake costs
+# several round trips through the Consul mesh, and ADK's stock toolset also
+# re-lists tools on every LLM turn. This pool instead:
+# - keeps `size` initialized sessions open, each owned by a supervisor task
+#   that reconnects with jittered exponential backoff
+# - caches the tool schemas from the first successful session
+# - pings every session periodically and recycles broken ones
+# - multiplexes concurrent tool calls, routing each to the least-busy session
+#   (MCP sessions support many in-flight requests over one stream)
+#
+# PooledMcpToolset plugs the pool into Google ADK as a regular toolset.
+# =============================================================================
+
+import asyncio
+import logging
+import random
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional
+
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.mcp_tool.mcp_session_manager import SseConnectionParams
+from google.adk.tools.mcp_tool.mcp_tool import McpTool
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.types import CallToolResult, Tool
+
+from common.deadline import remaining_budget
+from common.resolver import resolving_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolSlot:
+    """One pooled session plus its bookkeeping."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.inflight = 0
+        self.ready = asyncio.Event()
+        self.broken = asyncio.Event()
+
+
+class McpSessionPool:
+    """
+    A pool of initialized MCP sessions to one SSE endpoint.
+
+    The pool binds to the event loop it is first used on and starts lazily;
+    `close()` may be called from any thread or loop.
+
+    Args:
+        url: SSE endpoint of the MCP server (e.g. http://currency.virtual.consul/sse).
+        size: Number of sessions kept open.
+        headers: Extra HTTP headers sent when opening the SSE stream.
+        connect_timeout: Budget for opening a stream and initializing a session.
+        call_timeout: Default budget of one tool call (capped by the task deadline).
+        health_interval: Seconds between pings of each session.
+        max_backoff: Upper bound of the reconnect backoff.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        size: int = 2,
+        headers: Dict[str, str] = None,
+        connect_timeout: float = 10.0,
+        call_timeout: float = 30.0,
+        health_interval: float = 30.0,
+        max_backoff: float = 30.0,
+    ):
+        self.url = url
+        self.size = size
+        self.headers = headers
+        self.connect_timeout = connect_timeout
+        self.call_timeout = call_timeout
+        self.health_interval = health_interval
+        self.max_backoff = max_backoff
+        self._slots: List[_PoolSlot] = []
+        self._tasks: List[asyncio.Task] = []
+        self._tools: Optional[List[Tool]] = None
+        self._tools_ready: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started = False
+        self._closed = False
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        self._loop = asyncio.get_running_loop()
+        self._tools_ready = asyncio.Event()
+        self._slots = [_PoolSlot(i) for i in range(self.size)]
+        self._tasks = [asyncio.create_task(self._supervise(slot)) for slot in self._slots]
+        self._tasks.append(asyncio.create_task(self._health_loop()))
+
+    async def _supervise(self, slot: _PoolSlot) -> None:
+        """Keeps one session open, reconnecting with backoff whenever it breaks."""
+        backoff = 0.5
+        while not self._closed:
+            try:
+                async with AsyncExitStack() as stack:
+                    # Entered directly (not via wait_for): the stream's task group
+                    # must be exited by this same task; sse_client has its own timeout.
+                    read, write = await stack.enter_async_context(
+                        sse_client(self.url, headers=self.headers, timeout=self.connect_timeout,
+                                   sse_read_timeout=max(300.0, self.health_interval * 4),
+                                   httpx_client_factory=resolving_http_client)
+                    )
+                    session = await stack.enter_async_context(ClientSession(read, write))
+                    await asyncio.wait_for(session.initialize(), self.connect_timeout)
+                    if self._tools is None:
+                        self._tools = (await asyncio.wait_for(session.list_tools(), self.connect_timeout)).tools
+                        self._tools_ready.set()
+
+                    slot.session = session
+                    slot.broken.clear()
+                    slot.ready.set()
+                    backoff = 0.5
+                    logger.info(f"MCP session {slot.index} to {self.url} ready")
+                    await slot.broken.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"MCP session {slot.index} to {self.url} failed: {e}")
+            finally:
+                slot.ready.clear()
+                slot.session = None
+
+            if self._closed:
+                break
+            delay = random.uniform(backoff / 2, backoff)
+            backoff = min(self.max_backoff, backoff * 2)
+            await asyncio.sleep(delay)
+
+    async def _health_loop(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            for slot in self._slots:
+                session = slot.session
+                if session is None or slot.broken.is_set():
+                    continue
+                try:
+                    await asyncio.wait_for(session.send_ping(), self.connect_timeout)
+                except Exception as e:
+                    logger.warning(f"MCP session {slot.index} failed health check: {e}")
+                    slot.broken.set()
+
+    async def close(self) -> None:
+        """
+        Closes every session; safe to call more than once.
+
+        The supervisor tasks belong to the loop the pool started on (e.g. the
+        server's), while discovery may close toolsets from its watcher thread:
+        the shutdown is then run on the owning loop and awaited from here.
+        """
+        self._closed = True
+        loop = self._loop
+        if loop is None or loop is asyncio.get_running_loop():
+            await self._shutdown()
+        elif loop.is_running():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._shutdown(), loop))
+
+    async def _shutdown(self) -> None:
+        for slot in self._slots:
+            slot.broken.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # -------------------------------------------------------------------------
+    # Usage
+    # -------------------------------------------------------------------------
+
+    async def _acquire(self, timeout: float) -> _PoolSlot:
+        """The least-busy ready session, waiting up to `timeout` for one."""
+        self._ensure_started()
+        ready = [slot for slot in self._slots if slot.ready.is_set() and not slot.broken.is_set()]
+        if not ready:
+            waiters = [asyncio.create_task(slot.ready.wait()) for slot in self._slots]
+            try:
+                await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+            ready = [slot for slot in self._slots if slot.ready.is_set() and not slot.broken.is_set()]
+            if not ready:
+                raise ConnectionError(f"No MCP session to {self.url} available")
+        return min(ready, key=lambda slot: slot.inflight)
+
+    async def list_tools(self) -> List[Tool]:
+        """Tool schemas of the server, fetched once and cached."""
+        self._ensure_started()
+        await asyncio.wait_for(self._tools_ready.wait(), remaining_budget(self.connect_timeout))
+        return self._tools
+
+    async def create_session(self, headers: Dict[str, str] = None) -> ClientSession:
+        """MCPSessionManager-compatible accessor: the least-busy ready session."""
+        return (await self._acquire(remaining_budget(self.connect_timeout))).session
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any] = None) -> CallToolResult:
+        """
+        Calls a tool on the least-busy session.
+
+        A call that fails because its session broke is retried once on
+        another session; timeouts are not retried.
+        """
+        last_error: Optional[Exception] = None
+        for _ in range(2):
+            budget = remaining_budget(self.call_timeout)
+            slot = await self._acquire(budget)
+            slot.inflight += 1
+            try:
+                return await asyncio.wait_for(slot.session.call_tool(name, arguments=arguments), budget)
+            except asyncio.TimeoutError:
+                raise
+            except Exception as e:
+                logger.warning(f"MCP call {name} on session {slot.index} failed: {e}")
+                last_error = e
+                slot.broken.set()
+            finally:
+                slot.inflight -= 1
+        raise last_error
+
+
+class PooledMcpTool(McpTool):
+    """An ADK MCP tool whose calls go through an McpSessionPool."""
+
+    async def _run_async_impl(self, *, args, tool_context, credential):
+        return await self._mcp_session_manager.call_tool(self.name, arguments=args)
+
+
+class PooledMcpToolset(BaseToolset):
+    """
+    ADK toolset backed by an McpSessionPool, with cached tool schemas.
+
+    Args:
+        url: SSE endpoint of the MCP server.
+        pool_size: Number of pooled sessions.
+    """
+
+    def __init__(self, url: str, pool_size: int = 2, **pool_kwargs):
+        super().__init__()
+        # Same attribute as MCPToolset so discovery can detect URL changes
+        self._connection_params = SseConnectionParams(url=url)
+        self.pool = McpSessionPool(url, size=pool_size, **pool_kwargs)
+        self._tools: Optional[List[PooledMcpTool]] = None
+
+    async def get_tools(self, readonly_context=None) -> List[PooledMcpTool]:
+        if self._tools is None:
+            self._tools = [
+                PooledMcpTool(mcp_tool=tool, mcp_session_manager=self.pool)
+                for tool in await self.pool.list_tools()
+            ]
+        return [tool for tool in self._tools if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self) -> None:
+        await self.pool.close()
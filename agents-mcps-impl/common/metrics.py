@@ -0,0 +1,177 @@
+# =============================================================================
+# common/metrics.py
+# =============================================================================
+# Purpose:
+# A tiny in-process metrics registry shared by the A2A servers and the MCP
+# server. Values are rendered in the Prometheus text exposition format on
+# `/metrics`, which is what the Nomad Autoscaler (Prometheus APM plugin) and
+# Consul-registered scrapers read to make scaling decisions.
+#
+# Only what the agents need is implemented: counters, gauges and a simple
+# summary (count + sum + a few quantiles over a sliding window).
+# =============================================================================
+
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> LabelSet:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels: LabelSet, extra: Optional[Dict[str, str]] = None) -> str:
+    items = list(labels) + sorted((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Counter:
+    """A monotonically increasing value, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelSet, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, labels: Optional[Dict[str, str]] = None) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, LabelSet, float]]:
+        with self._lock:
+            return [(self.name, k, v) for k, v in self._values.items()]
+
+
+class Gauge:
+    """A value that can go up and down, or be read lazily from a callback."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help = help
+        self._fn = fn
+        self._values: Dict[LabelSet, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        self.inc(-amount, labels)
+
+    def value(self, labels: Optional[Dict[str, str]] = None) -> float:
+        if self._fn is not None:
+            return float(self._fn())
+        return self._values.get(_labels(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, LabelSet, float]]:
+        if self._fn is not None:
+            return [(self.name, (), float(self._fn()))]
+        with self._lock:
+            return [(self.name, k, v) for k, v in self._values.items()]
+
+
+class Summary:
+    """Count, sum and sliding-window quantiles of observed values (e.g. latency)."""
+
+    kind = "summary"
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self, name: str, help: str, window: int = 1024):
+        self.name = name
+        self.help = help
+        self._window = window
+        self._series: Dict[LabelSet, Tuple[List[float], Deque[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            totals, window = self._series.setdefault(key, ([0.0, 0.0], deque(maxlen=self._window)))
+            totals[0] += 1
+            totals[1] += value
+            window.append(value)
+
+    def quantile(self, q: float, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        with self._lock:
+            series = self._series.get(_labels(labels))
+            if not series or not series[1]:
+                return None
+            ordered = sorted(series[1])
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def count(self, labels: Optional[Dict[str, str]] = None) -> int:
+        series = self._series.get(_labels(labels))
+        return int(series[0][0]) if series else 0
+
+    def samples(self) -> List[Tuple[str, LabelSet, float]]:
+        out = []
+        with self._lock:
+            series = [(k, list(t), sorted(w)) for k, (t, w) in self._series.items()]
+        for key, (count, total), ordered in series:
+            for q in self.quantiles:
+                if ordered:
+                    value = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+                    out.append((self.name, key + (("quantile", str(q)),), value))
+            out.append((f"{self.name}_count", key, count))
+            out.append((f"{self.name}_sum", key, total))
+        return out
+
+
+class MetricsRegistry:
+    """Holds metrics by name so modules can share them without import cycles."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str, fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, help, fn=fn)
+
+    def summary(self, name: str, help: str) -> Summary:
+        return self._get_or_create(Summary, name, help)
+
+    def render(self) -> str:
+        """Render every registered metric in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide default registry
+registry = MetricsRegistry()
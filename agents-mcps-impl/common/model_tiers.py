@@ -0,0 +1,237 @@
+# =============================================================================
+# common/model_tiers.py
+# =============================================================================
+# Purpose:
+# Per-request model selection for the agents' LlmAgents.
+#
+# Every LLM call used to go to one hard-coded model, so a one-city weather
+# lookup paid the same latency as a multi-agent travel plan. TieredLlm is an
+# ADK model that picks one of several configured models for each call:
+# - tiers are ordered from the cheapest/fastest model to the most capable
+# - a complexity score (prompt length, multi-step wording, conversation and
+#   tool-loop length, number of tools) gives the target tier
+# - the task's remaining deadline (common.deadline) caps it: the largest tier
+#   at or below the target whose observed latency fits the budget is used
+# - a response that fails validation (empty, malformed or unknown function
+#   call, error) is retried on the next tier up ("escalation")
+#
+# Per-tier call counts and latencies, validation failures and escalations
+# are exported through common.metrics. With a ContextCache
+# (common.context_cache) the static prefix of each call is sent as a cached
+# content reference.
+# =============================================================================
+
+import logging
+import os
+import re
+import time
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+from common.context_cache import ContextCache
+from common.deadline import remaining_budget
+from common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Wording that usually means several steps or agents are needed
+_MULTI_STEP = re.compile(
+    r"\b(compare|comparison|versus|vs|plan|itinerary|then|after that|recommend|best|cheapest|and also|each)\b",
+    re.IGNORECASE,
+)
+
+# Finish reasons that mean the model did not produce a usable answer
+_BAD_FINISH = {
+    types.FinishReason.MALFORMED_FUNCTION_CALL,
+    types.FinishReason.MAX_TOKENS,
+    types.FinishReason.OTHER,
+}
+
+
+class ModelTier:
+    """One model and its observed latency."""
+
+    def __init__(self, model: str, expected_latency: float):
+        self.model = model
+        self.latency = expected_latency  # EWMA of call latency (seconds)
+        self.samples = 0
+
+    def observe(self, latency: float, alpha: float = 0.2) -> None:
+        self.latency = latency if not self.samples else (1 - alpha) * self.latency + alpha * latency
+        self.samples += 1
+
+
+def parse_tiers(spec: str) -> List[ModelTier]:
+    """
+    Parses "model[=seconds],model[=seconds],..." (cheapest first); `seconds`
+    is the expected latency of one call until real samples arrive
+    (default: 1s for the first tier, doubling per tier).
+    """
+    tiers = []
+    for index, item in enumerate(part.strip() for part in spec.split(",") if part.strip()):
+        model, _, latency = item.partition("=")
+        tiers.append(ModelTier(model.strip(), float(latency) if latency else float(2 ** index)))
+    return tiers
+
+
+def _user_text(llm_request: LlmRequest) -> str:
+    """Text of the latest user turn that has text (not a function response)."""
+    for content in reversed(llm_request.contents):
+        if content.role == "user" and content.parts:
+            text = " ".join(part.text for part in content.parts if part.text)
+            if text:
+                return text
+    return ""
+
+
+def complexity(llm_request: LlmRequest) -> int:
+    """A rough 0..6 score of how demanding the request is."""
+    words = len(_user_text(llm_request).split())
+    steps = len(_MULTI_STEP.findall(_user_text(llm_request)))
+    score = (words > 40) + (words > 150)
+    score += (steps >= 1) + (steps >= 3)
+    score += len(llm_request.contents) > 6  # long conversation or tool loop
+    score += len(llm_request.tools_dict) > 4
+    return score
+
+
+def validation_error(response: LlmResponse, llm_request: LlmRequest) -> Optional[str]:
+    """Why `response` is unusable, or None when it is fine."""
+    if response.error_code:
+        return f"error {response.error_code}"
+    if response.finish_reason in _BAD_FINISH:
+        return f"finish reason {response.finish_reason.name}"
+    parts = response.content.parts if response.content and response.content.parts else []
+    calls = [part.function_call for part in parts if part.function_call]
+    for call in calls:
+        if call.name not in llm_request.tools_dict:
+            return f"unknown tool {call.name}"
+    if not calls and not any(part.text and part.text.strip() for part in parts):
+        return "empty response"
+    return None
+
+
+class TieredLlm(BaseLlm):
+    """
+    An ADK model that routes every call to one of several model tiers.
+
+    `model` is the agent's default model name; ADK's request processors see
+    it, then each call is sent with the model of the selected tier.
+
+    Args:
+        model: Default model (used when no tier is configured).
+        agent: Agent name (metrics label).
+        tiers: Tiers, cheapest first.
+        slo: Latency objective of one LLM call (seconds) when the task has
+            no deadline; with a deadline the smaller of both applies.
+        step: Complexity points per tier.
+        llm_factory: Builds the model of a tier from its name.
+        context_cache: Caches the static prefix with the provider; None sends
+            it with every call.
+    """
+
+    agent: str
+    tiers: List[ModelTier]
+    slo: float = 10.0
+    step: int = 2
+    llm_factory: Callable[[str], BaseLlm] = LLMRegistry.new_llm
+    context_cache: Optional[ContextCache] = None
+
+    def model_post_init(self, context) -> None:
+        self._llms: Dict[str, BaseLlm] = {}
+        self._calls = registry.counter("llm_calls_total", "LLM calls per agent and model tier")
+        self._latency = registry.summary("llm_call_latency_seconds", "LLM call latency per model tier")
+        self._invalid = registry.counter("llm_validation_failures_total", "LLM responses that failed validation")
+        self._escalations = registry.counter("llm_escalations_total", "LLM calls retried on a larger model tier")
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return []
+
+    def _llm(self, model: str) -> BaseLlm:
+        llm = self._llms.get(model)
+        if llm is None:
+            llm = self._llms[model] = self.llm_factory(model)
+        return llm
+
+    def select(self, llm_request: LlmRequest) -> int:
+        """Index of the tier for this call."""
+        target = min(len(self.tiers) - 1, complexity(llm_request) // self.step)
+        budget = min(self.slo, remaining_budget(self.slo))
+        for index in range(target, 0, -1):
+            if self.tiers[index].latency <= budget:
+                return index
+        return 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        index = self.select(llm_request)
+        while True:
+            tier = self.tiers[index]
+            labels = {"agent": self.agent, "model": tier.model}
+            llm_request.model = tier.model
+            llm = self._llm(tier.model)
+            request = await self.context_cache.prepare(llm_request, llm) if self.context_cache else llm_request
+            started = time.monotonic()
+
+            if stream:
+                # Partial responses cannot be validated before they are passed on
+                async for response in llm.generate_content_async(request, stream=True):
+                    yield response
+                self._observe(tier, labels, started)
+                return
+
+            responses = [r async for r in llm.generate_content_async(request)]
+            self._observe(tier, labels, started)
+            reason = validation_error(responses[-1], llm_request) if responses else "no response"
+            if reason is None or index == len(self.tiers) - 1 or remaining_budget(self.slo) <= 0:
+                if reason is not None:
+                    self._invalid.inc(labels=labels)
+                for response in responses:
+                    yield response
+                return
+
+            self._invalid.inc(labels=labels)
+            self._escalations.inc(labels={**labels, "to": self.tiers[index + 1].model})
+            logger.info(f"{self.agent}: escalating from {tier.model} to {self.tiers[index + 1].model} ({reason})")
+            index += 1
+
+    def _observe(self, tier: ModelTier, labels: dict, started: float) -> None:
+        latency = time.monotonic() - started
+        tier.observe(latency)
+        self._calls.inc(labels=labels)
+        self._latency.observe(latency, labels)
+
+
+# Tier statistics and cache handles survive agent rebuilds (discovery changes rebuild the LlmAgent)
+_models: Dict[str, TieredLlm] = {}
+
+
+def tiered_model(agent: str, default: str) -> TieredLlm:
+    """
+    The model of `agent`, configured from the environment:
+    MODEL_TIERS_<AGENT> ("model[=seconds],...", cheapest first; default: the
+    agent's hard-coded model only), MODEL_LATENCY_SLO_<AGENT> (seconds per
+    call, default 10) and MODEL_TIER_STEP (complexity points per tier,
+    default 2). CONTEXT_CACHE=TRUE enables static-prefix caching
+    (see ContextCache.from_env).
+    """
+    model = _models.get(agent)
+    if model is None:
+        key = agent.upper()
+        tiers = parse_tiers(os.environ.get(f"MODEL_TIERS_{key}", "")) or [ModelTier(default, 1.0)]
+        model = _models[agent] = TieredLlm(
+            model=default,
+            agent=agent,
+            tiers=tiers,
+            slo=float(os.environ.get(f"MODEL_LATENCY_SLO_{key}", 10)),
+            step=int(os.environ.get("MODEL_TIER_STEP", 2)),
+            context_cache=ContextCache.from_env(agent),
+        )
+    return model
@@ -0,0 +1,79 @@
+# =============================================================================
+# common/payload.py
+# =============================================================================
+# Purpose:
+# Serializes tool results for the LLM. Tool responses end up verbatim in the
+# model context, so instead of one JSON object per item (repeating every key)
+# records are rendered once, at the edge, as a pipe-separated table:
+#
+#     location|country|temp_c|condition
+#     Paris|France|18.3|Sunny
+#     Tokyo|Japan|24.1|Cloudy
+#
+# Records are NamedTuples; callers may select which fields are included.
+# =============================================================================
+
+import re
+from typing import Any, Iterable, List, Optional, Sequence
+
+SEPARATOR = "|"
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def select_fields(available: Sequence[str], requested: Optional[Iterable[str]], default: Sequence[str] = None) -> List[str]:
+    """
+    Resolve the fields to serialize.
+
+    Args:
+        available: Fields the record type has.
+        requested: Fields asked for by the caller (unknown names are ignored).
+        default: Fields used when nothing valid was requested (all when omitted).
+
+    Returns:
+        The selected field names, in the order they were requested.
+    """
+    if requested:
+        lookup = {f.lower(): f for f in available}
+        selected = [lookup[f.strip().lower()] for f in requested if f.strip().lower() in lookup]
+        if selected:
+            return list(dict.fromkeys(selected))
+    return list(default or available)
+
+
+def format_value(value: Any) -> str:
+    """Formats one cell: floats without trailing zeros, sequences comma-joined."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:g}"
+    if isinstance(value, (list, tuple)):
+        return ", ".join(format_value(v) for v in value)
+    return str(value).replace(SEPARATOR, "/").replace("\n", " ")
+
+
+def to_table(records: Sequence[Any], fields: Sequence[str]) -> str:
+    """Renders NamedTuple records as a header line plus one line per record."""
+    lines = [SEPARATOR.join(fields)]
+    for record in records:
+        lines.append(SEPARATOR.join(format_value(getattr(record, f)) for f in fields))
+    return "\n".join(lines)
+
+
+def to_compact_dict(record: Any, fields: Sequence[str]) -> dict:
+    """Renders one NamedTuple record as a dict of its non-empty selected fields."""
+    compact = {}
+    for f in fields:
+        value = getattr(record, f)
+        if value in (None, "", ()):
+            continue
+        compact[f] = format_value(value) if isinstance(value, (list, tuple)) else value
+    return compact
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count: words and punctuation marks. Close enough to BPE
+    tokenizers to compare payload formats without a model-specific tokenizer.
+    """
+    return len(_TOKEN_RE.findall(text))
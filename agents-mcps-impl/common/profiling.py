@@ -0,0 +1,203 @@
+# =============================================================================
+# common/profiling.py
+# =============================================================================
+# Purpose:
+# Production debugging of the asyncio servers (A2A agents, currency MCP).
+#
+# - LoopStallMonitor (always on): a heartbeat coroutine ticks every 50ms and a
+#   watchdog thread checks it. When the loop has not ticked for longer than
+#   the threshold, the watchdog logs the stack of the loop thread, i.e. of
+#   the code blocking it (a sync HTTP call, CPU-bound parsing...). It also
+#   exports loop lag and stall metrics. Idle cost: one timer per tick.
+# - SamplingProfiler (on demand): `GET /debug/profile?seconds=N` samples the
+#   stacks of every thread for N seconds and returns them in collapsed-stack
+#   format ("frame;frame;frame count" lines), ready for flamegraph.pl or
+#   speedscope. Nothing runs between requests. The endpoint needs
+#   `Authorization: Bearer $DEBUG_TOKEN` and is disabled without DEBUG_TOKEN.
+# =============================================================================
+
+import asyncio
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+from common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of one profiling run (seconds)
+MAX_PROFILE_SECONDS = 60.0
+
+
+# -----------------------------------------------------------------------------
+# Sampling profiler
+# -----------------------------------------------------------------------------
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every other thread at a fixed interval.
+
+    Args:
+        interval: Seconds between samples.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+
+    def run(self, duration: float) -> Counter:
+        """Samples for `duration` seconds (blocking); returns sample counts per collapsed stack."""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        counts: Counter = Counter()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+        return counts
+
+    @staticmethod
+    def collapse(counts: Counter) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+# -----------------------------------------------------------------------------
+# Event-loop stall monitor
+# -----------------------------------------------------------------------------
+
+class LoopStallMonitor:
+    """
+    Detects code blocking the event loop and logs what it was doing.
+
+    Args:
+        threshold: Seconds without a heartbeat that count as a stall.
+        interval: Heartbeat period (seconds).
+        name: Server name (metrics label).
+    """
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.05, name: str = "server"):
+        self.threshold = threshold
+        self.interval = interval
+        self._labels = {"server": name}
+        self._loop_thread: Optional[int] = None
+        self._last_beat = 0.0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._lag = registry.gauge("event_loop_lag_seconds", "Delay of the last event-loop heartbeat")
+        self._stalls = registry.counter("event_loop_stalls_total", "Event-loop stalls over the threshold")
+        self._stall_seconds = registry.summary("event_loop_stall_seconds", "Duration of event-loop stalls")
+
+    @classmethod
+    def from_env(cls, name: str = "server") -> Optional["LoopStallMonitor"]:
+        """Builds a monitor from LOOP_STALL_THRESHOLD_MS (default 250; 0 disables it)."""
+        threshold_ms = float(os.environ.get("LOOP_STALL_THRESHOLD_MS", 250))
+        return cls(threshold=threshold_ms / 1000, name=name) if threshold_ms > 0 else None
+
+    def start(self) -> None:
+        """Starts monitoring the running loop; call from the loop (e.g. a startup handler)."""
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-stall-monitor", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            self._lag.set(max(0.0, now - expected), self._labels)
+
+    def _watch(self) -> None:
+        stall_started = None
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat
+            if blocked > self.threshold and stall_started != beat:
+                # First check past the threshold for this stall: capture the culprit
+                stall_started = beat
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+                self._stalls.inc(labels=self._labels)
+                logger.warning(f"Event loop blocked for {blocked * 1000:.0f}ms so far, by:\n{stack}")
+            elif stall_started is not None and beat != stall_started:
+                stalled = beat - stall_started
+                self._stall_seconds.observe(stalled, self._labels)
+                logger.warning(f"Event loop resumed after a {stalled * 1000:.0f}ms stall")
+                stall_started = None
+
+
+# -----------------------------------------------------------------------------
+# Debug endpoints
+# -----------------------------------------------------------------------------
+
+class _ProfileEndpoint:
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self._busy = threading.Lock()
+
+    def _authorized(self, request: Request) -> bool:
+        header = request.headers.get("authorization", "")
+        return bool(self.token) and hmac.compare_digest(header, f"Bearer {self.token}")
+
+    async def handle(self, request: Request) -> Response:
+        if not self.token:
+            return PlainTextResponse("Profiling is disabled (no DEBUG_TOKEN)", status_code=404)
+        if not self._authorized(request):
+            return PlainTextResponse("Unauthorized", status_code=401)
+        try:
+            seconds = min(MAX_PROFILE_SECONDS, float(request.query_params.get("seconds", 10)))
+            interval = float(request.query_params.get("interval_ms", 5)) / 1000
+        except ValueError:
+            return PlainTextResponse("seconds and interval_ms must be numbers", status_code=400)
+        if not self._busy.acquire(blocking=False):
+            return PlainTextResponse("A profile is already running", status_code=409)
+        try:
+            # The sampler runs on a worker thread so the loop keeps serving (and gets sampled)
+            counts = await asyncio.to_thread(SamplingProfiler(max(interval, 0.001)).run, seconds)
+        finally:
+            self._busy.release()
+        return PlainTextResponse(
+            SamplingProfiler.collapse(counts),
+            headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+        )
+
+
+def install_debug_endpoints(app, name: str) -> Optional[LoopStallMonitor]:
+    """
+    Adds `GET /debug/profile` to a Starlette app and runs a LoopStallMonitor
+    (configured from the environment) while the app is up.
+    """
+    app.add_route("/debug/profile", _ProfileEndpoint(os.environ.get("DEBUG_TOKEN")).handle, methods=["GET"])
+    monitor = LoopStallMonitor.from_env(name=name)
+    if monitor is not None:
+        app.add_event_handler("startup", monitor.start)
+        app.add_event_handler("shutdown", monitor.stop)
+    return monitor
@@ -0,0 +1,549 @@
+# =============================================================================
+# common/quota.py
+# =============================================================================
+# Purpose:
+# Cluster-wide request quota for paid upstreams (weatherapi.com). The API
+# key's quota is shared by every replica of the weather agent, so no replica
+# can stay under it by throttling only itself. QuotaScheduler:
+# - draws tokens from one token bucket shared by all replicas, kept in Consul
+#   KV and updated with check-and-set (or in process, for a single replica).
+#   Waiting calls reserve their token ahead, in batches, and sleep until it
+#   is due, so the store is not polled and calls are served in order
+#   across the cluster
+# - queues calls until a token is available instead of failing them, in
+#   priority order: interactive lookups first; background refreshes only use
+#   tokens while the shared bucket holds more than a reserve
+# - gives up on a call only once its deadline (common.deadline) can no
+#   longer be met
+# - takes feedback from the upstream: a 429 pauses the whole cluster for
+#   Retry-After and cuts the shared rate, which then recovers linearly
+#
+# Usage:
+#     weather_api = upstream("weatherapi", quota=QuotaScheduler.from_env("weatherapi"))
+#     with quota_priority(BACKGROUND):
+#         response = await weather_api.get(url, params=params)
+# =============================================================================
+
+import asyncio
+import base64
+import bisect
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from common.metrics import registry
+from common.resilience import UpstreamError
+
+logger = logging.getLogger(__name__)
+
+# Call priorities; lower values are served first
+INTERACTIVE, BACKGROUND = 0, 1
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Units accepted by parse_rate, in seconds
+_RATE_UNITS = {"s": 1, "sec": 1, "second": 1, "min": 60, "minute": 60, "h": 3600, "hour": 3600,
+               "d": 86400, "day": 86400, "month": 30 * 86400}
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("upstream_quota_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def quota_priority(priority: int) -> Iterator[None]:
+    """Makes the upstream calls of the block queue at `priority` (INTERACTIVE or BACKGROUND)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_rate(text: str) -> float:
+    """Calls per second from "10", "600/min", "5000/day" or "1000000/month"."""
+    match = re.fullmatch(r"\s*([0-9.]+)\s*(?:/\s*([a-z]+?)s?)?\s*", text.lower())
+    if not match or (match.group(2) and match.group(2) not in _RATE_UNITS):
+        raise ValueError(f"Invalid rate '{text}', expected e.g. '10', '600/min' or '1000000/month'")
+    return float(match.group(1)) / _RATE_UNITS[match.group(2) or "s"]
+
+
+# -----------------------------------------------------------------------------
+# Errors
+# -----------------------------------------------------------------------------
+
+class QuotaTimeoutError(UpstreamError):
+    """Raised when no quota token could be obtained within the call's deadline."""
+
+
+class QuotaStoreError(Exception):
+    """Raised when the shared bucket could not be read or updated."""
+
+
+# -----------------------------------------------------------------------------
+# Shared bucket stores
+# -----------------------------------------------------------------------------
+
+class LocalQuotaStore:
+    """Bucket state kept in process: a single replica, or no store configured."""
+
+    def __init__(self):
+        self._states: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    async def update(self, key: str, change: Callable[[dict], Any]) -> Any:
+        """Applies `change` (which edits the state in place) atomically; returns its result."""
+        with self._lock:
+            return change(self._states.setdefault(key, {}))
+
+
+class ConsulQuotaStore:
+    """
+    Bucket state in Consul KV, as one JSON value per upstream, updated with
+    check-and-set (`?cas=<ModifyIndex>`) so concurrent replicas never lose
+    each other's updates.
+
+    Args:
+        address: Consul HTTP API base URL.
+        token: ACL token (X-Consul-Token), if any.
+        prefix: KV prefix of the bucket keys.
+        timeout: Per-request timeout (seconds).
+        max_attempts: Check-and-set attempts before giving up on contention.
+        transport: Optional httpx transport (used by benchmarks with a fake Consul).
+    """
+
+    def __init__(self, address: str, token: str = None, prefix: str = "quota/", timeout: float = 0.5,
+                 max_attempts: int = 8, transport: httpx.AsyncBaseTransport = None):
+        self.address = address.rstrip("/")
+        self.prefix = prefix
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self._headers = {"X-Consul-Token": token} if token else {}
+        self._transport = transport
+        # httpx clients are bound to the event loop they were first used on
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "ConsulQuotaStore":
+        """`consul://host:8500[/prefix/]` (`consuls://` for HTTPS); the token comes from CONSUL_HTTP_TOKEN."""
+        parsed = urlparse(url)
+        scheme = "https" if parsed.scheme == "consuls" else "http"
+        prefix = parsed.path.strip("/")
+        return cls(
+            f"{scheme}://{parsed.hostname or '127.0.0.1'}:{parsed.port or 8500}",
+            token=os.environ.get("CONSUL_HTTP_TOKEN") or None,
+            prefix=f"{prefix}/" if prefix else "quota/",
+            **kwargs,
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        loop_id = id(asyncio.get_running_loop())
+        client = self._clients.get(loop_id)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(transport=self._transport, headers=self._headers, timeout=self.timeout)
+            self._clients[loop_id] = client
+        return client
+
+    async def update(self, key: str, change: Callable[[dict], Any]) -> Any:
+        url = f"{self.address}/v1/kv/{self.prefix}{key}"
+        for attempt in range(self.max_attempts):
+            response = await self._client().get(url)
+            if response.status_code == 404:
+                index, state = 0, {}
+            else:
+                response.raise_for_status()
+                entry = response.json()[0]
+                index, state = entry["ModifyIndex"], json.loads(base64.b64decode(entry["Value"] or b"e30="))
+            result = change(state)
+            written = await self._client().put(url, params={"cas": index}, content=json.dumps(state))
+            written.raise_for_status()
+            if written.text.strip() == "true":
+                return result
+            # Another replica updated the bucket in between; retry on its state
+            await asyncio.sleep(random.uniform(0, 0.002 * 2 ** attempt))
+        raise QuotaStoreError(f"Bucket '{key}' is contended, gave up after {self.max_attempts} attempts")
+
+
+_stores: Dict[str, Any] = {}
+
+
+def store_from_url(url: str):
+    """The store of QUOTA_STORE_URL: `consul://host:8500`, or in process when empty."""
+    store = _stores.get(url)
+    if store is None:
+        if not url:
+            store = LocalQuotaStore()
+        elif urlparse(url).scheme in ("consul", "consuls"):
+            store = ConsulQuotaStore.from_url(url)
+        else:
+            raise ValueError(f"Unsupported quota store URL '{url}', expected consul://host:port")
+        _stores[url] = store
+    return store
+
+
+# -----------------------------------------------------------------------------
+# QuotaScheduler
+# -----------------------------------------------------------------------------
+
+class _Ticket:
+    """A call waiting for quota; ordered by priority, then arrival."""
+
+    __slots__ = ("priority", "seq", "loop", "expires", "slot", "rejected", "wakeup")
+
+    def __init__(self, priority: int, seq: int, loop: asyncio.AbstractEventLoop, expires: float):
+        self.priority = priority
+        self.seq = seq
+        self.loop = loop
+        self.expires = expires  # wall clock
+        self.slot: Optional[float] = None  # wall-clock time the call may be made at
+        self.rejected = False
+        self.wakeup: Optional[asyncio.Future] = None
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def wake(self) -> None:
+        if self.wakeup is not None and not self.wakeup.done():
+            self.loop.call_soon_threadsafe(_resolve, self.wakeup)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class QuotaScheduler:
+    """
+    Token-bucket quota for one upstream, shared by every replica through `store`.
+
+    Interactive calls reserve their token ahead: the shared bucket may go
+    into debt, and each call is given the time its token will have been
+    refilled (its slot), so waiting calls are served first come, first served
+    across the cluster with one store update per batch. A call whose slot
+    would be after its deadline is rejected right away. Background calls only
+    take tokens that are available now, above the reserve.
+
+    Thread-safe: calls may wait on several event loops at once (the weather
+    refresher runs on its own thread).
+
+    Args:
+        name: Upstream name; also the bucket's key in the store.
+        rate: Calls per second allowed across all replicas (the plan's limit).
+        burst: Bucket capacity (default: one second of calls).
+        headroom: Fraction of `rate` and `burst` left unused, so clock skew and
+            network jitter do not push calls over the upstream's own limit.
+        store: Where the bucket lives (default: in process).
+        reserve: Fraction of the bucket background calls leave to interactive ones.
+        max_lease: Most calls one store update reserves for (default: a quarter of the bucket).
+        recovery: Seconds for the rate to grow back to `rate` after a 429.
+        backoff: Factor the shared rate is cut by on a 429.
+        default_pause: Pause after a 429 without Retry-After (seconds).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float = None,
+        headroom: float = 0.05,
+        store=None,
+        reserve: float = 0.25,
+        max_lease: int = None,
+        recovery: float = 30.0,
+        backoff: float = 0.8,
+        default_pause: float = 1.0,
+    ):
+        self.name = name
+        self.rate = rate * (1 - headroom)
+        self.burst = max(1.0, (burst if burst is not None else rate) * (1 - headroom))
+        self.store = store or LocalQuotaStore()
+        self.reserve = reserve * self.burst
+        self.max_lease = max_lease or max(1, int(self.burst // 4))
+        self.recovery = recovery
+        self.backoff = backoff
+        self.default_pause = default_pause
+        self.shared_rate = self.rate  # effective rate, as last seen in the store
+
+        self._queue: List[_Ticket] = []  # calls without a slot yet
+        self._sleeping = set()  # calls waiting for their slot
+        self._spare: List[float] = []  # heap of slots reserved for calls that left
+        self._paused_until = 0.0
+        self._seq = itertools.count()
+        self._leasing = False
+        self._lock = threading.Lock()
+        self._fallback: Optional[LocalQuotaStore] = None
+
+        self._labels = {"upstream": name}
+        self._waited = registry.summary("upstream_quota_wait_seconds", "Time calls waited for an upstream quota token")
+        self._rejected = registry.counter("upstream_quota_rejected_total", "Calls that could not get quota before their deadline")
+        self._throttled = registry.counter("upstream_quota_throttled_total", "429 responses fed back into the quota")
+        self._store_errors = registry.counter("upstream_quota_store_errors_total", "Failed updates of the shared bucket")
+        self._waiting = registry.gauge("upstream_quota_waiting", "Calls waiting for an upstream quota token")
+        self._rate_gauge = registry.gauge("upstream_quota_rate", "Effective shared upstream rate (calls per second)")
+        self._rate_gauge.set(self.rate, self._labels)
+
+    @classmethod
+    def from_env(cls, name: str, **kwargs) -> Optional["QuotaScheduler"]:
+        """
+        A scheduler for UPSTREAM_QUOTA_<NAME> (e.g. "10", "600/min",
+        "1000000/month"; unset: no quota) with a bucket of
+        UPSTREAM_QUOTA_BURST_<NAME> calls, shared through QUOTA_STORE_URL
+        (`consul://host:8500`; unset: this replica only).
+        """
+        quota = os.environ.get(f"UPSTREAM_QUOTA_{name.upper()}")
+        if not quota:
+            return None
+        burst = os.environ.get(f"UPSTREAM_QUOTA_BURST_{name.upper()}")
+        return cls(
+            name,
+            rate=parse_rate(quota),
+            burst=float(burst) if burst else None,
+            store=store_from_url(os.environ.get("QUOTA_STORE_URL", "")),
+            **kwargs,
+        )
+
+    # -- shared bucket --------------------------------------------------------
+
+    def _current_rate(self, state: dict, now: float) -> float:
+        """The shared rate: cut after a 429, growing back linearly over `recovery` seconds."""
+        rate = state.get("rate", self.rate)
+        if rate < self.rate:
+            rate = min(self.rate, rate + self.rate * max(0.0, now - state.get("throttled_at", now)) / self.recovery)
+        return rate
+
+    def _refill(self, state: dict, now: float) -> float:
+        rate = self._current_rate(state, now)
+        elapsed = max(0.0, now - state.get("updated", now))  # clocks of different hosts may disagree slightly
+        state["tokens"] = min(self.burst, state.get("tokens", self.burst) + elapsed * rate)
+        state["updated"] = now
+        return rate
+
+    def _reserve(self, state: dict, expires: List[float], keep: float) -> Tuple[List[Optional[float]], float, float, float]:
+        """
+        Reserves a slot per waiting call (`expires`: their deadlines), leaving
+        `keep` tokens when it is not 0 (background calls, no debt).
+
+        Returns:
+            (slots, None where there is none in time; seconds before a retry
+            can succeed; the shared rate; the time the cluster is paused until)
+        """
+        now = time.time()
+        rate = self._refill(state, now)
+        paused_until = state.get("paused_until", 0.0)
+        slots: List[Optional[float]] = []
+        for expiry in expires:
+            slot = max(now, paused_until, now + (1 - state["tokens"]) / rate)
+            if slot <= expiry and (not keep or (slot == now and state["tokens"] - keep >= 1)):
+                state["tokens"] -= 1
+                slots.append(slot)
+            else:
+                slots.append(None)
+        retry_in = max(0.0, paused_until - now, (keep + 1 - state["tokens"]) / rate)
+        return slots, retry_in, rate, paused_until
+
+    def _throttle(self, state: dict, pause: float) -> Tuple[float, float]:
+        now = time.time()
+        rate = self._refill(state, now)
+        if state.get("throttled_at", 0.0) < now - pause:
+            # One cut per pause window, however many replicas saw the 429
+            rate = state["rate"] = max(self.rate * 0.05, rate * self.backoff)
+            state["throttled_at"] = now
+        paused_until = max(state.get("paused_until", 0.0), now + pause)
+        # Slots reserved from now on start after the pause (and after those already handed out)
+        state["tokens"] = min(state["tokens"], 0.0) - (paused_until - max(now, state.get("paused_until", 0.0))) * rate
+        state["paused_until"] = paused_until
+        return rate, paused_until
+
+    async def _update(self, change: Callable[[dict], Any]) -> Any:
+        """Updates the shared bucket; while the store fails, this replica keeps its own bucket."""
+        try:
+            result = await self.store.update(self.name, change)
+        except (httpx.HTTPError, QuotaStoreError, ValueError, KeyError, IndexError) as e:
+            self._store_errors.inc(labels=self._labels)
+            if self._fallback is None:
+                logger.warning(f"Quota store unavailable for '{self.name}', using a local bucket: {e}")
+                self._fallback = LocalQuotaStore()
+            return await self._fallback.update(self.name, change)
+        if self._fallback is not None:
+            logger.info(f"Quota store for '{self.name}' is back")
+            self._fallback = None
+        return result
+
+    # -- local queue (hold the lock) ------------------------------------------
+
+    def _publish(self) -> None:
+        self._waiting.set(len(self._queue) + len(self._sleeping), self._labels)
+
+    def _wake_queue(self) -> None:
+        for ticket in self._queue:
+            ticket.wake()
+
+    def _assign(self, ticket: _Ticket, slot: float) -> None:
+        ticket.slot = slot
+        self._queue.remove(ticket)
+        self._sleeping.add(ticket)
+
+    def _give_back(self, slot: float) -> None:
+        """Keeps a reserved but unused slot for the next call (at most a bucket's worth)."""
+        heapq.heappush(self._spare, slot)
+        if len(self._spare) > self.burst:
+            heapq.heappop(self._spare)
+        self._wake_queue()
+
+    def _pause(self, until: float) -> None:
+        """Moves the slots handed out before a pause to after it, keeping their spacing."""
+        shift = until - max(self._paused_until, time.time())
+        if shift <= 0:
+            return
+        self._paused_until = until
+        for ticket in self._sleeping:
+            ticket.slot += shift
+            ticket.wake()
+        self._spare = [slot + shift for slot in self._spare]
+
+    # -- waiting --------------------------------------------------------------
+
+    async def _lease(self, batch: List[_Ticket], priority: int) -> float:
+        """Reserves slots for `batch` in the shared bucket; returns the seconds before a retry can succeed."""
+        keep = 0.0 if priority == INTERACTIVE else self.reserve
+        slots: List[Optional[float]] = []
+        retry_in = 0.0
+        try:
+            slots, retry_in, self.shared_rate, paused_until = await self._update(
+                lambda state: self._reserve(state, [t.expires for t in batch], keep))
+        finally:
+            with self._lock:
+                self._leasing = False
+                if slots:
+                    self._pause(paused_until)  # before assigning: new slots already respect the pause
+                for ticket, slot in zip(batch, slots):
+                    if slot is None:
+                        if not keep and ticket in self._queue:
+                            # Not in time even when reserving ahead: give up now rather than at the deadline
+                            ticket.rejected = True
+                            self._queue.remove(ticket)
+                    elif ticket in self._queue:
+                        self._assign(ticket, slot)
+                    else:
+                        self._give_back(slot)
+                    ticket.wake()
+                self._wake_queue()  # a new head may have to lease
+                self._publish()
+        self._rate_gauge.set(self.shared_rate, self._labels)
+        return retry_in
+
+    async def acquire(self, timeout: float, priority: Optional[int] = None) -> None:
+        """
+        Waits for a token to make one upstream call.
+
+        Args:
+            timeout: Seconds the call can wait (its remaining budget).
+            priority: INTERACTIVE or BACKGROUND; defaults to the block's quota_priority.
+
+        Raises:
+            QuotaTimeoutError: No token in time (raised as soon as that is certain).
+        """
+        priority = _priority.get() if priority is None else priority
+        labels = {**self._labels, "priority": _PRIORITY_NAMES.get(priority, str(priority))}
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        ticket = _Ticket(priority, next(self._seq), loop, time.time() + timeout)
+        used = False
+        with self._lock:
+            bisect.insort(self._queue, ticket)
+            self._publish()
+        try:
+            # 1. Get a slot: a spare one, or reserved by the call at the head of the queue
+            while ticket.slot is None and not ticket.rejected:
+                with self._lock:
+                    if ticket.slot is not None or ticket.rejected:
+                        continue
+                    head = self._queue[0] is ticket
+                    if head and self._spare and self._spare[0] <= ticket.expires:
+                        self._assign(ticket, heapq.heappop(self._spare))
+                        continue
+                    lead = head and not self._leasing
+                    if lead:
+                        self._leasing = True
+                        batch = [t for t in self._queue if t.priority == priority][:self.max_lease]
+                    else:
+                        ticket.wakeup = loop.create_future()
+                remaining = ticket.expires - time.time()
+                if lead:
+                    retry_in = await self._lease(batch, priority)
+                    if ticket.slot is not None or ticket.rejected:
+                        continue
+                    with self._lock:
+                        ticket.wakeup = loop.create_future()
+                    wait = min(retry_in, remaining)
+                else:
+                    wait = remaining
+                if remaining <= 0:
+                    ticket.rejected = True
+                    break
+                await asyncio.wait([ticket.wakeup], timeout=wait)
+
+            # 2. Wait for the slot (moved back if the upstream asks for a pause meanwhile)
+            while not ticket.rejected:
+                with self._lock:
+                    delay = ticket.slot - time.time()
+                    if ticket.slot > ticket.expires:
+                        ticket.rejected = True
+                        break
+                    if delay <= 0:
+                        used = True
+                        break
+                    ticket.wakeup = loop.create_future()
+                await asyncio.wait([ticket.wakeup], timeout=delay)
+        finally:
+            with self._lock:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    self._wake_queue()
+                self._sleeping.discard(ticket)
+                if ticket.slot is not None and not used:
+                    self._give_back(ticket.slot)
+                self._publish()
+
+        if used:
+            self._waited.observe(time.monotonic() - started, labels)
+            return
+        self._rejected.inc(labels=labels)
+        raise QuotaTimeoutError(f"No quota for upstream '{self.name}' within {timeout:.2f}s")
+
+    def try_acquire(self) -> bool:
+        """Takes a spare token that is due now if no call is waiting for one (e.g. for hedged calls)."""
+        with self._lock:
+            if self._spare and not self._queue and self._spare[0] <= time.time():
+                heapq.heappop(self._spare)
+                return True
+            return False
+
+    def release(self) -> None:
+        """Returns an unused token (the call was not made after all)."""
+        with self._lock:
+            self._give_back(time.time())
+
+    async def throttled(self, retry_after: Optional[float] = None) -> None:
+        """
+        Feeds a 429 back: every replica pauses for `retry_after` seconds (or
+        `default_pause`), and the shared rate is cut by `backoff`.
+        """
+        pause = retry_after if retry_after is not None else self.default_pause
+        self._throttled.inc(labels=self._labels)
+        with self._lock:
+            self._pause(time.time() + pause)
+        self.shared_rate, paused_until = await self._update(lambda state: self._throttle(state, pause))
+        with self._lock:
+            self._pause(paused_until)
+        self._rate_gauge.set(self.shared_rate, self._labels)
+        logger.warning(f"Upstream '{self.name}' throttled: pausing {pause:.1f}s, rate now {self.shared_rate:.2f}/s")
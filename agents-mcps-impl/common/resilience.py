@@ -0,0 +1,362 @@
+# =============================================================================
+# common/resilience.py
+# =============================================================================
+# Purpose:
+# A shared resilience layer for the HTTP upstreams that tools depend on
+# (weatherapi.com, frankfurter.app, ...). One slow upstream must not stall an
+# entire orchestrated answer, so every call:
+# - is bounded by the deadline of the incoming A2A task (common.deadline)
+# - is retried with jittered exponential backoff (idempotent GETs only)
+# - is hedged: a second attempt fires once the first exceeds the upstream's
+#   observed p95 latency, and whichever answers first wins
+# - goes through a per-upstream circuit breaker
+# - optionally waits for a token of the upstream's cluster-wide quota
+#   (common.quota), which 429 responses feed back into
+#
+# Usage:
+#     weather_api = upstream("weatherapi")
+#     response = await weather_api.get(url, params=params)
+# =============================================================================
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+from common.deadline import remaining_budget
+from common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: throttling and transient server-side failures
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+# -----------------------------------------------------------------------------
+# Errors
+# -----------------------------------------------------------------------------
+
+class UpstreamError(Exception):
+    """Base class for failures raised by the resilience layer."""
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling the upstream while its circuit breaker is open."""
+
+
+class DeadlineExceededError(UpstreamError):
+    """Raised when the time budget ran out before the upstream answered."""
+
+
+# -----------------------------------------------------------------------------
+# Building blocks
+# -----------------------------------------------------------------------------
+
+class LatencyTracker:
+    """Sliding window of successful call latencies, used to pick the hedge delay."""
+
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns the q-quantile, or None until enough samples were seen."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail fast for `reset_timeout` seconds. Then a single trial call is
+    let through (half-open); success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_in_flight = False
+        self.state = self.CLOSED
+
+    def release(self) -> None:
+        """
+        Ends a call that got no outcome (cancelled, or an unexpected error),
+        so a half-open breaker lets the next call be its trial.
+        """
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit opened after {self._failures} consecutive failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+# -----------------------------------------------------------------------------
+# UpstreamClient
+# -----------------------------------------------------------------------------
+
+class UpstreamClient:
+    """
+    Resilient HTTP GET client for one named upstream.
+
+    Args:
+        name: Upstream name, used for metrics and logs.
+        timeout: Per-call budget (seconds) when no task deadline is tighter.
+        retry: Retry policy for transport errors and RETRYABLE_STATUS.
+        breaker: Circuit breaker shared by all calls to this upstream.
+        hedge: Whether to fire a hedged second attempt after the p95 latency.
+        hedge_quantile: Latency quantile used as hedge delay.
+        quota: Optional common.quota.QuotaScheduler every attempt takes a token from.
+        transport: Optional httpx transport (used by benchmarks with fake upstreams).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = 10.0,
+        retry: RetryPolicy = None,
+        breaker: CircuitBreaker = None,
+        hedge: bool = True,
+        hedge_quantile: float = 0.95,
+        quota=None,
+        transport: httpx.AsyncBaseTransport = None,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.quota = quota
+        self.latency = LatencyTracker()
+        self._transport = transport
+        # httpx clients are bound to the event loop they were first used on
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+
+        self._labels = {"upstream": name}
+        self._calls = registry.counter("upstream_calls_total", "Upstream call outcomes")
+        self._hedges = registry.counter("upstream_hedged_total", "Hedged attempts fired")
+        self._latency_metric = registry.summary("upstream_latency_seconds", "Upstream call latency")
+
+    def _client(self) -> httpx.AsyncClient:
+        loop_id = id(asyncio.get_running_loop())
+        client = self._clients.get(loop_id)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(transport=self._transport)
+            self._clients[loop_id] = client
+        return client
+
+    def _budget(self, started: float) -> float:
+        """Seconds left: the per-call timeout minus the time spent since `started`, capped by the task deadline."""
+        return remaining_budget(self.timeout - (time.monotonic() - started))
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while latency is still unknown."""
+        if not self.hedge:
+            return None
+        return self.latency.quantile(self.hedge_quantile)
+
+    async def _attempt(self, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]],
+                       timeout: float) -> httpx.Response:
+        started = time.monotonic()
+        response = await self._client().get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code < 500 and response.status_code != 429:
+            self.latency.record(time.monotonic() - started)
+        return response
+
+    async def _hedged(self, url: str, params, headers, budget: float) -> httpx.Response:
+        """Runs one logical attempt, racing a hedged duplicate if the first is slow."""
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._attempt(url, params, headers, budget))
+        pending = {primary}
+        try:
+            delay = self.hedge_delay()
+            if delay is None or delay >= budget:
+                return await primary
+
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            if self.quota is not None and not self.quota.try_acquire():
+                # A hedge costs quota too; only spend a token nobody is waiting for
+                return await primary
+
+            self._hedges.inc(labels=self._labels)
+            hedge = asyncio.ensure_future(self._attempt(url, params, headers, max(0.001, budget - delay)))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge and primary in pending:
+                            # The primary is cancelled below and never records itself:
+                            # count its elapsed time as a lower bound, or the slow
+                            # calls drop out of the window and the hedge delay shrinks
+                            self.latency.record(time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None) -> httpx.Response:
+        """
+        Performs a resilient GET.
+
+        Returns:
+            httpx.Response: The first non-retryable response (including 4xx).
+
+        Raises:
+            CircuitOpenError: The upstream's breaker is open.
+            QuotaTimeoutError: No quota token within the budget (common.quota).
+            DeadlineExceededError: The budget ran out before a usable answer.
+            httpx.HTTPError: The last transport error once retries are exhausted.
+        """
+        last_error: Optional[BaseException] = None
+        response: Optional[httpx.Response] = None
+        started = time.monotonic()
+
+        for attempt in range(1, self.retry.max_attempts + 1):
+            budget = self._budget(started)
+            if budget <= 0:
+                break
+            if self.quota is not None:
+                try:
+                    # Leave time for the call itself, or the token is wasted on a timeout
+                    await self.quota.acquire(budget - (self.latency.quantile(0.5) or 0.0))
+                except UpstreamError:
+                    if response is not None:
+                        break
+                    self._calls.inc(labels={**self._labels, "outcome": "quota_timeout"})
+                    raise
+                budget = self._budget(started)
+            if not self.breaker.allow():
+                if self.quota is not None:
+                    self.quota.release()
+                self._calls.inc(labels={**self._labels, "outcome": "circuit_open"})
+                raise CircuitOpenError(f"Circuit for upstream '{self.name}' is open")
+
+            try:
+                response = await asyncio.wait_for(self._hedged(url, params, headers, budget), budget)
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                last_error = e
+                response = None
+                self.breaker.record_failure()
+            except BaseException:
+                # Cancelled by the caller or failed unexpectedly: a half-open
+                # trial must not stay in flight forever
+                self.breaker.release()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    # 4xx answers are the upstream working as intended
+                    self.breaker.record_success()
+                    self._calls.inc(labels={**self._labels, "outcome": "ok"})
+                    self._latency_metric.observe(time.monotonic() - started, self._labels)
+                    return response
+                if response.status_code == 429:
+                    # Throttled: the upstream is healthy, just busy
+                    self.breaker.record_success()
+                    if self.quota is not None:
+                        retry_after = response.headers.get("Retry-After", "")
+                        await self.quota.throttled(float(retry_after) if retry_after.isdigit() else None)
+                else:
+                    self.breaker.record_failure()
+
+            if attempt < self.retry.max_attempts:
+                delay = self.retry.backoff(attempt)
+                if response is not None and response.headers.get("Retry-After", "").isdigit():
+                    delay = max(delay, float(response.headers["Retry-After"]))
+                if delay >= self._budget(started):
+                    break
+                if self.quota is not None and response is not None and response.status_code == 429:
+                    # The quota holds the retry back until the pause is over
+                    logger.info(f"Retrying upstream '{self.name}' (attempt {attempt + 1}) once the quota allows")
+                    continue
+                logger.info(f"Retrying upstream '{self.name}' (attempt {attempt + 1}) in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        if response is not None:
+            self._calls.inc(labels={**self._labels, "outcome": f"http_{response.status_code}"})
+            return response
+        self._calls.inc(labels={**self._labels, "outcome": "error"})
+        if last_error is None or isinstance(last_error, asyncio.TimeoutError):
+            raise DeadlineExceededError(f"Upstream '{self.name}' did not answer within the deadline")
+        raise last_error
+
+
+# -----------------------------------------------------------------------------
+# Process-wide upstream registry
+# -----------------------------------------------------------------------------
+
+_upstreams: Dict[str, UpstreamClient] = {}
+
+
+def upstream(name: str, **kwargs) -> UpstreamClient:
+    """
+    Returns the shared UpstreamClient for `name`, creating it on first use so
+    that latency history and circuit state are shared by all callers.
+
+    The default per-call timeout can be overridden with the
+    `UPSTREAM_TIMEOUT_<NAME>` environment variable (seconds).
+    """
+    client = _upstreams.get(name)
+    if client is None:
+        env_timeout = os.environ.get(f"UPSTREAM_TIMEOUT_{name.upper()}")
+        if env_timeout:
+            kwargs["timeout"] = float(env_timeout)
+        client = UpstreamClient(name, **kwargs)
+        _upstreams[name] = client
+    return client
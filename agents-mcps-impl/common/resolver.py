@@ -0,0 +1,411 @@
+# =============================================================================
+# common/resolver.py
+# =============================================================================
+# Purpose:
+# In-process, async resolver cache for Consul names (`*.service.consul`,
+# `*.virtual.consul`) used when agents talk to each other through Consul DNS
+# (USE_DNS=TRUE).
+#
+# Without it every outbound call pays a blocking system DNS lookup through
+# Consul DNS, which shows up as tail latency. The resolver instead:
+# - queries Consul DNS directly over UDP (SRV for `.service.consul`, which
+#   carries the port and weight of every instance; A for `.virtual.consul`)
+# - caches answers for their TTL (floored at DNS_CACHE_MIN_TTL, as Consul
+#   answers with TTL 0 unless dns_config sets one)
+# - refreshes an entry in the background once it is past `refresh_ratio` of
+#   its TTL, so hot names never expire on the request path
+# - serves the last good answer for up to DNS_CACHE_MAX_STALE seconds when
+#   Consul DNS is unreachable
+#
+# ResolvingTransport plugs the resolver into httpx: requests to Consul names
+# are sent to a weighted-random SRV endpoint; the Host header is unchanged.
+# =============================================================================
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CONSUL_SUFFIXES = (".service.consul", ".virtual.consul")
+
+# DNS record types we use
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_AAAA = 28
+TYPE_SRV = 33
+
+
+class ResolutionError(Exception):
+    """Raised when a name cannot be resolved and no stale answer is available."""
+
+
+# -----------------------------------------------------------------------------
+# DNS wire format (RFC 1035, SRV per RFC 2782)
+# -----------------------------------------------------------------------------
+
+class DnsRecord(NamedTuple):
+    name: str
+    rtype: int
+    ttl: int
+    data: object  # str for A/AAAA/CNAME, (priority, weight, port, target) for SRV
+
+
+def encode_name(name: str) -> bytes:
+    labels = [label for label in name.rstrip(".").split(".") if label]
+    return b"".join(bytes([len(label)]) + label.encode("ascii") for label in labels) + b"\x00"
+
+
+def encode_query(query_id: int, name: str, rtype: int) -> bytes:
+    """A recursive query for one (name, type)."""
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    return header + encode_name(name) + struct.pack("!HH", rtype, 1)
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Reads a possibly compressed name; returns it and the offset after it."""
+    labels = []
+    end = None
+    for _ in range(128):  # bound pointer chains
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = struct.unpack_from("!H", data, offset)[0] & 0x3FFF
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode("ascii"))
+        offset += length
+    return ".".join(labels).lower(), end if end is not None else offset
+
+
+def decode_response(data: bytes) -> Tuple[int, int, List[DnsRecord]]:
+    """
+    Parses a DNS response.
+
+    Returns:
+        (query id, rcode, records of the answer and additional sections).
+    """
+    query_id, flags, qdcount, ancount, nscount, arcount = struct.unpack_from("!HHHHHH", data, 0)
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = _read_name(data, offset)
+        offset += 4
+
+    records = []
+    for section in range(ancount + nscount + arcount):
+        name, offset = _read_name(data, offset)
+        rtype, _, ttl, rdlength = struct.unpack_from("!HHIH", data, offset)
+        offset += 10
+        rdata_offset = offset
+        offset += rdlength
+        if ancount <= section < ancount + nscount:
+            continue  # authority section
+        if rtype == TYPE_A:
+            value = socket.inet_ntop(socket.AF_INET, data[rdata_offset:rdata_offset + 4])
+        elif rtype == TYPE_AAAA:
+            value = socket.inet_ntop(socket.AF_INET6, data[rdata_offset:rdata_offset + 16])
+        elif rtype == TYPE_CNAME:
+            value = _read_name(data, rdata_offset)[0]
+        elif rtype == TYPE_SRV:
+            priority, weight, port = struct.unpack_from("!HHH", data, rdata_offset)
+            value = (priority, weight, port, _read_name(data, rdata_offset + 6)[0])
+        else:
+            continue
+        records.append(DnsRecord(name, rtype, ttl, value))
+    return query_id, flags & 0x000F, records
+
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, query_id: int, answer: asyncio.Future):
+        self.query_id = query_id
+        self.answer = answer
+
+    def datagram_received(self, data, addr):
+        if self.answer.done() or len(data) < 12 or struct.unpack_from("!H", data, 0)[0] != self.query_id:
+            return
+        self.answer.set_result(data)
+
+    def error_received(self, exc):
+        if not self.answer.done():
+            self.answer.set_exception(exc)
+
+
+async def dns_query(name: str, rtype: int, nameserver: Tuple[str, int], timeout: float = 1.0) -> List[DnsRecord]:
+    """Sends one UDP query and returns the answer and additional records."""
+    loop = asyncio.get_running_loop()
+    query_id = random.getrandbits(16)
+    answer = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _QueryProtocol(query_id, answer), remote_addr=nameserver
+    )
+    try:
+        transport.sendto(encode_query(query_id, name, rtype))
+        data = await asyncio.wait_for(answer, timeout)
+    except asyncio.TimeoutError:
+        raise ResolutionError(f"DNS query for {name} timed out after {timeout}s") from None
+    finally:
+        transport.close()
+
+    _, rcode, records = decode_response(data)
+    if rcode == 3:
+        return []  # NXDOMAIN: no healthy instances
+    if rcode != 0:
+        raise ResolutionError(f"DNS query for {name} failed with rcode {rcode}")
+    return records
+
+
+# -----------------------------------------------------------------------------
+# Resolver cache
+# -----------------------------------------------------------------------------
+
+class Endpoint(NamedTuple):
+    """One address a Consul name resolves to."""
+    address: str
+    port: Optional[int] = None  # None when the name carries no port (A records)
+    weight: int = 1
+    priority: int = 0
+
+
+class _Entry:
+    __slots__ = ("endpoints", "fetched_at", "ttl")
+
+    def __init__(self, endpoints: List[Endpoint], ttl: float):
+        self.endpoints = endpoints
+        self.fetched_at = time.monotonic()
+        self.ttl = ttl
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class ConsulResolver:
+    """
+    TTL-honouring resolver cache for Consul DNS names.
+
+    Thread-safe: agents resolve on the server's event loop while the Consul
+    watcher runs on its own thread and loop.
+
+    Args:
+        nameserver: (host, port) of Consul DNS.
+        timeout: Budget of one DNS query.
+        min_ttl: Lower bound applied to answer TTLs.
+        max_ttl: Upper bound applied to answer TTLs.
+        max_stale: How long past expiry an answer may still be served when
+            Consul DNS cannot be reached.
+        refresh_ratio: Fraction of the TTL after which an entry is refreshed
+            in the background.
+    """
+
+    def __init__(
+        self,
+        nameserver: Tuple[str, int] = ("127.0.0.1", 8600),
+        timeout: float = 1.0,
+        min_ttl: float = 5.0,
+        max_ttl: float = 300.0,
+        max_stale: float = 300.0,
+        refresh_ratio: float = 0.8,
+    ):
+        self.nameserver = nameserver
+        self.timeout = timeout
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.max_stale = max_stale
+        self.refresh_ratio = refresh_ratio
+        self._entries: Dict[str, _Entry] = {}
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._lookups = registry.counter("dns_cache_lookups_total", "Consul DNS cache lookups by outcome")
+
+    @classmethod
+    def from_env(cls) -> "ConsulResolver":
+        """
+        Build a resolver from CONSUL_DNS_ADDR (host:port), DNS_CACHE_MIN_TTL
+        and DNS_CACHE_MAX_STALE.
+        """
+        host, _, port = os.environ.get("CONSUL_DNS_ADDR", "127.0.0.1:8600").rpartition(":")
+        return cls(
+            nameserver=(host or "127.0.0.1", int(port)),
+            min_ttl=float(os.environ.get("DNS_CACHE_MIN_TTL", 5)),
+            max_stale=float(os.environ.get("DNS_CACHE_MAX_STALE", 300)),
+        )
+
+    @staticmethod
+    def handles(host: str) -> bool:
+        """Whether `host` is a Consul name this resolver answers for."""
+        return host.rstrip(".").lower().endswith(CONSUL_SUFFIXES)
+
+    async def resolve(self, host: str) -> List[Endpoint]:
+        """
+        Endpoints of `host`, from the cache when possible.
+
+        Raises:
+            ResolutionError: If the name is unknown or Consul DNS is unreachable
+                and no answer within `max_stale` is cached.
+        """
+        host = host.rstrip(".").lower()
+        with self._lock:
+            entry = self._entries.get(host)
+
+        if entry is not None:
+            age = entry.age()
+            if age < entry.ttl:
+                if age >= entry.ttl * self.refresh_ratio:
+                    self._lookups.inc(labels={"outcome": "refresh_ahead"})
+                    self._refresh_in_background(host)
+                else:
+                    self._lookups.inc(labels={"outcome": "hit"})
+                return entry.endpoints
+
+        self._lookups.inc(labels={"outcome": "miss"})
+        try:
+            return (await self._refresh(host)).endpoints
+        except Exception as e:
+            if entry is not None and entry.age() < entry.ttl + self.max_stale and entry.endpoints:
+                logger.warning(f"Serving stale DNS answer for {host}: {e}")
+                self._lookups.inc(labels={"outcome": "stale"})
+                return entry.endpoints
+            raise ResolutionError(f"Cannot resolve {host}: {e}") from e
+
+    async def pick(self, host: str) -> Endpoint:
+        """
+        One endpoint of `host`: weighted random among the lowest SRV priority.
+        """
+        endpoints = await self.resolve(host)
+        if not endpoints:
+            raise ResolutionError(f"No healthy instances of {host}")
+        best = min(endpoint.priority for endpoint in endpoints)
+        candidates = [endpoint for endpoint in endpoints if endpoint.priority == best]
+        weights = [max(endpoint.weight, 1) for endpoint in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    def invalidate(self, host: str) -> None:
+        with self._lock:
+            self._entries.pop(host.rstrip(".").lower(), None)
+
+    def _refresh_in_background(self, host: str) -> None:
+        task = asyncio.ensure_future(self._refresh(host))
+        # Failures are logged; the cached answer keeps serving until max_stale
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _refresh(self, host: str) -> _Entry:
+        """Resolves `host` and stores it; concurrent refreshes of a name share one query."""
+        key = (id(asyncio.get_running_loop()), host)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            endpoints, ttl = await self._lookup(host)
+            entry = _Entry(endpoints, min(self.max_ttl, max(self.min_ttl, ttl)))
+            with self._lock:
+                self._entries[host] = entry
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            logger.warning(f"DNS lookup for {host} failed: {e}")
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else waits on it
+            raise
+        finally:
+            if not future.done():
+                # Cancelled leader: fail the shared query so followers retry or serve stale
+                future.set_exception(ResolutionError(f"DNS lookup for {host} was cancelled"))
+                future.exception()
+            self._inflight.pop(key, None)
+
+    async def _lookup(self, host: str) -> Tuple[List[Endpoint], float]:
+        """Queries Consul DNS; returns the endpoints and the smallest TTL seen."""
+        if host.endswith(".service.consul"):
+            records = await dns_query(host, TYPE_SRV, self.nameserver, self.timeout)
+            srv = [r for r in records if r.rtype == TYPE_SRV]
+            if srv:
+                return await self._srv_endpoints(srv, records)
+        records = await dns_query(host, TYPE_A, self.nameserver, self.timeout)
+        addresses = [r for r in records if r.rtype in (TYPE_A, TYPE_AAAA)]
+        ttl = min((r.ttl for r in addresses), default=0)
+        return [Endpoint(r.data) for r in addresses], ttl
+
+    async def _srv_endpoints(self, srv: List[DnsRecord], records: List[DnsRecord]) -> Tuple[List[Endpoint], float]:
+        # Consul returns the targets' addresses in the additional section
+        addresses: Dict[str, List[DnsRecord]] = {}
+        for record in records:
+            if record.rtype in (TYPE_A, TYPE_AAAA):
+                addresses.setdefault(record.name, []).append(record)
+
+        endpoints = []
+        ttl = min(r.ttl for r in srv)
+        for record in srv:
+            priority, weight, port, target = record.data
+            target_records = addresses.get(target)
+            if target_records is None:
+                target_records = [
+                    r for r in await dns_query(target, TYPE_A, self.nameserver, self.timeout)
+                    if r.rtype in (TYPE_A, TYPE_AAAA)
+                ]
+            for address in target_records:
+                ttl = min(ttl, address.ttl)
+                endpoints.append(Endpoint(address.data, port, weight, priority))
+        return endpoints, ttl
+
+
+# -----------------------------------------------------------------------------
+# httpx integration
+# -----------------------------------------------------------------------------
+
+class ResolvingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that resolves Consul names through a ConsulResolver.
+
+    Plain-HTTP requests to a Consul name are sent to one of its endpoints
+    (the SRV port replaces the URL port); every other request passes through.
+
+    Args:
+        resolver: Resolver to use (the process-wide one by default).
+        transport: Wrapped transport (a pooled HTTP transport by default).
+    """
+
+    def __init__(self, resolver: ConsulResolver = None, transport: httpx.AsyncBaseTransport = None):
+        self.resolver = resolver or consul_resolver
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if request.url.scheme == "http" and self.resolver.handles(host):
+            endpoint = await self.resolver.pick(host)
+            # The Host header was set from the original URL when the request was built
+            request.url = request.url.copy_with(host=endpoint.address, port=endpoint.port or request.url.port)
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def resolving_http_client(headers: Dict[str, str] = None, timeout: httpx.Timeout = None,
+                          auth: httpx.Auth = None) -> httpx.AsyncClient:
+    """httpx client factory (MCP `httpx_client_factory` compatible) using the resolver cache."""
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout if timeout is not None else httpx.Timeout(30.0),
+        auth=auth,
+        follow_redirects=True,
+        transport=ResolvingTransport(),
+    )
+
+
+# Process-wide resolver shared by every client
+consul_resolver = ConsulResolver.from_env()
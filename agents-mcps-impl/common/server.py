@@ -0,0 +1,192 @@
+# =============================================================================
+# common/server.py
+# =============================================================================
+# Purpose:
+# The A2A server used by every agent in this demo. It extends the ADK's
+# `A2AServer` with operational features the agents need when running behind
+# the Consul mesh on Nomad:
+# - Admission control: adaptive concurrency limit, bounded deadline-aware
+#   queue and a JSON-RPC "overloaded" error with a retry hint
+# - Deadline propagation: the caller's budget is bound to the task context
+# - `/metrics`: Prometheus metrics (queue depth, rejections, latency...)
+# - Fast codec (common.codec): orjson, responses encoded straight to bytes,
+#   optional "new messages only" history, and `tasks/get` support
+# - JSON-RPC 2.0 batches: the calls of a batch run concurrently under the
+#   admission limits and their responses come back in request order
+# - Debugging (common.profiling): event-loop stall monitor and an
+#   authenticated `/debug/profile` sampling profiler
+# - Non-blocking `tasks/send` (common.task_queue): answered at once, run by
+#   background workers, results via `tasks/get` or a webhook
+# =============================================================================
+
+import asyncio
+import logging
+import math
+import os
+from typing import Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+from models.json_rpc import InternalError, JSONRPCResponse
+from models.request import A2ARequest, GetTaskRequest, SendTaskRequest
+from models.task import Task
+from server.server import A2AServer
+
+from common.admission import AdmissionController, OverloadedError
+from common.codec import dumps, encode_response, loads, select_history
+from common.deadline import Deadline, bind_deadline
+from common.metrics import registry
+from common.profiling import install_debug_endpoints
+from common.task_queue import BackgroundTaskRunner, is_non_blocking
+
+logger = logging.getLogger(__name__)
+
+
+class ManagedA2AServer(A2AServer):
+    """
+    A2AServer with admission control, deadline propagation and metrics.
+
+    Args:
+        host: IP address to bind the server to
+        port: Port number to listen on
+        agent_card: Metadata that describes our agent
+        task_manager: Logic to handle the task
+        admission: Admission controller; built from the environment when omitted
+        max_batch: Largest JSON-RPC batch accepted; defaults to A2A_MAX_BATCH (32)
+        background: Runner of non-blocking tasks; built from the environment when omitted
+    """
+
+    def __init__(
+        self,
+        host="0.0.0.0",
+        port=5000,
+        agent_card=None,
+        task_manager=None,
+        admission: AdmissionController = None,
+        max_batch: int = None,
+        background: BackgroundTaskRunner = None,
+    ):
+        super().__init__(host=host, port=port, agent_card=agent_card, task_manager=task_manager)
+        name = agent_card.name if agent_card else "a2a"
+        self._labels = {"server": name}
+        self.admission = admission or AdmissionController.from_env(name=name)
+        self.max_batch = max_batch or int(os.environ.get("A2A_MAX_BATCH", 32))
+        self._batch_size = registry.summary("a2a_batch_size", "Calls per JSON-RPC batch")
+        self.background = background or BackgroundTaskRunner.from_env(task_manager, name=name)
+
+        # 📈 Prometheus scrape endpoint
+        self.app.add_route("/metrics", self._get_metrics, methods=["GET"])
+        # 🩺 Loop stall monitor and on-demand profiler
+        self.stall_monitor = install_debug_endpoints(self.app, name)
+
+    def _get_metrics(self, request: Request) -> PlainTextResponse:
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    async def _handle_request(self, request: Request):
+        """
+        Admission-controlled entry point for JSON-RPC calls and batches.
+
+        Only `tasks/send` goes through the limiter; cheap calls such as
+        `tasks/get` are served directly. The calls of a batch run
+        concurrently, each admitted (or shed) on its own.
+        """
+        try:
+            body = loads(await request.body())
+        except Exception as e:
+            logger.error(f"Exception: {e}")
+            return self._error_response(None, str(e))
+
+        deadline = Deadline.from_headers(request.headers, default=self.admission.default_timeout)
+        if isinstance(body, list):
+            return await self._handle_batch(body, deadline)
+
+        status, content, headers = await self._handle_call(body, deadline)
+        return Response(content, status_code=status, headers=headers, media_type="application/json")
+
+    async def _handle_batch(self, calls: list, deadline: Optional[Deadline]) -> Response:
+        """Runs a JSON-RPC 2.0 batch; responses are returned in request order."""
+        if not calls:
+            return self._error_response(None, "Empty batch")
+        if len(calls) > self.max_batch:
+            return self._error_response(None, f"Batch of {len(calls)} calls exceeds the limit of {self.max_batch}")
+
+        results = await asyncio.gather(*(self._handle_call(call, deadline) for call in calls))
+        self._batch_size.observe(len(calls), self._labels)
+        # Every part is an encoded response object: join them without re-parsing
+        content = b"[" + b",".join(content for _, content, _ in results) + b"]"
+        return Response(content, media_type="application/json")
+
+    async def _handle_call(self, body, deadline: Optional[Deadline]) -> Tuple[int, bytes, dict]:
+        """Runs one JSON-RPC call; returns the HTTP status, encoded response and headers."""
+        method = body.get("method") if isinstance(body, dict) else None
+        request_id = body.get("id") if isinstance(body, dict) else None
+
+        if method != "tasks/send":
+            with bind_deadline(deadline):
+                return (*await self._dispatch(body, request_id), {})
+
+        try:
+            if is_non_blocking(body):
+                # Bounded by the background workers, not by admission slots
+                return (*await self._submit(body, request_id, deadline), {})
+            async with self.admission.slot(deadline) as admission:
+                with bind_deadline(deadline):
+                    status, content = await self._dispatch(body, request_id)
+                admission.failed = status >= 400
+                return status, content, {}
+        except OverloadedError as e:
+            content = encode_response(request_id, error=e.to_json_rpc_error())
+            return 503, content, {"Retry-After": str(math.ceil(e.retry_after))}
+
+    async def _dispatch(self, body, request_id=None) -> Tuple[int, bytes]:
+        """Validates, runs and encodes one JSON-RPC call."""
+        try:
+            json_rpc = A2ARequest.validate_python(body)
+            if isinstance(json_rpc, SendTaskRequest):
+                previous_length = self._history_length(json_rpc.params.id)
+                result = await self.task_manager.on_send_task(json_rpc)
+            elif isinstance(json_rpc, GetTaskRequest):
+                previous_length = 0
+                result = await self.task_manager.on_get_task(json_rpc)
+            else:
+                raise ValueError(f"Unsupported A2A method: {type(json_rpc)}")
+            return 200, self._encode_result(result, json_rpc.params, previous_length)
+
+        except Exception as e:
+            logger.error(f"Exception: {e}")
+            return 400, encode_response(request_id, error=InternalError(message=str(e)))
+
+    async def _submit(self, body, request_id, deadline: Optional[Deadline]) -> Tuple[int, bytes]:
+        """Queues a non-blocking `tasks/send` and encodes its "submitted" snapshot."""
+        try:
+            json_rpc = SendTaskRequest.model_validate(body)
+            task = await self.background.submit(json_rpc, deadline)
+        except OverloadedError:
+            raise
+        except Exception as e:
+            logger.error(f"Exception: {e}")
+            return 400, encode_response(request_id, error=InternalError(message=str(e)))
+        return 200, encode_response(json_rpc.id, task)
+
+    def _history_length(self, task_id: str) -> int:
+        """Messages the task had before this call (to return only the new ones)."""
+        task = getattr(self.task_manager, "tasks", {}).get(task_id)
+        return len(task.history) if task is not None else 0
+
+    def _encode_result(self, result, params=None, previous_length: int = 0) -> bytes:
+        """Encodes a JSONRPCResponse straight to bytes, trimming the history as requested."""
+        if not isinstance(result, JSONRPCResponse):
+            raise ValueError("Invalid response type")
+        if isinstance(result.result, Task):
+            history = select_history(result.result.history, params, previous_length)
+            return encode_response(result.id, result.result, result.error, history)
+        return dumps(jsonable_encoder(result.model_dump(exclude_none=True)))
+
+    def _error_response(self, request_id, message: str) -> Response:
+        return Response(
+            encode_response(request_id, error=InternalError(message=message)),
+            status_code=400,
+            media_type="application/json",
+        )
@@ -0,0 +1,475 @@
+# =============================================================================
+# common/shared_cache.py
+# =============================================================================
+# Purpose:
+# Two-level cache for tool results that is shared by every replica.
+#
+# The in-process caches start cold on every new allocation and are
+# duplicated per replica, so upstream calls grow with the replica count.
+# SharedCache puts a shared second level (L2) behind a small in-process L1:
+# - L2 backends: a directory (DiskBackend; a host or network volume shared
+#   by the replicas, and warm across restarts) or a Redis-protocol server
+#   (RedisBackend; a minimal RESP client, no extra dependency)
+# - keys are namespaced and versioned: "<namespace>:<schema>:<TOOL_CACHE_VERSION>:<key>",
+#   so a changed record layout or a global version bump never reads old data
+# - stampede protection: one load per key per process (single-flight), and
+#   across replicas a short lock entry in L2; replicas that do not hold the
+#   lock wait for the value instead of calling the upstream as well
+# - L2 failures and slowness (TOOL_CACHE_TIMEOUT_MS) never fail a tool call;
+#   the value is then loaded as if there was no L2
+# =============================================================================
+
+import abc
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+from urllib.parse import unquote, urlparse
+
+from common.codec import dumps, loads
+from common.deadline import remaining_budget
+from common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as the holder of L2 load locks
+_REPLICA = uuid.uuid4().hex[:12]
+
+
+class Entry(NamedTuple):
+    """A cached value and when it was stored (epoch seconds, shared clock)."""
+    value: Any
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.stored_at)
+
+
+# -----------------------------------------------------------------------------
+# L2 backends
+# -----------------------------------------------------------------------------
+
+class L2Backend(abc.ABC):
+    """Byte store shared by the replicas; every entry expires after its TTL."""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Returns the value of `key`, or None when it is absent or expired."""
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Stores `value` under `key` for `ttl` seconds."""
+
+    @abc.abstractmethod
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Stores `value` only when `key` is absent; returns whether it did."""
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        """Removes `key` if present."""
+
+
+class DiskBackend(L2Backend):
+    """
+    One file per key in `directory`: an 8-byte expiry (epoch seconds)
+    followed by the value. Writes go through a temporary file and a rename,
+    so readers on other replicas never see partial entries.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < 8 or struct.unpack("!d", data[:8])[0] < time.time():
+            return None
+        return data[8:]
+
+    def _write(self, key: str, value: bytes, ttl: float) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(struct.pack("!d", time.time() + ttl) + value)
+        os.replace(tmp, self._path(key))
+
+    def _add(self, key: str, value: bytes, ttl: float) -> bool:
+        path = self._path(key)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self._read(key) is not None:
+                    return False
+                self._delete(key)  # expired: take it over
+                continue
+            with os.fdopen(fd, "wb") as f:
+                f.write(struct.pack("!d", time.time() + ttl) + value)
+            return True
+        return False
+
+    def _delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await asyncio.to_thread(self._write, key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return await asyncio.to_thread(self._add, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+
+class RedisError(Exception):
+    """An error reply from the Redis-protocol server."""
+
+
+class RedisBackend(L2Backend):
+    """
+    Minimal RESP client (GET, SET PX [NX], DEL) for Redis or any server
+    speaking its protocol, with a small connection pool per event loop.
+
+    Args:
+        host: Server host.
+        port: Server port.
+        db: Database index (SELECT).
+        password: Password (AUTH), if any.
+        pool_size: Connections per event loop.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, password: str = None,
+                 pool_size: int = 4):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.pool_size = pool_size
+        # Connections are bound to the event loop they were opened on
+        self._pools: Dict[int, asyncio.Queue] = {}
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        """redis://[:password@]host[:port][/db]"""
+        parsed = urlparse(url)
+        return cls(
+            host=parsed.hostname or "127.0.0.1",
+            port=parsed.port or 6379,
+            db=int(parsed.path.strip("/") or 0),
+            password=unquote(parsed.password) if parsed.password else None,
+        )
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    @classmethod
+    async def _reply(cls, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by the cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            return None if size < 0 else (await reader.readexactly(size + 2))[:-2]
+        if kind == b"*":
+            size = int(body)
+            return None if size < 0 else [await cls._reply(reader) for _ in range(size)]
+        raise ConnectionError(f"unexpected reply from the cache server: {line[:40]!r}")
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(self._encode("AUTH", self.password))
+            await self._reply(reader)
+        if self.db:
+            writer.write(self._encode("SELECT", self.db))
+            await self._reply(reader)
+        return reader, writer
+
+    async def command(self, *args) -> Any:
+        loop_id = id(asyncio.get_running_loop())
+        pool = self._pools.get(loop_id)
+        if pool is None:
+            pool = self._pools[loop_id] = asyncio.Queue()
+            for _ in range(self.pool_size):
+                pool.put_nowait(None)  # a free slot without an open connection
+
+        connection = await pool.get()
+        try:
+            if connection is None:
+                connection = await self._connect()
+            reader, writer = connection
+            writer.write(self._encode(*args))
+            await writer.drain()
+            return await self._reply(reader)
+        except RedisError:
+            raise
+        except BaseException:
+            # Broken or interrupted mid-reply: the connection cannot be reused
+            if connection is not None:
+                connection[1].close()
+            connection = None
+            raise
+        finally:
+            pool.put_nowait(connection)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.command("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.command("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return await self.command("SET", key, value, "PX", max(1, int(ttl * 1000)), "NX") == "OK"
+
+    async def delete(self, key: str) -> None:
+        await self.command("DEL", key)
+
+
+_backends: Dict[str, L2Backend] = {}
+
+
+def backend_from_url(url: str) -> Optional[L2Backend]:
+    """
+    The (shared) backend for TOOL_CACHE_URL: "redis://host:port/db",
+    "file:///path" or a plain directory path; None when empty.
+    """
+    if not url:
+        return None
+    backend = _backends.get(url)
+    if backend is None:
+        if url.startswith("redis://"):
+            backend = RedisBackend.from_url(url)
+        else:
+            backend = DiskBackend(urlparse(url).path if url.startswith("file://") else url)
+        _backends[url] = backend
+    return backend
+
+
+# -----------------------------------------------------------------------------
+# Two-level cache
+# -----------------------------------------------------------------------------
+
+class SharedCache:
+    """
+    L1 (in process) + L2 (shared) cache of one kind of tool result.
+
+    Args:
+        namespace: Kind of result (metrics label and key prefix).
+        schema: Version of the value layout; bump it when the encoded form changes.
+        ttl: Default lifetime of an entry (seconds).
+        backend: Shared L2; None keeps the cache in process.
+        l1_size: Entries kept in process (0 disables the L1).
+        version: Global key version (TOOL_CACHE_VERSION); bumping it drops every entry.
+        encode: Value -> JSON-serializable object.
+        decode: Inverse of `encode`.
+        timeout: Longest wait for one L2 operation (seconds).
+        lock_ttl: How long a replica may hold the load lock of a key (seconds).
+        lock_wait: How long other replicas wait for the lock holder's value
+            before loading it themselves (seconds), capped by the current deadline.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        schema: int = 1,
+        ttl: float = 300.0,
+        backend: Optional[L2Backend] = None,
+        l1_size: int = 1024,
+        version: str = "1",
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda data: data,
+        timeout: float = 0.25,
+        lock_ttl: float = 15.0,
+        lock_wait: float = 5.0,
+    ):
+        self.namespace = namespace
+        self.prefix = f"{namespace}:{schema}:{version}:"
+        self.ttl = ttl
+        self.backend = backend
+        self.l1_size = l1_size
+        self.encode = encode
+        self.decode = decode
+        self.timeout = timeout
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._l1: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires (monotonic), Entry)
+        self._loading: Dict[str, asyncio.Future] = {}
+
+        self._requests = registry.counter("tool_cache_requests_total", "Tool cache lookups by level that answered")
+        self._errors = registry.counter("tool_cache_l2_errors_total", "Failed or timed out shared cache operations")
+
+    @classmethod
+    def from_env(cls, namespace: str, schema: int = 1, ttl: float = 300.0, **kwargs) -> "SharedCache":
+        """
+        A cache with the L2 of TOOL_CACHE_URL (unset: in process only), keys
+        versioned by TOOL_CACHE_VERSION (default "1") and L2 operations
+        bounded by TOOL_CACHE_TIMEOUT_MS (default 250).
+        """
+        return cls(
+            namespace,
+            schema=schema,
+            ttl=ttl,
+            backend=backend_from_url(os.environ.get("TOOL_CACHE_URL", "")),
+            version=os.environ.get("TOOL_CACHE_VERSION", "1"),
+            timeout=float(os.environ.get("TOOL_CACHE_TIMEOUT_MS", 250)) / 1000,
+            **kwargs,
+        )
+
+    # -- L1 -------------------------------------------------------------------
+
+    def _l1_get(self, key: str) -> Optional[Entry]:
+        item = self._l1.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            del self._l1[key]
+            return None
+        self._l1.move_to_end(key)
+        return item[1]
+
+    def _l1_put(self, key: str, entry: Entry, ttl: float) -> None:
+        if self.l1_size <= 0:
+            return
+        self._l1[key] = (time.monotonic() + ttl - entry.age, entry)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    # -- L2 -------------------------------------------------------------------
+
+    async def _l2(self, operation: str, *args) -> Any:
+        """Runs one backend operation; None when there is no L2 or it failed."""
+        if self.backend is None:
+            return None
+        try:
+            return await asyncio.wait_for(getattr(self.backend, operation)(*args), self.timeout)
+        except Exception as e:
+            self._errors.inc(labels={"namespace": self.namespace, "operation": operation})
+            logger.warning(f"Shared cache {operation} for {self.namespace} failed: {e!r}")
+            return None
+
+    async def _l2_get(self, key: str) -> Optional[Entry]:
+        data = await self._l2("get", self.prefix + key)
+        if data is None:
+            return None
+        try:
+            stored_at, value = loads(data)
+            return Entry(self.decode(value), stored_at)
+        except Exception as e:  # written by an incompatible version despite the key version
+            logger.warning(f"Dropping unreadable shared cache entry {self.prefix + key}: {e!r}")
+            return None
+
+    async def _l2_put(self, key: str, entry: Entry, ttl: float) -> None:
+        await self._l2("set", self.prefix + key, dumps([entry.stored_at, self.encode(entry.value)]), ttl)
+
+    # -- API ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[Entry]:
+        """The cached entry from L1 or L2, or None."""
+        entry = self._l1_get(key)
+        if entry is None:
+            entry = await self._l2_get(key)
+            if entry is not None:
+                self._l1_put(key, entry, self.ttl)
+        return entry
+
+    async def put(self, key: str, value: Any, ttl: float = None) -> Entry:
+        """Stores a freshly loaded value in both levels."""
+        entry = Entry(value, time.time())
+        self._l1_put(key, entry, ttl or self.ttl)
+        await self._l2_put(key, entry, ttl or self.ttl)
+        return entry
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float = None) -> Optional[Entry]:
+        """
+        The entry of `key`, loading it with `loader` (once across the
+        replicas) when no level has it. A loader result of None is returned
+        as None and not cached; loader exceptions propagate.
+        """
+        labels = {"namespace": self.namespace}
+        entry = self._l1_get(key)
+        if entry is not None:
+            self._requests.inc(labels={**labels, "level": "l1"})
+            return entry
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            self._requests.inc(labels={**labels, "level": "shared_flight"})
+            return await asyncio.shield(pending)
+
+        future = self._loading[key] = asyncio.get_running_loop().create_future()
+        try:
+            entry = await self._fetch(key, loader, ttl or self.ttl, labels)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                e = RuntimeError(f"loading {self.namespace} {key} was cancelled")
+            future.set_exception(e)
+            future.exception()  # retrieved here; waiters re-raise it
+            raise
+        finally:
+            del self._loading[key]
+
+    async def _fetch(self, key: str, loader, ttl: float, labels: dict) -> Optional[Entry]:
+        entry = await self._l2_get(key)
+        if entry is not None:
+            self._requests.inc(labels={**labels, "level": "l2"})
+            self._l1_put(key, entry, ttl)
+            return entry
+
+        lock = f"{self.prefix}{key}:lock"
+        # True: this replica loads; False: another one does; None: no (working) L2
+        locked = await self._l2("add", lock, _REPLICA.encode(), self.lock_ttl)
+        if locked is False:
+            # Another replica is loading this key: wait for its value, but
+            # not past the deadline of the current task
+            waited, delay, lock_wait = 0.0, 0.02, remaining_budget(self.lock_wait)
+            while waited < lock_wait:
+                await asyncio.sleep(delay)
+                waited += delay
+                delay = min(delay * 2, 0.25)
+                entry = await self._l2_get(key)
+                if entry is not None:
+                    self._requests.inc(labels={**labels, "level": "l2_wait"})
+                    self._l1_put(key, entry, ttl)
+                    return entry
+
+        self._requests.inc(labels={**labels, "level": "load"})
+        try:
+            value = await loader()
+            return None if value is None else await self.put(key, value, ttl)
+        finally:
+            if locked:
+                await self._l2("delete", lock)
@@ -0,0 +1,306 @@
+# =============================================================================
+# common/task_queue.py
+# =============================================================================
+# Purpose:
+# Non-blocking task submission for the A2A servers.
+#
+# A blocking `tasks/send` holds the caller's HTTP request (and socket) open
+# for the whole LLM run, so server concurrency ends up bounded by how many
+# connections clients keep open. With `params.metadata.blocking = false` the
+# server instead:
+# - records the task as "submitted" and answers immediately
+# - runs it on a fixed pool of background workers fed by a bounded queue
+#   (a full queue sheds the task with the usual "overloaded" error)
+# - exposes progress and the result through `tasks/get`
+# - optionally POSTs the finished task to a webhook given in
+#   `params.metadata.pushNotification = {"url": ..., "token": ...}`, from
+#   its own bounded set of delivery tasks so a slow webhook never holds a
+#   worker; only http(s) URLs on allowlisted hosts are accepted, so callers
+#   cannot make the server POST to loopback, Consul or other mesh services
+# =============================================================================
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+import httpx
+
+from models.request import SendTaskRequest
+from models.task import Message, Task, TaskState, TaskStatus, TextPart
+
+from common.admission import OverloadedError
+from common.codec import dumps, task_to_dict
+from common.deadline import Deadline, bind_deadline
+from common.metrics import registry
+from common.resilience import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = {TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED}
+
+
+def is_non_blocking(body) -> bool:
+    """Whether a raw `tasks/send` call asked to be answered before the task has run."""
+    params = body.get("params") if isinstance(body, dict) else None
+    metadata = params.get("metadata") if isinstance(params, dict) else None
+    return isinstance(metadata, dict) and metadata.get("blocking") is False
+
+
+class PushNotifier:
+    """
+    Delivers finished tasks to client webhooks: a POST of the task as JSON,
+    with `Authorization: Bearer <token>` when the client gave a token.
+    Failed deliveries are retried with backoff; the task stays available
+    through `tasks/get` either way.
+
+    Args:
+        allowed_hosts: Webhook hosts, as `host` (any port) or `host:port`;
+            URLs elsewhere are rejected. None allowed by default.
+        timeout: Budget of one POST (seconds).
+        retry: Attempts and backoff of one delivery.
+        concurrency: Deliveries in progress at once.
+        max_pending: Deliveries allowed to wait for a slot; more are dropped.
+    """
+
+    def __init__(self, allowed_hosts: Iterable[str] = (), timeout: float = 10.0, retry: RetryPolicy = None,
+                 concurrency: int = 16, max_pending: int = 1024):
+        self.allowed_hosts = {host.strip().lower() for host in allowed_hosts if host.strip()}
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=5.0)
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._deliveries: Set[asyncio.Task] = set()
+        self._sent = registry.counter("a2a_push_notifications_total", "Webhook deliveries of finished tasks")
+
+    @classmethod
+    def from_env(cls) -> "PushNotifier":
+        """Builds a notifier from A2A_PUSH_ALLOWED_HOSTS (comma-separated)."""
+        return cls(allowed_hosts=os.environ.get("A2A_PUSH_ALLOWED_HOSTS", "").split(","))
+
+    def check(self, config: dict) -> None:
+        """
+        Raises:
+            ValueError: the webhook URL is not http(s) on an allowed host.
+        """
+        if not isinstance(config, dict):
+            raise ValueError("pushNotification must be an object with a url")
+        url = urlparse(str(config.get("url", "")))
+        try:
+            port = url.port or {"http": 80, "https": 443}.get(url.scheme)
+        except ValueError:
+            port = None
+        host = (url.hostname or "").lower()
+        if url.scheme not in ("http", "https") or port is None or not host:
+            raise ValueError("Push notification URL must be an http(s) URL")
+        if host not in self.allowed_hosts and f"{host}:{port}" not in self.allowed_hosts:
+            raise ValueError(f"Push notifications to {host}:{port} are not allowed")
+
+    def deliver(self, config: dict, task: Task) -> None:
+        """Sends `task` to the webhook in the background; returns at once."""
+        if len(self._deliveries) >= self.max_pending:
+            logger.warning(f"Dropping push notification for task {task.id}: {self.max_pending} deliveries pending")
+            self._sent.inc(labels={"outcome": "dropped"})
+            return
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        # Snapshot now: the task may be resubmitted before the POST goes out
+        delivery = asyncio.create_task(self._deliver(config, task.model_copy(deep=True)))
+        self._deliveries.add(delivery)
+        delivery.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, config: dict, task: Task) -> None:
+        async with self._slots:
+            await self.notify(config, task)
+
+    async def notify(self, config: dict, task: Task) -> bool:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        headers = {"Content-Type": "application/json"}
+        if config.get("token"):
+            headers["Authorization"] = f"Bearer {config['token']}"
+        body = dumps(task_to_dict(task))
+
+        for attempt in range(1, self.retry.max_attempts + 1):
+            try:
+                response = await self._client.post(config["url"], content=body, headers=headers)
+                response.raise_for_status()
+                self._sent.inc(labels={"outcome": "delivered"})
+                return True
+            except Exception as e:
+                logger.warning(f"Push notification for task {task.id} to {config['url']} failed: {e}")
+                if attempt < self.retry.max_attempts:
+                    await asyncio.sleep(self.retry.backoff(attempt))
+        self._sent.inc(labels={"outcome": "failed"})
+        return False
+
+    async def close(self) -> None:
+        for delivery in list(self._deliveries):
+            delivery.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+
+
+class _Job:
+    def __init__(self, request: SendTaskRequest, deadline: Optional[Deadline]):
+        self.request = request
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+
+
+class BackgroundTaskRunner:
+    """
+    A bounded queue of submitted tasks drained by a fixed number of workers.
+
+    The runner binds to the event loop it is first used on and starts its
+    workers lazily.
+
+    Args:
+        task_manager: The server's InMemoryTaskManager (runs and stores tasks).
+        workers: Tasks executed concurrently.
+        max_pending: Tasks allowed to wait in the queue; more are shed.
+        name: Server name (metrics label).
+        notifier: Webhook sender; PushNotifier.from_env() when omitted.
+    """
+
+    def __init__(self, task_manager, workers: int = 8, max_pending: int = 256, name: str = "a2a",
+                 notifier: PushNotifier = None):
+        self.task_manager = task_manager
+        self.workers = workers
+        self.max_pending = max_pending
+        self.notifier = notifier or PushNotifier.from_env()
+        self._labels = {"server": name}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+        self._avg_latency: Optional[float] = None
+
+        self._submitted = registry.counter("a2a_background_tasks_total", "Non-blocking tasks by outcome")
+        self._pending_gauge = registry.gauge("a2a_background_queue_depth", "Non-blocking tasks waiting for a worker")
+        self._running_gauge = registry.gauge("a2a_background_running", "Non-blocking tasks executing")
+        self._wait = registry.summary("a2a_background_wait_seconds", "Time non-blocking tasks spent queued")
+
+    @classmethod
+    def from_env(cls, task_manager, name: str = "a2a") -> "BackgroundTaskRunner":
+        """Builds a runner from A2A_WORKERS and A2A_MAX_PENDING."""
+        return cls(
+            task_manager,
+            workers=int(os.environ.get("A2A_WORKERS", 8)),
+            max_pending=int(os.environ.get("A2A_MAX_PENDING", 256)),
+            name=name,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _publish(self) -> None:
+        self._pending_gauge.set(self.pending, self._labels)
+        self._running_gauge.set(self._running, self._labels)
+
+    def retry_after(self) -> float:
+        avg = self._avg_latency or 1.0
+        return min(60.0, max(1.0, avg * (self.pending + 1) / self.workers))
+
+    async def submit(self, request: SendTaskRequest, deadline: Optional[Deadline]) -> Task:
+        """
+        Queues a task and returns its "submitted" snapshot.
+
+        Raises:
+            OverloadedError: the queue is full.
+            ValueError: the task is still running, or its webhook is not allowed.
+        """
+        self._ensure_started()
+        params = request.params
+        push = (params.metadata or {}).get("pushNotification")
+        if push:
+            self.notifier.check(push)
+        tasks: Dict[str, Task] = self.task_manager.tasks
+        async with self.task_manager.lock:
+            task = tasks.get(params.id)
+            if task is not None and task.status.state not in TERMINAL_STATES:
+                raise ValueError(f"Task {params.id} is still {task.status.state}")
+            try:
+                self._queue.put_nowait(_Job(request, deadline))
+            except asyncio.QueueFull:
+                self._submitted.inc(labels={**self._labels, "outcome": "rejected"})
+                raise OverloadedError("background queue full", self.retry_after())
+            # The message itself is recorded by on_send_task when a worker picks the task up
+            if task is None:
+                task = Task(id=params.id, status=TaskStatus(state=TaskState.SUBMITTED), history=[])
+                tasks[params.id] = task
+            else:
+                task.status = TaskStatus(state=TaskState.SUBMITTED)
+            snapshot = Task(id=task.id, status=task.status, history=[*task.history, params.message])
+
+        self._submitted.inc(labels={**self._labels, "outcome": "accepted"})
+        self._publish()
+        return snapshot
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._running += 1
+            self._publish()
+            try:
+                await self._run(job)
+            except Exception as e:  # never let a worker die
+                logger.exception(f"Background task {job.request.params.id} crashed: {e}")
+            finally:
+                self._running -= 1
+                self._publish()
+                self._queue.task_done()
+
+    async def _run(self, job: _Job) -> None:
+        params = job.request.params
+        self._wait.observe(time.monotonic() - job.enqueued, self._labels)
+        task = self.task_manager.tasks[params.id]
+
+        if job.deadline is not None and job.deadline.expired():
+            await self._fail(task, "Deadline exceeded before the task started")
+            outcome = "expired"
+        else:
+            async with self.task_manager.lock:
+                task.status = TaskStatus(state=TaskState.WORKING)
+            started = time.monotonic()
+            try:
+                timeout = job.deadline.remaining() if job.deadline is not None else None
+                with bind_deadline(job.deadline):
+                    await asyncio.wait_for(self.task_manager.on_send_task(job.request), timeout)
+                outcome = "completed"
+            except asyncio.TimeoutError:
+                await self._fail(task, "Deadline exceeded")
+                outcome = "expired"
+            except Exception as e:
+                logger.error(f"Background task {params.id} failed: {e}")
+                await self._fail(task, str(e))
+                outcome = "failed"
+            latency = time.monotonic() - started
+            self._avg_latency = latency if self._avg_latency is None else 0.8 * self._avg_latency + 0.2 * latency
+        self._submitted.inc(labels={**self._labels, "outcome": outcome})
+
+        push = (params.metadata or {}).get("pushNotification")
+        if push and push.get("url"):
+            self.notifier.deliver(push, task)
+
+    async def _fail(self, task: Task, reason: str) -> None:
+        async with self.task_manager.lock:
+            task.status = TaskStatus(state=TaskState.FAILED)
+            task.history.append(Message(role="agent", parts=[TextPart(text=f"Task failed: {reason}")]))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.notifier.close()
@@ -0,0 +1,279 @@
+# =============================================================================
+# mcps/curr/fx_store.py
+# =============================================================================
+# Purpose:
+# Local store of historical exchange rates for the currency MCP server, so
+# "how has USD/INR moved this year" is answered from disk in one tool call
+# instead of one upstream call per date.
+#
+# - one NumPy array per currency (its EUR reference rate per calendar day,
+#   NaN where there is none), kept in a memory-mapped .npy file, plus one
+#   array marking the days already fetched
+# - missing days are filled incrementally with Frankfurter's range endpoint
+#   (GET /<start>..<end>, all currencies at once), one request per gap of at
+#   most a year; days up to yesterday are final, today is re-checked at
+#   most every `refresh` seconds
+# - cross rates (USD -> INR) are computed from the EUR rates, statistics and
+#   resampling are vectorized
+# =============================================================================
+
+import asyncio
+import datetime
+import logging
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from common.metrics import registry
+from common.payload import to_table
+
+logger = logging.getLogger(__name__)
+
+# First day Frankfurter (ECB) has data for
+EPOCH = datetime.date(1999, 1, 4)
+REFERENCE = "EUR"
+FRANKFURTER_URL = "https://api.frankfurter.app"
+
+# Arrays grow in steps of this many days
+_CHUNK = 4096
+# Longest range fetched with one request (days)
+_MAX_SPAN = 366
+
+
+class RatePoint(NamedTuple):
+    """One point of a (resampled) rate series."""
+    date: str
+    rate: float
+
+
+def _day(date: datetime.date) -> int:
+    return (date - EPOCH).days
+
+
+def _date(day: int) -> datetime.date:
+    return EPOCH + datetime.timedelta(days=int(day))
+
+
+def _gaps(missing: np.ndarray, offset: int) -> List[Tuple[int, int]]:
+    """Runs of True in `missing` as inclusive (first, last) day numbers."""
+    edges = np.diff(np.concatenate(([0], missing.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    return [(offset + int(s), offset + int(e)) for s, e in zip(starts, ends)]
+
+
+class FxStore:
+    """
+    Memory-mapped per-currency EUR rates, filled on demand from Frankfurter.
+
+    Args:
+        client: Upstream client (common.resilience) for Frankfurter.
+        directory: Where the .npy files live; created when missing.
+        refresh: Seconds before days not final yet (today) are fetched again.
+        base_url: Frankfurter base URL.
+    """
+
+    def __init__(self, client, directory: str, refresh: float = 3600.0, base_url: str = FRANKFURTER_URL):
+        self.client = client
+        self.directory = directory
+        self.refresh = refresh
+        self.base_url = base_url
+        self._rates: Dict[str, np.memmap] = {}
+        self._fetched: Optional[np.memmap] = None
+        self._checked_today: Dict[int, float] = {}  # day -> monotonic time it was last fetched
+        self._lock = asyncio.Lock()
+
+        self._requests = registry.counter("fx_store_upstream_requests_total", "Frankfurter range requests made by the FX store")
+        self._queries = registry.counter("fx_store_queries_total", "FX history queries by result")
+
+    @classmethod
+    def from_env(cls, client) -> "FxStore":
+        """A store in FX_STORE_DIR (default `.fx-store`), refreshing today every FX_STORE_REFRESH seconds (default 3600)."""
+        return cls(
+            client,
+            directory=os.environ.get("FX_STORE_DIR", ".fx-store"),
+            refresh=float(os.environ.get("FX_STORE_REFRESH", 3600)),
+        )
+
+    # -- storage --------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def _open(self) -> None:
+        """Maps the arrays already on disk (once)."""
+        if self._fetched is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self._path("_fetched")):
+            self._fetched = np.load(self._path("_fetched"), mmap_mode="r+")
+        else:
+            self._fetched = self._create("_fetched", np.uint8, 0, _CHUNK)
+        for file in os.listdir(self.directory):
+            name = file[:-4]
+            if file.endswith(".npy") and name.isalpha():  # skips _fetched and leftover temporary files
+                self._rates[name] = np.load(self._path(name), mmap_mode="r+")
+
+    def _create(self, name: str, dtype, fill, size: int, data: Optional[np.ndarray] = None) -> np.memmap:
+        """Writes a new array file (via a temporary file, so readers never see half of it) and maps it."""
+        tmp = self._path(f"{name}.tmp")
+        array = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=(size,))
+        array[:] = fill
+        if data is not None:
+            array[:len(data)] = data
+        array.flush()
+        del array
+        os.replace(tmp, self._path(name))
+        return np.load(self._path(name), mmap_mode="r+")
+
+    def _reserve(self, last_day: int) -> None:
+        """Grows every array to hold `last_day`."""
+        if last_day < len(self._fetched):
+            return
+        size = (last_day // _CHUNK + 1) * _CHUNK
+        self._fetched = self._create("_fetched", np.uint8, 0, size, self._fetched)
+        for currency, rates in list(self._rates.items()):
+            self._rates[currency] = self._create(currency, np.float64, np.nan, size, rates)
+
+    def _series(self, currency: str) -> np.memmap:
+        rates = self._rates.get(currency)
+        if rates is None:
+            rates = self._rates[currency] = self._create(currency, np.float64, np.nan, len(self._fetched))
+        return rates
+
+    def currencies(self) -> List[str]:
+        self._open()
+        return sorted({REFERENCE, *self._rates})
+
+    # -- filling --------------------------------------------------------------
+
+    async def ensure(self, start: datetime.date, end: datetime.date) -> int:
+        """Fetches the days of [start, end] not in the store yet; returns the number of requests made."""
+        today = _day(datetime.date.today())
+        first, last = _day(max(start, EPOCH)), min(_day(end), today)
+        requests = 0
+        async with self._lock:
+            self._open()
+            self._reserve(last)
+            missing = self._fetched[first:last + 1] == 0
+            if today in range(first, last + 1) and self._checked_today.get(today, 0) > time.monotonic() - self.refresh:
+                missing[today - first] = False
+            for gap_start, gap_end in _gaps(missing, first):
+                for chunk_start in range(gap_start, gap_end + 1, _MAX_SPAN):
+                    await self._fetch(chunk_start, min(gap_end, chunk_start + _MAX_SPAN - 1), today)
+                    requests += 1
+        return requests
+
+    async def _fetch(self, first: int, last: int, today: int) -> None:
+        response = await self.client.get(f"{self.base_url}/{_date(first).isoformat()}..{_date(last).isoformat()}")
+        response.raise_for_status()
+        data = response.json()
+        self._requests.inc()
+
+        rows = data.get("rates", {})
+        days = np.array([_day(datetime.date.fromisoformat(d)) for d in rows], dtype=np.int64)
+        currencies = sorted({currency for values in rows.values() for currency in values if currency.isalpha()})
+        for currency in currencies:
+            values = np.array([values.get(currency, np.nan) for values in rows.values()], dtype=np.float64)
+            series = self._series(currency)
+            series[days] = values
+            series.flush()
+
+        # Days before today are final (weekends and holidays simply have no rate);
+        # today may still be published, so it is only remembered as checked
+        final = min(last, today - 1)
+        if final >= first:
+            self._fetched[first:final + 1] = 1
+            self._fetched.flush()
+        if last >= today:
+            self._checked_today[today] = time.monotonic()
+        logger.info(f"FX store: fetched {len(rows)} days x {len(currencies)} currencies for "
+                    f"{_date(first)}..{_date(last)}")
+
+    # -- queries --------------------------------------------------------------
+
+    def _rate(self, currency: str, first: int, last: int) -> Optional[np.ndarray]:
+        if currency == REFERENCE:
+            return np.ones(last - first + 1)
+        series = self._rates.get(currency)
+        return None if series is None else np.asarray(series[first:last + 1])
+
+    async def history(
+        self,
+        currency_from: str,
+        currency_to: str,
+        start: datetime.date,
+        end: datetime.date,
+        resample: str = "auto",
+    ) -> dict:
+        """
+        Statistics and a resampled series of `currency_from` -> `currency_to`
+        over [start, end] (see get_exchange_rate_history in server.py).
+        """
+        currency_from, currency_to = currency_from.upper(), currency_to.upper()
+        if end < start:
+            start, end = end, start
+        today = datetime.date.today()
+        if start > today or end < EPOCH:
+            self._queries.inc(labels={"result": "empty"})
+            return {"error": f"No rates between {start.isoformat()} and {end.isoformat()}: "
+                             f"rates are available from {EPOCH.isoformat()} to {today.isoformat()}."}
+        end = min(end, today)
+        await self.ensure(start, end)
+
+        first, last = _day(max(start, EPOCH)), _day(end)
+        source, target = self._rate(currency_from, first, last), self._rate(currency_to, first, last)
+        unknown = [c for c, rates in ((currency_from, source), (currency_to, target)) if rates is None]
+        if unknown:
+            self._queries.inc(labels={"result": "unknown_currency"})
+            return {"error": f"Unknown currency: {', '.join(unknown)}. Known: {', '.join(self.currencies())}."}
+
+        rates = target / source
+        observed = np.flatnonzero(~np.isnan(rates))
+        if not len(observed):
+            self._queries.inc(labels={"result": "empty"})
+            return {"error": f"No rates between {start.isoformat()} and {end.isoformat()}."}
+        self._queries.inc(labels={"result": "ok"})
+
+        days, values = observed + first, rates[observed]
+        low, high = int(np.argmin(values)), int(np.argmax(values))
+        period = self._period(resample, int(days[-1] - days[0]))
+        series_days, series_values = self._resample(days, values, period)
+        return {
+            "base": currency_from,
+            "target": currency_to,
+            "start_date": _date(days[0]).isoformat(),
+            "end_date": _date(days[-1]).isoformat(),
+            "observations": int(len(values)),
+            "first": round(float(values[0]), 6),
+            "last": round(float(values[-1]), 6),
+            "min": {"rate": round(float(values[low]), 6), "date": _date(days[low]).isoformat()},
+            "max": {"rate": round(float(values[high]), 6), "date": _date(days[high]).isoformat()},
+            "mean": round(float(values.mean()), 6),
+            "change_pct": round(float((values[-1] / values[0] - 1) * 100), 3),
+            "resample": period,
+            "series": to_table([RatePoint(_date(d).isoformat(), round(float(v), 6))
+                                for d, v in zip(series_days, series_values)], RatePoint._fields),
+        }
+
+    @staticmethod
+    def _period(resample: str, span_days: int) -> str:
+        if resample in ("day", "week", "month"):
+            return resample
+        return "day" if span_days <= 45 else "week" if span_days <= 400 else "month"
+
+    @staticmethod
+    def _resample(days: np.ndarray, values: np.ndarray, period: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean rate per period, dated by the period's last observation."""
+        if period == "day":
+            return days, values
+        if period == "week":
+            keys = (days + EPOCH.weekday()) // 7
+        else:
+            dates = (np.datetime64(EPOCH) + days.astype("timedelta64[D]")).astype("datetime64[M]")
+            keys = dates.astype(np.int64)
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        ends = np.concatenate((starts[1:], [len(days)])) - 1
+        means = np.add.reduceat(values, starts) / np.diff(np.concatenate((starts, [len(days)])))
+        return days[ends], means
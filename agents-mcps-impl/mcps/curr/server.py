@@ -1,5 +1,7 @@
 # File server.py
+import datetime
 import logging
+import os
 
 import httpx
 
@@ -7,21 +9,37 @@ import uvicorn
 from starlette.applications import Starlette
 from starlette.requests import Request
 from starlette.routing import Route, Mount
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 
 from mcp.server.fastmcp import FastMCP
 from mcp.server.sse import SseServerTransport
 
 import click                                # Library for building CLI interfaces
 
+from common.profiling import install_debug_endpoints
+from common.resilience import UpstreamError, upstream
+from common.shared_cache import SharedCache
+from mcps.curr.fx_store import FxStore
+
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(format="[%(levelname)s]: %(message)s", level=logging.INFO)
 
 mcp = FastMCP("Currency MCP Server 💵")
 
+# Shared resilient client for the FX upstream: bounded timeout, jittered
+# retries, hedging after the observed p95 latency and a circuit breaker.
+frankfurter_api = upstream("frankfurter", timeout=10.0)
+
+# Rates shared by the replicas; past dates never change, so they are kept for a day
+fx_rates = SharedCache.from_env("fx", schema=1, ttl=float(os.environ.get("FX_CACHE_TTL", 300)))
+HISTORICAL_TTL = 86400.0
+
+# Local historical rates, filled from Frankfurter's range endpoint on demand
+fx_store = FxStore.from_env(frankfurter_api)
+
 @mcp.tool()
-def get_exchange_rate(
+async def get_exchange_rate(
     currency_from: str = 'USD',
     currency_to: str = 'EUR',
     currency_date: str = 'latest',
@@ -37,8 +55,8 @@ def get_exchange_rate(
         A dictionary containing the exchange rate data, or an error message if the request fails.
     """
     logger.info(f"--- 🛠️ Tool: get_exchange_rate called for converting {currency_from} to {currency_to} ---")
-    try:
-        response = httpx.get(
+    async def load():
+        response = await frankfurter_api.get(
             f'https://api.frankfurter.app/{currency_date}',
             params={'from': currency_from, 'to': currency_to},
         )
@@ -46,10 +64,53 @@ def get_exchange_rate(
 
         data = response.json()
         if 'rates' not in data:
-            return {'error': 'Invalid API response format.'}
+            return None
         logger.info(f'✅ API response: {data}')
         return data
-    except httpx.HTTPError as e:
+
+    key = f'{currency_from.upper()}:{currency_to.upper()}:{currency_date}'
+    historical = currency_date != 'latest' and currency_date < datetime.date.today().isoformat()
+    try:
+        entry = await fx_rates.get_or_load(key, load, ttl=HISTORICAL_TTL if historical else None)
+        if entry is None:
+            return {'error': 'Invalid API response format.'}
+        return entry.value
+    except (httpx.HTTPError, UpstreamError) as e:
+        return {'error': f'API request failed: {e}'}
+    except ValueError:
+        return {'error': 'Invalid JSON response from API.'}
+
+@mcp.tool()
+async def get_exchange_rate_history(
+    currency_from: str = 'USD',
+    currency_to: str = 'EUR',
+    start_date: str = '',
+    end_date: str = 'latest',
+    resample: str = 'auto',
+):
+    """Use this for how an exchange rate moved over a period (trends, highs and lows, % change).
+
+    Args:
+        currency_from: The currency to convert from (e.g., "USD").
+        currency_to: The currency to convert to (e.g., "INR").
+        start_date: First date (YYYY-MM-DD). Defaults to one year before end_date.
+        end_date: Last date (YYYY-MM-DD) or "latest". Defaults to "latest".
+        resample: Series granularity: "day", "week", "month" or "auto" (by period length).
+
+    Returns:
+        A dictionary with min, max (with dates), mean, first, last and change_pct over the
+        period, plus the resampled series as a "date|rate" table, or an error message.
+    """
+    logger.info(f"--- 🛠️ Tool: get_exchange_rate_history called for {currency_from} to {currency_to} "
+                f"({start_date or '1y'}..{end_date}) ---")
+    try:
+        end = datetime.date.today() if end_date in ('', 'latest') else datetime.date.fromisoformat(end_date)
+        start = datetime.date.fromisoformat(start_date) if start_date else end - datetime.timedelta(days=365)
+    except ValueError:
+        return {'error': 'Dates must be in YYYY-MM-DD format.'}
+    try:
+        return await fx_store.history(currency_from, currency_to, start, end, resample)
+    except (httpx.HTTPError, UpstreamError) as e:
         return {'error': f'API request failed: {e}'}
     except ValueError:
         return {'error': 'Invalid JSON response from API.'}
@@ -57,7 +118,7 @@ def get_exchange_rate(
 # Set up the Server-Sent Events (SSE) transport for real-time communication
 sse = SseServerTransport("/messages/")
 
-async def handle_sse(request: Request) -> None:
+async def handle_sse(request: Request) -> Response:
     _server = mcp._mcp_server
     async with sse.connect_sse(
             request.scope,
@@ -65,6 +126,8 @@ async def handle_sse(request: Request) -> None:
             request._send,
     ) as (reader, writer):
         await _server.run(reader, writer, _server.create_initialization_options())
+    # Starlette expects a response once the client disconnects the stream
+    return Response()
 
 async def health(request: Request):
     return JSONResponse({"status": "ok"}, status_code=200)
@@ -77,6 +140,8 @@ app = Starlette(
         Mount("/messages/", app=sse.handle_post_message),
     ],
 )
+# Event-loop stall monitor and `/debug/profile` (needs DEBUG_TOKEN)
+install_debug_endpoints(app, "currency-mcp")
 
 @click.command()
 @click.option(
@@ -0,0 +1,82 @@
+# =============================================================================
+# tests/test_balancer.py
+# =============================================================================
+# Child agents keep sessions in process memory: the balanced client must keep
+# a session, and the polls of a task, on one instance.
+# =============================================================================
+
+import asyncio
+import time
+
+from client.client import A2AClientHTTPError
+
+from common.balancer import InstanceBalancer
+from common.client import BalancedA2AClient
+
+URLS = [f"http://10.0.0.{i}:8080/" for i in range(1, 5)]
+
+
+def balanced_client(shed=()):
+    balancer = InstanceBalancer("test")
+    balancer.set_instances(URLS)
+    client = BalancedA2AClient(URLS[0], balancer)
+    client.sent = []
+
+    async def post(url, request):
+        client.sent.append(url)
+        if url in shed:
+            raise A2AClientHTTPError(503, "overloaded")
+        return {"jsonrpc": "2.0", "id": request["id"],
+                "result": {"id": request["params"]["id"], "status": {"state": "completed"}, "history": []}}
+
+    client._post = post
+    return client
+
+
+def turn(session, task_id="t"):
+    return {"id": task_id, "sessionId": session, "message": {"role": "user", "parts": [{"type": "text", "text": "hi"}]}}
+
+
+def test_session_turns_and_polls_stay_on_one_instance():
+    client = balanced_client()
+
+    async def run():
+        for n in range(20):
+            await client.send_task(turn("s1", f"t{n}"))
+            await client.get_task({"id": f"t{n}"})
+
+    asyncio.run(run())
+    assert len(set(client.sent)) == 1
+
+
+def test_sessions_spread_across_instances():
+    client = balanced_client()
+
+    async def run():
+        for n in range(40):
+            await client.send_task(turn(f"s{n}"))
+
+    asyncio.run(run())
+    assert len(set(client.sent)) > 1
+
+
+def test_session_moves_when_its_instance_sheds_or_is_ejected():
+    shed = set()
+    client = balanced_client(shed)
+    asyncio.run(client.send_task(turn("s1", "t1")))
+    pinned = client.sent[-1]
+
+    shed.add(pinned)
+    asyncio.run(client.send_task(turn("s1", "t2")))
+    moved = client.sent[-1]
+    assert client.sent[-2:] == [pinned, moved] and moved != pinned
+
+    # Later turns and polls follow the session to its new instance
+    shed.clear()
+    asyncio.run(client.send_task(turn("s1", "t3")))
+    asyncio.run(client.get_task({"id": "t2"}))
+    assert client.sent[-2:] == [moved, moved]
+
+    client.balancer._instances[moved].ejected_until = time.monotonic() + 60
+    asyncio.run(client.send_task(turn("s1", "t4")))
+    assert client.sent[-1] != moved
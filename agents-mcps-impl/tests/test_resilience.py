@@ -0,0 +1,33 @@
+# =============================================================================
+# tests/test_resilience.py
+# =============================================================================
+# A primary attempt that loses to its hedge is cancelled; its latency must
+# still reach the tracker, or the hedge delay drifts down over time.
+# =============================================================================
+
+import asyncio
+
+import httpx
+
+from common.resilience import UpstreamClient
+
+
+def test_cancelled_primary_latency_is_recorded():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.5 if len(calls) == 1 else 0.01)
+        return httpx.Response(200, json={})
+
+    client = UpstreamClient("test", transport=httpx.MockTransport(handler))
+    for _ in range(client.latency.min_samples):
+        client.latency.record(0.05)
+
+    response = asyncio.run(client.get("http://upstream.test/"))
+
+    assert response.status_code == 200 and len(calls) == 2
+    samples = sorted(client.latency._samples)
+    # The hedge (about 0.01s) and the cancelled primary (at least delay + hedge)
+    assert len(samples) == client.latency.min_samples + 2
+    assert samples[-1] > 0.055
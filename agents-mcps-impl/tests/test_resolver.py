@@ -0,0 +1,36 @@
+# =============================================================================
+# tests/test_resolver.py
+# =============================================================================
+# Concurrent lookups of one name share the leader's query; a cancelled leader
+# (hedge loser, client disconnect) must not leave its followers waiting.
+# =============================================================================
+
+import asyncio
+
+import pytest
+
+from common.resolver import ConsulResolver, ResolutionError
+
+
+def test_cancelled_leader_releases_followers():
+    resolver = ConsulResolver()
+
+    async def run():
+        lookup_started = asyncio.Event()
+
+        async def never_answers(host):
+            lookup_started.set()
+            await asyncio.sleep(3600)
+
+        resolver._lookup = never_answers
+        leader = asyncio.create_task(resolver.resolve("weather.service.consul"))
+        await lookup_started.wait()
+        follower = asyncio.create_task(resolver.resolve("weather.service.consul"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(ResolutionError):
+            await asyncio.wait_for(follower, 1.0)
+        assert leader.cancelled()
+        assert not resolver._inflight
+
+    asyncio.run(run())
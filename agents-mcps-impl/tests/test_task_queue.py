@@ -0,0 +1,71 @@
+# =============================================================================
+# tests/test_task_queue.py
+# =============================================================================
+# Webhook deliveries run beside the background workers: a hanging webhook
+# must not keep a worker from the next queued task.
+# =============================================================================
+
+import asyncio
+
+import pytest
+from models.request import SendTaskRequest
+from models.task import TaskState
+
+from benchmarks.fakes import echo_task_manager
+from common.task_queue import BackgroundTaskRunner, PushNotifier
+
+
+class HangingNotifier(PushNotifier):
+    def __init__(self):
+        super().__init__(allowed_hosts=["127.0.0.1:9"], concurrency=1)
+        self.started = 0
+
+    async def notify(self, config, task):
+        self.started += 1
+        await asyncio.sleep(3600)
+
+
+def request(task_id: str) -> SendTaskRequest:
+    return SendTaskRequest(params={
+        "id": task_id,
+        "sessionId": "s",
+        "message": {"role": "user", "parts": [{"type": "text", "text": task_id}]},
+        "metadata": {"blocking": False, "pushNotification": {"url": "http://127.0.0.1:9/hook"}},
+    })
+
+
+def test_hanging_webhook_does_not_hold_the_worker():
+    async def run():
+        task_manager = echo_task_manager()
+        notifier = HangingNotifier()
+        runner = BackgroundTaskRunner(task_manager, workers=1, name="test", notifier=notifier)
+        for n in range(3):
+            await runner.submit(request(f"t{n}"), None)
+        await asyncio.wait_for(runner._queue.join(), 1.0)
+
+        states = [task_manager.tasks[f"t{n}"].status.state for n in range(3)]
+        pending, started = len(notifier._deliveries), notifier.started
+        await runner.close()
+        return states, pending, started, len(notifier._deliveries)
+
+    states, pending, started, left = asyncio.run(run())
+    assert states == [TaskState.COMPLETED] * 3
+    assert (pending, started, left) == (3, 1, 0)
+
+
+def test_webhooks_only_to_allowed_hosts():
+    notifier = PushNotifier(allowed_hosts=["hooks.example.com", "10.0.0.5:8443"])
+    notifier.check({"url": "https://hooks.example.com/a2a"})
+    notifier.check({"url": "http://hooks.example.com:8080/a2a"})
+    notifier.check({"url": "https://10.0.0.5:8443/"})
+    for url in ["http://127.0.0.1:8500/v1/kv/x", "https://10.0.0.5/", "file:///etc/passwd",
+                "gopher://hooks.example.com/", "http://hooks.example.com:bad/", ""]:
+        with pytest.raises(ValueError):
+            notifier.check({"url": url})
+
+
+def test_submit_rejects_disallowed_webhook():
+    runner = BackgroundTaskRunner(echo_task_manager(), workers=1, name="test", notifier=PushNotifier())
+    with pytest.raises(ValueError):
+        asyncio.run(runner.submit(request("t0"), None))
+    assert runner.pending == 0
@@ -0,0 +1,34 @@
+# =============================================================================
+# tests/test_travel_agent.py
+# =============================================================================
+# consul-adk calls `services_changed` on its Consul watcher thread, which runs
+# its own event loop, while the pooled MCP sessions live on the server loop.
+# =============================================================================
+
+import asyncio
+
+from agents.travel_agent.agent import TravelAgent
+from common.mcp_pool import PooledMcpToolset
+from utilities.consul_agent import ConsulEnabledAIAgent
+
+
+def test_removed_toolset_closed_from_watcher_thread(monkeypatch):
+    async def drop_all_mcps(self, subagents_card):
+        self._remote_mcp_tools = {}
+
+    monkeypatch.setattr(ConsulEnabledAIAgent, "services_changed", drop_all_mcps)
+
+    async def serve():
+        # Nothing listens here: the supervisors keep reconnecting until closed
+        toolset = PooledMcpToolset("http://127.0.0.1:9/sse", pool_size=2)
+        toolset.pool._ensure_started()
+        agent = TravelAgent.__new__(TravelAgent)
+        agent._remote_mcp_tools = {"currency": toolset}
+
+        watcher = lambda: asyncio.run(agent.services_changed({"agents": [], "mcp_servers": []}))
+        await asyncio.wait_for(asyncio.to_thread(watcher), 5)
+        return toolset.pool
+
+    pool = asyncio.run(serve())
+    assert pool._closed
+    assert all(task.done() for task in pool._tasks)